@@ -0,0 +1,118 @@
+"""
+Gunicorn settings for production:  gunicorn -c python:aiu_backend.gunicorn_conf
+
+Everything is tunable through the environment:
+
+    WEB_WORKER_CLASS     sync (default) | gthread | asgi
+    WEB_CONCURRENCY      worker processes (default: 2 x CPUs + 1 for sync,
+                         CPUs + 1 for gthread/asgi)
+    WEB_THREADS          threads per gthread worker (default 4); keep
+                         DB_POOL_SIZE >= WEB_THREADS
+    WEB_PRELOAD          import the app once in the master and fork it
+                         (default True): faster worker boot, and memory
+                         shared copy-on-write between workers
+    WEB_MAX_REQUESTS     recycle a worker after this many requests (default
+                         1000, plus up to WEB_MAX_REQUESTS_JITTER) to bound
+                         slow memory growth; 0 disables
+    WEB_TIMEOUT          seconds before a silent worker is killed (default 30)
+    WEB_KEEPALIVE        seconds to hold idle keep-alive connections (default 5)
+
+"asgi" serves aiu_backend.asgi with uvicorn's worker (pip install uvicorn).
+The views are synchronous, so Django runs them one at a time per worker
+under ASGI; it only pays off for async views or long-lived connections.
+
+Migrations are not run here: they belong to the release step (Procfile).
+"""
+
+import gc
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return int(default)
+
+
+_cpus = multiprocessing.cpu_count()
+worker_choice = os.getenv("WEB_WORKER_CLASS", "sync").strip().lower()
+
+if worker_choice == "asgi":
+    try:
+        import uvicorn.workers  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError("WEB_WORKER_CLASS=asgi needs uvicorn: pip install 'uvicorn[standard]'") from exc
+    worker_class = "uvicorn.workers.UvicornWorker"
+    wsgi_app = "aiu_backend.asgi:application"
+    workers = _env_int("WEB_CONCURRENCY", _cpus + 1)
+elif worker_choice == "gthread":
+    worker_class = "gthread"
+    wsgi_app = "aiu_backend.wsgi:application"
+    threads = _env_int("WEB_THREADS", 4)
+    workers = _env_int("WEB_CONCURRENCY", _cpus + 1)
+elif worker_choice == "sync":
+    worker_class = "sync"
+    wsgi_app = "aiu_backend.wsgi:application"
+    workers = _env_int("WEB_CONCURRENCY", 2 * _cpus + 1)
+else:
+    raise RuntimeError(f"WEB_WORKER_CLASS must be sync, gthread or asgi, not {worker_choice!r}")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+preload_app = os.getenv("WEB_PRELOAD", "True") == "True"
+
+max_requests = _env_int("WEB_MAX_REQUESTS", 1000)
+max_requests_jitter = _env_int("WEB_MAX_REQUESTS_JITTER", 100) if max_requests else 0
+
+timeout = _env_int("WEB_TIMEOUT", 30)
+graceful_timeout = _env_int("WEB_GRACEFUL_TIMEOUT", 30)
+keepalive = _env_int("WEB_KEEPALIVE", 5)
+
+# worker heartbeats on tmpfs: a slow disk must not get workers killed
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("WEB_ACCESS_LOG") or None  # "-" for stdout
+errorlog = "-"
+loglevel = os.getenv("WEB_LOG_LEVEL", "info")
+
+
+# ---------------- HOOKS ---------------- #
+
+def when_ready(server):
+    if not preload_app:
+        return
+    # nothing opened while importing the app may be shared with the workers
+    from django.core.cache import caches
+    from django.db import connections
+
+    from api.db.pool import close_all as close_pooled_connections
+
+    connections.close_all()
+    # with the pooled ENGINE, close_all() only checked the connections back in
+    close_pooled_connections()
+    for cache in caches.all(initialized_only=True):
+        cache.close()
+    # move everything imported so far out of the collector's reach, so the
+    # workers' GC passes do not write to (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+    server.log.info("Preloaded app; froze %d objects for copy-on-write sharing", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s booted (%s)", worker.pid, worker_class)
+
+
+def worker_exit(server, worker):
+    # runs in the exiting worker (max_requests recycling, restarts): write what it
+    # measured since its last metrics flush, or /metrics never sees it
+    try:
+        from api.metrics import metrics_enabled, store
+
+        if metrics_enabled():
+            store.maybe_flush(force=True)
+    except Exception:
+        server.log.exception("Could not flush metrics of worker %s", worker.pid)
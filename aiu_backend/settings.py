@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
@@ -34,10 +35,16 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # MUST BE AT THE TOP
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.MetricsMiddleware',  # per-request timings, /metrics
+    'api.middleware.TracingMiddleware',  # span trees of sampled/slow requests
+    'api.middleware.NPlusOneMiddleware',  # repeated-query detector (DEBUG / tests)
+    'api.middleware.CompressionMiddleware',  # brotli/gzip; before anything that edits the body
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',  # GET reads -> replicas, read-your-writes
+    'api.middleware.ProfilingMiddleware',  # staff-only ?_profile=1 / X-Profile
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -62,16 +69,83 @@ TEMPLATES = [
 ]
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': os.getenv('DB_NAME'),
-        'USER': os.getenv('DB_USER'),
-        'PASSWORD': os.getenv('DB_PASSWORD'),
-        'HOST': os.getenv('DB_HOST', 'localhost'),
-        'PORT': os.getenv('DB_PORT', '3306'),
+# DB_ENGINE=sqlite runs against a local file (SQLITE_NAME, default db.sqlite3
+# next to manage.py) - a stand-in for load tests and local experiments;
+# production uses MySQL. DB_NAME is the MySQL schema and is not used here.
+DB_ENGINE = os.getenv('DB_ENGINE', 'mysql')
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_NAME') or str(BASE_DIR / 'db.sqlite3'),
+            # concurrent load-test writers wait for the lock instead of failing
+            'OPTIONS': {'timeout': 20},
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': os.getenv('DB_NAME'),
+            'USER': os.getenv('DB_USER'),
+            'PASSWORD': os.getenv('DB_PASSWORD'),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '3306'),
+        }
+    }
+
+# Connection reuse. DB_POOL=True (the default with MySQL) switches to the pooled
+# backend (api.db.pool): each worker process keeps up to DB_POOL_SIZE connections,
+# pings one before handing it out and closes those past DB_POOL_MAX_LIFETIME or
+# idle for DB_POOL_IDLE_TIMEOUT. Django returns the connection to the pool at the
+# end of every request (CONN_MAX_AGE=0). Without the pool each thread keeps one
+# persistent, health-checked connection for CONN_MAX_AGE seconds.
+DB_POOL = os.getenv('DB_POOL', str(DB_ENGINE != 'sqlite')) == 'True'
+if DB_POOL:
+    DATABASES['default']['ENGINE'] = 'api.db.sqlite3' if DB_ENGINE == 'sqlite' else 'api.db.mysql'
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['POOL'] = {
+        'SIZE': int(os.getenv('DB_POOL_SIZE', '4')),
+        'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'MAX_LIFETIME': float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+        'IDLE_TIMEOUT': float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+        'HEALTH_CHECK': os.getenv('DB_POOL_HEALTH_CHECK', 'True') == 'True',
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('CONN_MAX_AGE', '60'))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Read replicas (api.db_router). DB_REPLICA_HOSTS=host1,host2 adds MySQL replicas
+# with the primary's credentials; with DB_ENGINE=sqlite, DB_REPLICA_NAMES lists
+# database files (copies of the primary) to try the routing locally. They become
+# the aliases "replica", "replica2", ...; GET/HEAD reads go there.
+if DB_ENGINE == 'sqlite':
+    _replicas = [n for n in os.getenv('DB_REPLICA_NAMES', '').split(',') if n.strip()]
+    _replica_config = lambda name: dict(DATABASES['default'], NAME=name.strip())
+else:
+    _replicas = [h for h in os.getenv('DB_REPLICA_HOSTS', '').split(',') if h.strip()]
+    _replica_config = lambda host: dict(DATABASES['default'], HOST=host.strip())
+
+DATABASE_REPLICAS = []
+for _i, _replica in enumerate(_replicas, start=1):
+    _alias = 'replica' if _i == 1 else f'replica{_i}'
+    # tests run every alias against the test copy of the primary
+    DATABASES[_alias] = dict(_replica_config(_replica), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ['api.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '10'))  # read-your-writes window
+# the next request of a user may reach any worker, so the marks live in a shared
+# cache; a process-local one fails the api.W003 check
+REPLICA_STICKY_CACHE_ALIAS = 'sticky'
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', '10'))  # seconds; lagging replicas are skipped
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', '5'))
+
+# Username-or-email login with profiles loaded in the same query
+AUTHENTICATION_BACKENDS = [
+    'api.backends.UsernameOrEmailBackend',
+]
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -108,14 +182,28 @@ CORS_ALLOW_CREDENTIALS = True
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # orjson when installed, DRF's encoder otherwise (api.renderers)
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    # page numbers, or keyset pages with ?pagination=cursor (api.pagination)
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.HybridPagination',
     'PAGE_SIZE': 20,
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
+    # client IP for throttles: REMOTE_ADDR by default, since anyone reaching the app
+    # directly can forge X-Forwarded-For. Behind N trusted proxies set NUM_PROXIES=N
+    # to take the hop our own proxy appended.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.getenv('LOGIN_THROTTLE_IP_RATE', '20/min'),
+        'login_username': os.getenv('LOGIN_THROTTLE_USERNAME_RATE', '10/min'),
+    },
 }
 
 # JWT Settings
@@ -131,7 +219,124 @@ SIMPLE_JWT = {
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    # tokens carry a password hash digest, so a password change ends every session
+    'CHECK_REVOKE_TOKEN': True,
+}
+
+# Caches
+# CACHE_BACKEND picks the implementation behind every alias:
+#   locmem (default) -- per process; fine for runserver / a single worker
+#   file             -- shared by all workers on one host (CACHE_LOCATION = directory)
+#   redis            -- shared by all hosts (REDIS_URL, needs the redis package)
+# "throttle" holds the login attempt counters, "auth" the cached JWT users,
+# "versions" the model version counters every cache key embeds and "sticky" the
+# read-your-writes marks of the replica router; all four must be shared by every
+# worker, so they are file based unless Redis is configured (api.throttles,
+# api.authentication, api.caching, api.db_router).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem').lower()
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'aiu_cache'))
+REDIS_URL = os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/1')
+
+
+def _cache_config(backend, location, prefix):
+    if backend == 'redis':
+        return {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': prefix,
+        }
+    if backend == 'file':
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    return {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': prefix,
+    }
+
+
+CACHES = {
+    'default': _cache_config(CACHE_BACKEND, CACHE_LOCATION, 'aiu-default'),
+    'throttle': _cache_config(
+        'redis' if CACHE_BACKEND == 'redis' else 'file',
+        os.getenv('THROTTLE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'aiu_throttle')),
+        'aiu-throttle',
+    ),
+    'auth': _cache_config(
+        'redis' if CACHE_BACKEND == 'redis' else 'file',
+        os.getenv('AUTH_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'aiu_auth')),
+        'aiu-auth',
+    ),
+    'versions': _cache_config(
+        'redis' if CACHE_BACKEND == 'redis' else 'file',
+        os.getenv('VERSIONS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'aiu_versions')),
+        'aiu-versions',
+    ),
+    'sticky': _cache_config(
+        'redis' if CACHE_BACKEND == 'redis' else 'file',
+        os.getenv('STICKY_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'aiu_sticky')),
+        'aiu-sticky',
+    ),
 }
 
+# Model version counters (api.caching). A write bumps them for every worker only
+# if the alias is shared; a process-local one fails the api.W002 check.
+MODEL_VERSION_CACHE_ALIAS = 'versions'
+
+# Seconds a cached viewset response may live (api.caching.CachePolicy); writes
+# through the ORM invalidate immediately, the TTL only bounds .update() drift.
+VIEWSET_CACHE_TTL = int(os.getenv('VIEWSET_CACHE_TTL', '60'))
+
+LOGIN_THROTTLE_ENABLED = os.getenv('LOGIN_THROTTLE_ENABLED', 'True') == 'True'
+
+# Response compression (api.middleware.CompressionMiddleware)
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))  # bytes
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))
+
+# Request metrics (api.metrics). Each worker writes its histograms to METRICS_DIR;
+# /metrics sums them. Scrapers authenticate with "Authorization: Bearer <METRICS_TOKEN>"
+# or come from METRICS_ALLOWED_IPS; staff JWTs are accepted too.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'aiu_metrics'))
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '1.0'))  # seconds
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
+# N+1 query detection (api.nplusone): a query shape repeated more than
+# NPLUSONE_THRESHOLD times in one request is logged, or raised with NPLUSONE_RAISE.
+# The test runner always raises, so regressions fail the build.
+NPLUSONE_ENABLED = os.getenv('NPLUSONE_ENABLED', str(DEBUG)) == 'True'
+NPLUSONE_THRESHOLD = int(os.getenv('NPLUSONE_THRESHOLD', '5'))
+NPLUSONE_RAISE = os.getenv('NPLUSONE_RAISE', 'False') == 'True'
+NPLUSONE_IGNORE = []  # regexes matched against normalised SQL
+TEST_RUNNER = 'api.test_runner.NPlusOneTestRunner'
+
+# Request tracing (api.tracing). Every request records spans; a trace is written
+# to TRACING_DIR when sampled or when it took at least TRACING_SLOW_MS.
+# Read them with "manage.py traces".
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'True') == 'True'
+TRACING_DIR = os.getenv('TRACING_DIR', os.path.join(tempfile.gettempdir(), 'aiu_traces'))
+TRACING_SAMPLE_RATE = float(os.getenv('TRACING_SAMPLE_RATE', '0.01'))
+TRACING_SLOW_MS = float(os.getenv('TRACING_SLOW_MS', '1000'))
+TRACING_MAX_SPANS = int(os.getenv('TRACING_MAX_SPANS', '2000'))
+TRACING_MAX_BYTES = int(os.getenv('TRACING_MAX_BYTES', str(10 * 1024 * 1024)))
+TRACING_BACKUP_COUNT = int(os.getenv('TRACING_BACKUP_COUNT', '3'))
+TRACING_MAX_TOTAL_BYTES = int(os.getenv('TRACING_MAX_TOTAL_BYTES', str(100 * 1024 * 1024)))  # all workers
+
+# Staff profiling (api.profiling): "X-Profile: 1" (cProfile) or "X-Profile: sample"
+# stores a profile in PROFILING_DIR; list/download under /api/profiles/.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True') == 'True'
+PROFILING_DIR = os.getenv('PROFILING_DIR', os.path.join(tempfile.gettempdir(), 'aiu_profiles'))
+PROFILING_KEEP = int(os.getenv('PROFILING_KEEP', '50'))
+PROFILING_SAMPLE_INTERVAL = float(os.getenv('PROFILING_SAMPLE_INTERVAL', '0.001'))  # seconds
+
+# Cached JWT user resolution (api.authentication). Version bumps must reach every
+# worker, so the alias is shared; a process-local one fails the api.W001 check.
+AUTH_USER_CACHE_ALIAS = 'auth'
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '60'))
+
 # Custom User Model
 AUTH_USER_MODEL = 'api.User'
\ No newline at end of file
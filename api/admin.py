@@ -17,12 +17,14 @@ class UserAdmin(BaseUserAdmin):
 @admin.register(StudentProfile)
 class StudentProfileAdmin(admin.ModelAdmin):
     list_display = ['student_id', 'user', 'program', 'year', 'status', 'total_bookings', 'active_rentals', 'tutorials_watched']
+    list_select_related = ['user']
     list_filter = ['year', 'status', 'program']
     search_fields = ['student_id', 'user__username', 'user__email', 'user__first_name', 'user__last_name']
 
 @admin.register(AdminProfile)
 class AdminProfileAdmin(admin.ModelAdmin):
     list_display = ['admin_id', 'user', 'role', 'status', 'department']
+    list_select_related = ['user']
     list_filter = ['role', 'status']
     search_fields = ['admin_id', 'user__username', 'user__email']
 
@@ -36,12 +38,14 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Tutorial)
 class TutorialAdmin(admin.ModelAdmin):
     list_display = ['title', 'category', 'level', 'duration', 'views', 'is_active', 'created_at']
+    list_select_related = ['category']
     list_filter = ['category', 'level', 'is_active']
     search_fields = ['title', 'description']
 
 @admin.register(TutorialProgress)
 class TutorialProgressAdmin(admin.ModelAdmin):
     list_display = ['student', 'tutorial', 'progress_percentage', 'completed', 'last_watched_at']
+    list_select_related = ['student', 'tutorial']
     list_filter = ['completed']
     search_fields = ['student__username', 'tutorial__title']
 
@@ -65,6 +69,7 @@ class LabBookingAdmin(admin.ModelAdmin):
         'reviewed_by',
         'created_at',
     ]
+    list_select_related = ['lab', 'student', 'reviewed_by']
     list_filter = ['status', 'booking_date', 'lab']
     search_fields = ['student__username', 'student__student_profile__student_id', 'lab__name']
     readonly_fields = ['created_at', 'updated_at', 'reviewed_at']
@@ -107,6 +112,7 @@ class EquipmentRentalAdmin(admin.ModelAdmin):
         'issued_by',
         'returned_to',
     ]
+    list_select_related = ['equipment', 'student', 'reviewed_by', 'issued_by', 'returned_to']
     list_filter = ['status', 'rental_date', 'reviewed_at']
     search_fields = [
         'student__username',
@@ -123,6 +129,7 @@ class EquipmentRentalAdmin(admin.ModelAdmin):
 @admin.register(CV)
 class CVAdmin(admin.ModelAdmin):
     list_display = ['student', 'full_name', 'status', 'reviewed_by', 'created_at', 'updated_at']
+    list_select_related = ['student', 'reviewed_by']
     list_filter = ['status', 'created_at']
     search_fields = ['student__username', 'student__student_profile__student_id', 'full_name']
 
@@ -131,40 +138,47 @@ class CVAdmin(admin.ModelAdmin):
 @admin.register(Education)
 class EducationAdmin(admin.ModelAdmin):
     list_display = ['cv', 'degree', 'institution', 'start_date', 'end_date', 'order']
+    list_select_related = ['cv__student']  # CV.__str__ reads the student
     list_filter = ['institution']
     search_fields = ['degree', 'institution', 'cv__student__username']
 
 @admin.register(Experience)
 class ExperienceAdmin(admin.ModelAdmin):
     list_display = ['cv', 'position', 'company', 'start_date', 'end_date', 'order']
+    list_select_related = ['cv__student']  # CV.__str__ reads the student
     list_filter = ['company']
     search_fields = ['position', 'company', 'cv__student__username']
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
     list_display = ['cv', 'name', 'url', 'order']
+    list_select_related = ['cv__student']  # CV.__str__ reads the student
     search_fields = ['name', 'technologies', 'cv__student__username']
 
 @admin.register(Certification)
 class CertificationAdmin(admin.ModelAdmin):
     list_display = ['cv', 'name', 'issuer', 'year', 'order']
+    list_select_related = ['cv__student']  # CV.__str__ reads the student
     list_filter = ['year', 'issuer']
     search_fields = ['name', 'issuer', 'cv__student__username']
 
 @admin.register(Involvement)
 class InvolvementAdmin(admin.ModelAdmin):
     list_display = ['cv', 'role', 'organization', 'year', 'order']
+    list_select_related = ['cv__student']  # CV.__str__ reads the student
     list_filter = ['year', 'organization']
     search_fields = ['role', 'organization', 'cv__student__username']
 
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
     list_display = ['cv', 'name', 'order']
+    list_select_related = ['cv__student']  # CV.__str__ reads the student
     search_fields = ['name', 'cv__student__username']
 
 @admin.register(Reference)
 class ReferenceAdmin(admin.ModelAdmin):
     list_display = ['cv', 'name', 'position', 'workplace', 'phone', 'email', 'order']
+    list_select_related = ['cv__student']  # CV.__str__ reads the student
     search_fields = ['name', 'workplace', 'cv__student__username']
 
 # ✅ NEW: Languages & Awards
@@ -172,11 +186,13 @@ class ReferenceAdmin(admin.ModelAdmin):
 @admin.register(Language)
 class LanguageAdmin(admin.ModelAdmin):
     list_display = ['cv', 'name', 'proficiency', 'order']
+    list_select_related = ['cv__student']  # CV.__str__ reads the student
     list_filter = ['proficiency']
     search_fields = ['name', 'cv__student__username']
 
 @admin.register(Award)
 class AwardAdmin(admin.ModelAdmin):
     list_display = ['cv', 'title', 'issuer', 'year', 'order']
+    list_select_related = ['cv__student']  # CV.__str__ reads the student
     list_filter = ['year', 'issuer']
     search_fields = ['title', 'issuer', 'cv__student__username']
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.core import checks
+
+        from . import signals  # noqa: F401
+        from .authentication import check_auth_cache_shared
+        from .caching import check_versions_cache_shared
+        from .db_router import check_sticky_cache_shared
+
+        checks.register(check_auth_cache_shared, checks.Tags.caches)
+        checks.register(check_versions_cache_shared, checks.Tags.caches)
+        checks.register(check_sticky_cache_shared, checks.Tags.caches)
@@ -0,0 +1,175 @@
+"""
+JWT authentication with a short-lived, versioned user cache.
+
+simplejwt's JWTAuthentication loads the User row on every request, and views
+then probe `student_profile` / `admin_profile`, which costs more queries.
+CachedJWTAuthentication resolves the user (plus which profile it has) from the
+cache instead.
+
+Revocation is kept: every User / profile save or delete bumps a per-user
+version that is part of the cache key, so a deactivated user or changed
+password is seen on the very next request. The TTL only bounds how long a
+change made without signals (queryset.update) can go unnoticed. The cache
+(AUTH_USER_CACHE_ALIAS, "auth") is shared by all workers so bumps reach every
+process; a process-local one is reported by the api.W001 system check. Bumps
+wait for the write to commit (see signals.py).
+
+The password hash never goes into the cache: entries hold the other column
+values plus the token-revocation stamp, and the rebuilt user has `password`
+deferred, so the few views that check a password load it from the database.
+"""
+
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.db.models import Exists, OuterRef
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .caching import is_process_local
+from .models import User, StudentProfile, AdminProfile
+
+
+def _auth_cache():
+    try:
+        return caches[getattr(settings, "AUTH_USER_CACHE_ALIAS", "auth")]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+def check_auth_cache_shared(app_configs, **kwargs):
+    """A per-process auth cache would keep revoked users logged in on the other workers."""
+    try:
+        local = is_process_local(_auth_cache())
+    except Exception:
+        return []
+    if not local or settings.DEBUG:
+        return []
+    return [checks.Warning(
+        "The auth user cache is process-local, so a deactivated user or changed password "
+        "is only seen by the worker that made the change until AUTH_USER_CACHE_TTL expires.",
+        hint="Point AUTH_USER_CACHE_ALIAS at a file or Redis cache shared by every worker.",
+        id="api.W001",
+    )]
+
+
+def _auth_ttl() -> int:
+    return int(getattr(settings, "AUTH_USER_CACHE_TTL", 60))
+
+
+def _version_key(user_id) -> str:
+    return f"auth:user-version:{user_id}"
+
+
+def user_cache_version(user_id) -> int:
+    cache = _auth_cache()
+    key = _version_key(user_id)
+    v = cache.get(key)
+    if v is None:
+        # clock-seeded so an evicted counter never repeats a version still cached
+        cache.add(key, time.time_ns() // 1000, None)
+        v = cache.get(key) or 0
+    return int(v)
+
+
+def invalidate_cached_user(user_id) -> None:
+    """Make every cached copy of this user unreachable (call on any user/profile change)."""
+    if not user_id:
+        return
+    cache = _auth_cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns() // 1000, None)
+
+
+def load_user_for_auth(user_id):
+    """One query: the user row plus flags for which profile rows exist."""
+    return (
+        User.objects.annotate(
+            _has_student_profile=Exists(StudentProfile.objects.filter(user=OuterRef("pk"))),
+            _has_admin_profile=Exists(AdminProfile.objects.filter(user=OuterRef("pk"))),
+        )
+        .get(**{api_settings.USER_ID_FIELD: user_id})
+    )
+
+
+def _mark_missing_profiles(user):
+    """
+    Prime the reverse one-to-one cache with None for profiles the user does not have,
+    so `hasattr(user, "admin_profile")` is False without a query. Existing profiles
+    stay lazy and are always read fresh.
+    """
+    if not getattr(user, "_has_student_profile", True):
+        user._state.fields_cache["student_profile"] = None
+    if not getattr(user, "_has_admin_profile", True):
+        user._state.fields_cache["admin_profile"] = None
+    return user
+
+
+def _cache_entry(user):
+    """Plain values of a freshly loaded user: every column but the password hash."""
+    return {
+        "db": user._state.db,
+        "values": {
+            f.attname: user.__dict__[f.attname]
+            for f in User._meta.concrete_fields if f.attname != "password"
+        },
+        "revoke_stamp": get_md5_hash_password(user.password),
+        "has_student_profile": user._has_student_profile,
+        "has_admin_profile": user._has_admin_profile,
+    }
+
+
+def _user_from_entry(entry):
+    values = entry["values"]
+    user = User.from_db(entry["db"], list(values), list(values.values()))
+    user._auth_revoke_stamp = entry["revoke_stamp"]
+    user._has_student_profile = entry["has_student_profile"]
+    user._has_admin_profile = entry["has_admin_profile"]
+    return user
+
+
+def get_cached_user(user_id):
+    """User for auth purposes, from cache when possible. Raises User.DoesNotExist."""
+    cache = _auth_cache()
+    key = f"auth:user-entry:{user_id}:v{user_cache_version(user_id)}"
+
+    entry = cache.get(key)
+    if entry is None:
+        entry = _cache_entry(load_user_for_auth(user_id))
+        cache.set(key, entry, _auth_ttl())
+
+    return _mark_missing_profiles(_user_from_entry(entry))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """Drop-in JWTAuthentication that resolves the user from the versioned auth cache."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = get_cached_user(user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != user._auth_revoke_stamp:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
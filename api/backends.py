@@ -0,0 +1,58 @@
+"""
+Authentication backend used by the login endpoints and the Django admin.
+"""
+
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+
+from .models import User
+
+
+def find_login_user(identifier):
+    """
+    Resolve a login identifier (username, or email when it contains "@") in one query,
+    with student_profile / admin_profile joined in so callers never probe them again.
+    Emails match case-insensitively (an exact match is preferred); usernames are
+    case-sensitive, as in Django. An email match wins over a username match, like
+    the old two-step lookup.
+    """
+    identifier = (identifier or "").strip()
+    if not identifier:
+        return None
+
+    qs = User.objects.select_related("student_profile", "admin_profile")
+
+    if "@" not in identifier:
+        return qs.filter(username=identifier).first()
+
+    candidates = list(qs.filter(Q(email__iexact=identifier) | Q(username=identifier)).order_by("pk")[:5])
+    for u in candidates:
+        if u.email == identifier:
+            return u
+    for u in candidates:
+        if u.email.lower() == identifier.lower():
+            return u
+    for u in candidates:
+        if u.username == identifier:
+            return u
+    return None
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """ModelBackend that accepts username or email and loads the profile in the same query."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = find_login_user(username)
+        if user is None:
+            # run the hasher anyway so unknown users take as long as wrong passwords
+            User().set_password(password)
+            return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,18 @@
+"""
+Micro-benchmarks for hot pure helpers (time-slot parsing, booking status
+text, CSV export rows, CV PDF rendering, QR images).
+
+Benchmarks are registered in api.benchmarks.suites with @benchmark; each
+one receives the shared fixtures and returns the zero-argument callable to
+time, so setup never lands in the measurement. Run them with
+
+    python manage.py microbench [--filter csv] [--save before] [--compare before]
+
+Results are per-call statistics over several repeats (see core.measure);
+saved baselines live in BENCHMARK_DIR (default .benchmarks/) so a change
+can be compared against the numbers from before it on the same machine.
+"""
+
+from .core import BENCHMARKS, benchmark, compare_results, load_results, measure, save_results
+
+__all__ = ["BENCHMARKS", "benchmark", "compare_results", "load_results", "measure", "save_results"]
@@ -0,0 +1,147 @@
+"""
+Registry, timing loop, statistics and saved baselines for api.benchmarks.
+"""
+
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from django.conf import settings
+
+
+BENCHMARKS = {}  # name -> (factory, group)
+
+
+def benchmark(name, group=""):
+    """Register `factory(fixtures) -> callable` under `name`."""
+    def register(factory):
+        if name in BENCHMARKS:
+            raise ValueError(f"benchmark {name!r} registered twice")
+        BENCHMARKS[name] = (factory, group or name.split(".", 1)[0])
+        return factory
+    return register
+
+
+# ---------------- TIMING ---------------- #
+
+def _calibrate(fn, sample_time):
+    """Loops per sample so one sample takes about sample_time (as timeit.autorange)."""
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= sample_time or loops >= 10_000_000:
+            return loops
+        loops = max(loops * 2, int(loops * sample_time / max(elapsed, 1e-9) * 0.9))
+
+
+def measure(fn, repeat=7, sample_time=0.1, warmup=1):
+    """
+    Per-call timings of fn: `repeat` samples of N calls each, N chosen so a
+    sample takes ~sample_time. GC is off while sampling, as in timeit.
+    Returns {"loops", "repeat", "min", "median", "mean", "stdev", "samples"} in seconds per call.
+    """
+    for _ in range(warmup):
+        fn()
+    loops = _calibrate(fn, sample_time)
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter() - t0) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        "loops": loops,
+        "repeat": repeat,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "samples": samples,
+    }
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+# ---------------- BASELINES ---------------- #
+
+def benchmark_dir():
+    return getattr(settings, "BENCHMARK_DIR", None) or os.path.join(str(settings.BASE_DIR), ".benchmarks")
+
+
+def _path(name):
+    if os.sep in name or name.endswith(".json"):
+        return name
+    return os.path.join(benchmark_dir(), f"{name}.json")
+
+
+def save_results(name, results):
+    path = _path(name)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    payload = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "node": platform.node(),
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(path, "w") as fh:
+        json.dump(payload, fh, indent=2)
+    return path
+
+
+def load_results(name):
+    with open(_path(name)) as fh:
+        return json.load(fh)
+
+
+def _noise(stats):
+    """Relative spread of a result: stdev / median."""
+    return stats["stdev"] / stats["median"] if stats["median"] else 0.0
+
+
+def compare_results(baseline, current, min_change=0.05):
+    """
+    Rows of (name, old median, new median, ratio, verdict). A change counts
+    only when it exceeds both min_change and twice the combined noise of
+    the two runs; otherwise the verdict is "same".
+    """
+    rows = []
+    old_results = baseline.get("results", {})
+    for name, new in current.items():
+        old = old_results.get(name)
+        if old is None:
+            rows.append((name, None, new["median"], None, "new"))
+            continue
+        ratio = new["median"] / old["median"] if old["median"] else float("inf")
+        threshold = max(min_change, 2 * (_noise(old) + _noise(new)))
+        if ratio < 1 - threshold:
+            verdict = "faster"
+        elif ratio > 1 + threshold:
+            verdict = "slower"
+        else:
+            verdict = "same"
+        rows.append((name, old["median"], new["median"], ratio, verdict))
+    return rows
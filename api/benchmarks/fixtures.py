@@ -0,0 +1,118 @@
+"""
+Rows the benchmarks run on. Created with bulk_create (no QR files, no
+signals) inside the transaction the microbench command rolls back, then
+loaded the way the real views load them.
+"""
+
+from datetime import time as dtime, timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from api.models import (
+    Award, CV, Certification, Education, Equipment, EquipmentCategory, EquipmentCategoryMapping,
+    EquipmentRental, Experience, Involvement, Lab, LabBooking, Language, Project, Reference, Skill,
+    StudentProfile, User,
+)
+
+
+COMMENTS = (
+    "",
+    "Approved by lab staff",
+    "EXTENDED: 09:00-11:00 -> 09:00-13:00 (extended by student at 2025-03-02 10:41:07)",
+    "Cancelled by student",
+    "CHECKOUT: 2025-03-02 12:58:31 (checked out by student)",
+    "Approved\nCHECKOUT: 2025-03-04 16:59:02",
+)
+TIME_SLOTS = ("09:00-11:00", " 11:00 - 13:00 ", "13:00–15:00", "15:00:00-17:00:00", "17:00-19:00", "bad", "", None)
+
+
+class Fixtures:
+    def __init__(self, rows=200):
+        self.rows = rows
+        self.time_slots = TIME_SLOTS
+        now = timezone.now()
+
+        # "!" is an unusable password: no hashing during setup
+        admin = User.objects.create(username="bench_admin", password="!", user_type="admin", is_staff=True,
+                                    first_name="Bench", last_name="Admin")
+        User.objects.bulk_create([
+            User(username=f"bench_s{i}", password="!", first_name="Student", last_name=str(i))
+            for i in range(50)
+        ])
+        users = list(User.objects.filter(username__startswith="bench_s").order_by("id"))
+        StudentProfile.objects.bulk_create([
+            StudentProfile(user=u, student_id=f"BENCH{i:04d}", year="2") for i, u in enumerate(users)
+        ])
+
+        lab = Lab.objects.create(name="Bench Lab", description="-", capacity=30, location="-", facilities="iMac")
+        statuses = ("pending", "approved", "completed", "rejected", "cancelled")
+        LabBooking.objects.bulk_create([
+            LabBooking(
+                lab=lab, student=users[i % len(users)], booking_date=now.date() + timedelta(days=i % 20),
+                start_time=dtime(9), end_time=dtime(11), time_slot=None if i % 17 == 0 else "09:00-11:00",
+                imac_number=i % 30 + 1, purpose="Editing", status=statuses[i % len(statuses)],
+                admin_comment=COMMENTS[i % len(COMMENTS)], reviewed_by=admin if i % 2 else None,
+            )
+            for i in range(rows)
+        ])
+
+        category = EquipmentCategory.objects.create(name="Bench cameras")
+        Equipment.objects.bulk_create([
+            Equipment(name=f"Bench camera {i}", description="-", category="camera", equipment_id=f"BENCH-{i:04d}",
+                      quantity_total=3, quantity_available=3)
+            for i in range(max(rows // 2, 1))
+        ])
+        equipment = list(Equipment.objects.filter(equipment_id__startswith="BENCH-").order_by("id"))
+        EquipmentCategoryMapping.objects.bulk_create([
+            EquipmentCategoryMapping(equipment=e, category=category) for e in equipment
+        ])
+        rental_statuses = ("pending", "approved", "active", "returned", "overdue")
+        EquipmentRental.objects.bulk_create([
+            EquipmentRental(
+                equipment=equipment[i % len(equipment)], student=users[i % len(users)],
+                status=rental_statuses[i % len(rental_statuses)], rental_date=now - timedelta(days=i % 10),
+                expected_return_date=now + timedelta(days=3 - i % 7),
+                actual_return_date=now if i % 5 == 3 else None, issued_by=admin if i % 2 else None,
+            )
+            for i in range(rows)
+        ])
+
+        self.lab = lab
+        self.bookings = list(
+            LabBooking.objects.filter(lab=lab).select_related("student", "student__student_profile", "reviewed_by")
+            .order_by("-created_at", "-id")
+        )
+        self.rentals = list(
+            EquipmentRental.objects.filter(equipment__in=equipment)
+            .select_related("equipment", "student", "student__student_profile", "issued_by")
+            .order_by("-rental_date", "-id")
+        )
+        self.equipment = list(
+            Equipment.objects.filter(pk__in=[e.pk for e in equipment]).prefetch_related("categories")
+            .annotate(rented_count=Count("rentals", filter=Q(rentals__status__in=Equipment.RENTED_STATUSES)))
+            .order_by("equipment_id", "id")
+        )
+        self.cvs = {"small": self._cv(users[0], 1), "full": self._cv(users[1], 6)}
+
+    def _cv(self, student, n):
+        cv = CV.objects.create(
+            student=student, full_name=f"Student {student.last_name}", title="Video Editor",
+            summary="Media student who edits short films, shoots events and runs the club's social channels. " * 2,
+            email="bench@example.com", phone="0100000000", location="Kuala Lumpur",
+        )
+        for j in range(n):
+            Education.objects.create(cv=cv, degree="Bachelor of Media & Communication", institution="AIU",
+                                     start_date=str(2020 + j), end_date=str(2024 + j), description="Coursework " * 10, order=j)
+            Experience.objects.create(cv=cv, position="Video Editor", company="Studio", start_date=str(2021 + j),
+                                      end_date=str(2022 + j), description="Cut promos and interviews. " * 4, order=j)
+            Project.objects.create(cv=cv, name=f"Short film {j}", description="Edited and graded a short film. " * 3,
+                                   technologies="Premiere Pro, DaVinci Resolve", order=j)
+            Skill.objects.create(cv=cv, name=f"Skill {j}", order=j)
+            Language.objects.create(cv=cv, name=f"Language {j}", proficiency="Fluent", order=j)
+            Award.objects.create(cv=cv, title=f"Award {j}", issuer="AIU", year=str(2022 + j), order=j)
+            Certification.objects.create(cv=cv, name=f"Certificate {j}", issuer="Adobe", year=str(2023), order=j)
+            Involvement.objects.create(cv=cv, role="Member", organization="Film Society", year=str(2022), order=j)
+            Reference.objects.create(cv=cv, name=f"Lecturer {j}", position="Lecturer", workplace="AIU",
+                                     phone="0100000000", email="ref@example.com", order=j)
+        return cv
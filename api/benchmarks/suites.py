@@ -0,0 +1,109 @@
+"""
+The registered benchmarks. Each factory gets the Fixtures and returns the
+callable to time; viewset helpers are called on bare instances, exactly as
+the export/booking code paths call them.
+"""
+
+import csv
+import io
+
+from api.qr import qr_png
+from api.serializers import LabBookingSerializer
+from api.views import CVViewSet, EquipmentRentalViewSet, EquipmentViewSet, LabBookingViewSet, LabViewSet
+
+from .core import benchmark
+
+
+# ---------------- TIME SLOTS ---------------- #
+
+@benchmark("timeslot.normalize")
+def _normalize(fx):
+    normalize = LabBookingViewSet()._normalize_time_slot
+    slots = fx.time_slots
+
+    def run():
+        for s in slots:
+            normalize(s)
+    return run
+
+
+@benchmark("timeslot.parse")
+def _parse(fx):
+    parse = LabBookingSerializer()._parse_time_slot
+    normalize = LabBookingViewSet()._normalize_time_slot
+    slots = [n for n in map(normalize, fx.time_slots) if n]
+
+    def run():
+        for s in slots:
+            parse(s)
+    return run
+
+
+# ---------------- LAB BOOKINGS ---------------- #
+
+@benchmark("lab.combined_status")
+def _combined_status(fx):
+    fn = LabViewSet()._get_combined_status
+    bookings = fx.bookings
+
+    def run():
+        for b in bookings:
+            fn(b)
+    return run
+
+
+@benchmark("lab.checkout_time")
+def _checkout_time(fx):
+    fn = LabViewSet()._checkout_time_from_comment
+    bookings = fx.bookings
+
+    def run():
+        for b in bookings:
+            fn(b)
+    return run
+
+
+# ---------------- CSV EXPORTS ---------------- #
+
+def _csv_loop(rows, make_row):
+    def run():
+        writer = csv.writer(io.StringIO())
+        for r in rows:
+            writer.writerow(make_row(r))
+    return run
+
+
+@benchmark("csv.lab_bookings")
+def _csv_bookings(fx):
+    view = LabViewSet()
+    return _csv_loop(fx.bookings, lambda b: view._export_row(fx.lab, b))
+
+
+@benchmark("csv.equipment_rentals")
+def _csv_rentals(fx):
+    return _csv_loop(fx.rentals, EquipmentRentalViewSet()._export_row)
+
+
+@benchmark("csv.equipment")
+def _csv_equipment(fx):
+    return _csv_loop(fx.equipment, EquipmentViewSet()._export_row)
+
+
+# ---------------- DOCUMENTS ---------------- #
+
+@benchmark("cv.pdf_small")
+def _cv_pdf_small(fx):
+    # includes the section queries _build_cv_pdf runs itself
+    build, cv = CVViewSet()._build_cv_pdf, fx.cvs["small"]
+    return lambda: build(cv)
+
+
+@benchmark("cv.pdf_full")
+def _cv_pdf_full(fx):
+    build, cv = CVViewSet()._build_cv_pdf, fx.cvs["full"]
+    return lambda: build(cv)
+
+
+@benchmark("qr.png")
+def _qr(fx):
+    return lambda: qr_png("EQ-00042")
@@ -0,0 +1,219 @@
+"""
+Cache helpers shared by the api app.
+
+Invalidation is version based: every model we cache data for has a version
+number in the cache, bumped by model signals (see signals.py). Cache keys embed
+the versions of the models they depend on, so a write makes old entries
+unreachable instantly and they simply expire on their own.
+
+The same versions drive the per-viewset response cache (CachePolicy /
+CachedViewSetMixin), the dashboard caches and conditional GET ETags. The
+versions live in MODEL_VERSION_CACHE_ALIAS ("versions"), which has to be
+shared by every worker: a bump made by one worker must invalidate the entries
+of all of them (a process-local alias is reported by the api.W002 check).
+Cached data itself goes to CACHES["default"]: local memory, files or Redis
+(see settings.py); since its keys embed the versions it may be per worker.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.db import transaction
+from rest_framework.response import Response
+
+
+def _versions_cache():
+    try:
+        return caches[getattr(settings, "MODEL_VERSION_CACHE_ALIAS", "versions")]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+def is_process_local(cache) -> bool:
+    """True for caches each worker process has its own copy of."""
+    return cache.__class__.__name__ == "LocMemCache"
+
+
+def check_versions_cache_shared(app_configs, **kwargs):
+    """Per-process versions would leave the other workers serving stale cached data."""
+    try:
+        local = is_process_local(_versions_cache())
+    except Exception:
+        return []
+    if not local or settings.DEBUG:
+        return []
+    return [checks.Warning(
+        "The model version cache is process-local, so a write only invalidates the cached "
+        "responses, dashboards and ETags of the worker that handled it.",
+        hint="Point MODEL_VERSION_CACHE_ALIAS at a file or Redis cache shared by every worker.",
+        id="api.W002",
+    )]
+
+
+def _version_key(model) -> str:
+    return f"model-version:{model._meta.label_lower}"
+
+
+def model_version(model) -> int:
+    """Current version of a model's data (created on first use)."""
+    cache = _versions_cache()
+    key = _version_key(model)
+    v = cache.get(key)
+    if v is None:
+        # start from a clock value so an evicted counter never repeats an old version
+        cache.add(key, time.time_ns() // 1000, None)
+        v = cache.get(key) or 0
+    return int(v)
+
+
+def bump_model_version(model) -> None:
+    cache = _versions_cache()
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns() // 1000, None)
+
+
+def versions_fingerprint(models) -> str:
+    """Short string of the versions of several models, for use inside cache keys."""
+    return ".".join(str(model_version(m)) for m in models)
+
+
+def bump_versions_on_commit(*models) -> None:
+    """
+    Bump model versions once the current transaction commits. For writes that
+    send no signals: bulk_create / bulk_update / queryset .update().
+    """
+    models = tuple(dict.fromkeys(models))
+
+    def bump():
+        for model in models:
+            bump_model_version(model)
+
+    transaction.on_commit(bump)
+
+
+# ---------------- VIEWSET RESPONSE CACHE ---------------- #
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+
+def _record(name, hit):
+    with _stats_lock:
+        _stats[name]["hits" if hit else "misses"] += 1
+
+
+def cache_stats():
+    """Hit/miss counters of this worker process, per viewset policy."""
+    with _stats_lock:
+        per_viewset = {k: dict(v) for k, v in sorted(_stats.items())}
+    hits = sum(v["hits"] for v in per_viewset.values())
+    misses = sum(v["misses"] for v in per_viewset.values())
+    return {
+        "pid": os.getpid(),
+        "per_worker": True,  # each worker counts its own requests
+        "backend": settings.CACHES.get("default", {}).get("BACKEND"),
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 3) if (hits + misses) else None,
+        "viewsets": per_viewset,
+    }
+
+
+class CachePolicy:
+    """
+    Declarative response caching for a viewset (see CachedViewSetMixin).
+
+    models   -- every model the serialized output depends on; a write to any of
+                them (post_save/post_delete/m2m, see signals.py) invalidates
+    actions  -- which read actions are cached
+    scope    -- "public": same response for every caller
+                "role":   one entry for admins, one for everyone else
+                "user":   one entry per user (querysets filtered by request.user)
+    timeout  -- seconds (default settings.VIEWSET_CACHE_TTL); bounds staleness from
+                a signal-less write that forgot bump_versions_on_commit()
+    """
+
+    SCOPES = ("public", "role", "user")
+
+    def __init__(self, models, actions=("list", "retrieve"), scope="public", timeout=None, alias="default"):
+        if scope not in self.SCOPES:
+            raise ValueError(f"unknown cache scope {scope!r}")
+        self.models = tuple(models)
+        self.actions = tuple(actions)
+        self.scope = scope
+        self._timeout = timeout
+        self.alias = alias
+
+    @property
+    def timeout(self):
+        if self._timeout is not None:
+            return self._timeout
+        return int(getattr(settings, "VIEWSET_CACHE_TTL", 60))
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _scope_part(self, request):
+        user = request.user
+        if self.scope == "user":
+            return f"u{user.pk}" if user.is_authenticated else "anon"
+        if self.scope == "role":
+            admin = user.is_authenticated and (user.is_staff or getattr(user, "user_type", "") == "admin")
+            return "admin" if admin else "member"
+        return "all"
+
+    def key(self, view, request):
+        # host is part of the key because file/image fields are absolute URLs
+        raw = "|".join([request.get_host(), request.path, urlencode(sorted(request.GET.lists()), doseq=True)])
+        digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+        return "vs:{}:{}:{}:{}:{}".format(
+            view.basename, view.action, self._scope_part(request), versions_fingerprint(self.models), digest,
+        )
+
+
+class CachedViewSetMixin:
+    """
+    Serve list/retrieve from the cache according to `cache_policy`.
+    Only successful responses are stored. Responses carry X-Cache: HIT/MISS.
+    """
+
+    cache_policy = None
+
+    def _cached(self, request, render):
+        policy = self.cache_policy
+        if policy is None or self.action not in policy.actions or request.method != "GET":
+            return render()
+
+        name = self.basename or type(self).__name__
+        key = policy.key(self, request)
+        data = policy.cache.get(key)
+        if data is not None:
+            _record(name, True)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = render()
+        _record(name, False)
+        if response.status_code == 200:
+            policy.cache.set(key, response.data, policy.timeout)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(request, lambda: super(CachedViewSetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(request, lambda: super(CachedViewSetMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,163 @@
+"""
+Conditional GET (ETag / Last-Modified) for viewset list and retrieve.
+
+The validator is computed without serializing anything: one aggregate query
+over the filtered queryset (row count, max pk, max updated_at) plus the cache
+versions of the models the response depends on (bumped by signals on every
+write, deletes included). When the client already has that state the view
+answers 304 and never runs the serializer.
+
+Invariant: the aggregate only sees the viewset's own table, so a nested
+serializer's rows (CV sections, request items...) are covered by their model
+versions alone. Every write that sends no signals -- bulk_create,
+bulk_update, queryset .update() -- must call
+caching.bump_versions_on_commit() for the models it wrote, or clients keep
+getting 304 for stale data.
+
+The validator and the response read the same queryset, so get_queryset() runs
+once per request: some of them do work before returning (marking finished lab
+bookings completed, overdue rentals overdue) that must not happen twice.
+"""
+
+import functools
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .caching import versions_fingerprint
+
+
+def dependent_models(model):
+    """
+    The model plus the api models it points at (FK / one-to-one / m2m),
+    User included: logins write only last_login, which bumps no version.
+    """
+    models = [model]
+    for f in model._meta.get_fields():
+        related = getattr(f, "related_model", None)
+        if not related or f.auto_created:
+            continue
+        if related._meta.app_label == model._meta.app_label and related not in models:
+            models.append(related)
+    return models
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison: W/"x" and "x" are the same validator
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def _once_per_request(get_queryset):
+    """Memoize a viewset's get_queryset() on the view instance (DRF builds one per request)."""
+
+    @functools.wraps(get_queryset)
+    def wrapper(self):
+        memo = self.__dict__.setdefault("_querysets", {})
+        if wrapper not in memo:
+            memo[wrapper] = get_queryset(self)
+        return memo[wrapper].all()
+
+    return wrapper
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag/Last-Modified to list/retrieve and answers 304 when unchanged.
+
+    conditional_models -- models whose writes must change the validator;
+                          defaults to the cache_policy models, else dependent_models()
+    """
+
+    conditional_actions = ("list", "retrieve")
+    conditional_models = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "get_queryset" in cls.__dict__:
+            cls.get_queryset = _once_per_request(cls.__dict__["get_queryset"])
+
+    def get_conditional_models(self, model):
+        if self.conditional_models is not None:
+            return self.conditional_models
+        policy = getattr(self, "cache_policy", None)
+        if policy is not None:
+            return policy.models
+        return dependent_models(model)
+
+    def _conditional_state(self, request):
+        """(etag, last_modified, trust_last_modified), or None when there is nothing to validate."""
+        qs = self.filter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            qs = qs.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+        model = qs.model
+        aggs = {"n": Count("pk"), "max_pk": Max("pk")}
+        has_updated_at = any(f.name == "updated_at" for f in model._meta.concrete_fields)
+        if has_updated_at:
+            aggs["last"] = Max("updated_at")
+        row = qs.order_by().aggregate(**aggs)
+
+        if self.action == "retrieve" and not row["n"]:
+            return None  # let the normal path produce the 404
+
+        last = row.get("last")
+        models = tuple(self.get_conditional_models(model))
+        raw = "|".join(str(x) for x in (
+            self.basename, self.action, request.user.pk, request.get_host(),
+            request.get_full_path(), request.META.get("HTTP_ACCEPT", ""),
+            row["n"], row["max_pk"], last.isoformat() if last else "",
+            versions_fingerprint(models),
+        ))
+        etag = "W/" + quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+        # updated_at alone only describes the response when nothing else feeds into it
+        trust_last_modified = self.action == "retrieve" and models == (model,)
+        return etag, last, trust_last_modified
+
+    def _conditional(self, request, render):
+        if self.action not in self.conditional_actions or request.method not in ("GET", "HEAD"):
+            return render()
+        try:
+            state = self._conditional_state(request)
+        except Exception:
+            state = None  # bad lookup value etc.: the normal path reports it
+        if state is None:
+            return render()
+
+        etag, last, trust_last_modified = state
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        not_modified = _etag_matches(if_none_match, etag)
+        if not if_none_match and last is not None and trust_last_modified:
+            # lists need the ETag: a delete does not move max(updated_at)
+            since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE") or "")
+            not_modified = since is not None and int(last.timestamp()) <= since
+
+        response = Response(status=status.HTTP_304_NOT_MODIFIED) if not_modified else render()
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last is not None:
+                response["Last-Modified"] = http_date(last.timestamp())
+            response["Cache-Control"] = "private, no-cache"
+            patch_vary_headers(response, ("Authorization", "Accept"))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,211 @@
+"""
+Full CV "document" helpers.
+
+A document is the CV row plus every section (education, experience, skills...).
+Sections are loaded with one prefetch query each, so building a document costs
+the same number of queries whether the CV has 3 items or 300, and a page of
+CVs costs the same as a single CV.
+
+The editor can also save a whole document in one request: each section list is
+diffed against the stored rows and applied with bulk_create / bulk_update /
+one DELETE per section, inside a single transaction.
+"""
+
+import hashlib
+import json
+
+from rest_framework import serializers
+
+from .caching import bump_versions_on_commit
+from .cv_search import schedule_reindex
+from .models import (
+    CV,
+    Education,
+    Experience,
+    Project,
+    Certification,
+    Involvement,
+    Skill,
+    Reference,
+    Language,
+    Award,
+)
+from .serializers import (
+    CVSerializer,
+    EducationSerializer,
+    ExperienceSerializer,
+    ProjectSerializer,
+    CertificationSerializer,
+    InvolvementSerializer,
+    SkillSerializer,
+    ReferenceSerializer,
+    LanguageSerializer,
+    AwardSerializer,
+)
+
+
+# (related_name on CV, section model, item serializer) — order here is the
+# order sections appear in the API document.
+CV_SECTIONS = (
+    ("education", Education, EducationSerializer),
+    ("experience", Experience, ExperienceSerializer),
+    ("projects", Project, ProjectSerializer),
+    ("skills", Skill, SkillSerializer),
+    ("certifications", Certification, CertificationSerializer),
+    ("involvement", Involvement, InvolvementSerializer),
+    ("references", Reference, ReferenceSerializer),
+    ("languages", Language, LanguageSerializer),
+    ("awards", Award, AwardSerializer),
+)
+
+CV_SECTION_NAMES = tuple(name for name, _model, _serializer in CV_SECTIONS)
+
+# keys of a save payload that are not CV fields
+_DOCUMENT_META_KEYS = ("base_hash",)
+
+
+def cv_document_queryset(qs=None):
+    """
+    Attach one prefetch per section to a CV queryset.
+    Total cost: 1 query for the CVs + len(CV_SECTIONS) queries, regardless of size.
+    """
+    if qs is None:
+        qs = CV.objects.all()
+    return qs.prefetch_related(*CV_SECTION_NAMES)
+
+
+def compute_content_hash(document_data) -> str:
+    """Stable hash of a serialized document (used for optimistic concurrency)."""
+    raw = json.dumps(document_data, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _to_int_or_none(v):
+    if v is None or v == "":
+        return None
+    try:
+        return int(v)
+    except (ValueError, TypeError):
+        return None
+
+
+def _diff_section(cv, name, model, serializer_class, items, context, is_new_cv):
+    """
+    Diff one section list against stored rows.
+    Items with a known "id" are updates, items without one are creates, stored rows
+    missing from the list are deletes. List position becomes the item "order".
+    """
+    if not isinstance(items, list):
+        raise serializers.ValidationError({name: "Expected a list of items."})
+
+    existing = {} if is_new_cv else {obj.id: obj for obj in getattr(cv, name).all()}
+
+    errors = []
+    has_errors = False
+    seen_ids = set()
+    to_create = []
+    to_update = []
+    update_fields = set()
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"non_field_errors": ["Expected an object."]})
+            has_errors = True
+            continue
+
+        item_id = _to_int_or_none(item.get("id"))
+        instance = None
+        if item_id is not None:
+            instance = existing.get(item_id)
+            if instance is None or item_id in seen_ids:
+                errors.append({"id": [f"Unknown or duplicated {name} item id: {item_id}."]})
+                has_errors = True
+                continue
+            seen_ids.add(item_id)
+
+        ser = serializer_class(instance, data=item, partial=instance is not None, context=context)
+        if not ser.is_valid():
+            errors.append(ser.errors)
+            has_errors = True
+            continue
+        errors.append({})
+
+        values = dict(ser.validated_data)
+        values["order"] = index
+
+        if instance is None:
+            to_create.append(model(**values))
+            continue
+
+        changed = False
+        for field, value in values.items():
+            if getattr(instance, field) != value:
+                setattr(instance, field, value)
+                update_fields.add(field)
+                changed = True
+        if changed:
+            to_update.append(instance)
+
+    if has_errors:
+        raise serializers.ValidationError({name: errors})
+
+    to_delete = [pk for pk in existing if pk not in seen_ids]
+    return to_create, to_update, sorted(update_fields), to_delete
+
+
+def apply_cv_document(cv, payload, student, context=None):
+    """
+    Apply a whole-document save. Must be called inside transaction.atomic().
+
+    - top-level keys are CV fields (validated by CVSerializer)
+    - section keys (education, skills, ...) replace that section; omitted sections are untouched
+
+    Returns (cv, changes) where changes counts created/updated/deleted items.
+    Validation happens for every section before anything is written.
+    """
+    if not isinstance(payload, dict):
+        raise serializers.ValidationError({"non_field_errors": ["Expected a CV document object."]})
+
+    is_new_cv = cv is None
+    cv_fields = {
+        k: v for k, v in payload.items()
+        if k not in CV_SECTION_NAMES and k not in _DOCUMENT_META_KEYS
+    }
+
+    cv_serializer = None
+    if is_new_cv or cv_fields:
+        cv_serializer = CVSerializer(cv, data=cv_fields, partial=not is_new_cv, context=context or {})
+        cv_serializer.is_valid(raise_exception=True)
+
+    plans = []
+    for name, model, serializer_class in CV_SECTIONS:
+        if name not in payload:
+            continue
+        plans.append((model, _diff_section(cv, name, model, serializer_class, payload[name], context or {}, is_new_cv)))
+
+    if is_new_cv:
+        cv = cv_serializer.save(student=student)
+    elif cv_serializer is not None:
+        cv = cv_serializer.save()
+
+    changes = {"created": 0, "updated": 0, "deleted": 0}
+    for model, (to_create, to_update, update_fields, to_delete) in plans:
+        if to_delete:
+            model.objects.filter(cv=cv, id__in=to_delete).delete()
+        if to_update:
+            model.objects.bulk_update(to_update, update_fields)
+        if to_create:
+            for obj in to_create:
+                obj.cv = cv
+            model.objects.bulk_create(to_create)
+        changes["created"] += len(to_create)
+        changes["updated"] += len(to_update)
+        changes["deleted"] += len(to_delete)
+
+    # bulk writes skip model signals, so queue the search reindex and the
+    # cache/ETag invalidation explicitly (CV too: its row may not have been saved)
+    if plans:
+        schedule_reindex(cv.pk)
+        bump_versions_on_commit(CV, *(model for model, _plan in plans))
+
+    return cv, changes
@@ -0,0 +1,266 @@
+"""
+CV talent search (admin).
+
+An inverted index (CVSearchTerm) maps terms -> CVs for skills, project
+technologies, experience, certifications and the CV summary. It is kept up to
+date incrementally: saving/deleting a CV or one of those section rows queues a
+reindex of that single CV, run once per transaction on commit.
+
+Query syntax (case-insensitive):
+    premiere pro photography     -> all terms must match (AND)
+    editor OR photographer       -> either side may match (OR binds loosest)
+    photo*                       -> prefix match
+    "after effects"              -> every word of the phrase must match
+    -wedding / NOT wedding       -> exclude CVs containing the term
+
+Results are ranked by sum(field weight x term frequency x idf) and come with
+facet counts by student year and program.
+"""
+
+import math
+import re
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import CV, CVSearchTerm
+
+
+# how much a hit in each field counts towards the score
+FIELD_WEIGHTS = {
+    "skill": 3.0,
+    "certification": 2.0,
+    "project": 2.0,
+    "experience": 1.5,
+    "summary": 1.0,
+}
+
+MAX_TERM_LENGTH = 64
+MIN_PREFIX_LENGTH = 2
+FACET_CHUNK_SIZE = 2000
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is of on or the to with".split()
+)
+
+
+def tokenize(text):
+    """Lowercase words; keeps things like c++, c#, 3d, 4k. Drops stopwords."""
+    if not text:
+        return []
+    out = []
+    for tok in _TOKEN_RE.findall(str(text).lower()):
+        tok = tok.rstrip(".")[:MAX_TERM_LENGTH]
+        if tok and tok not in STOPWORDS:
+            out.append(tok)
+    return out
+
+
+# ---------------- INDEXING ---------------- #
+
+def _cv_field_texts(cv):
+    """(field, text) pairs that make up the searchable content of a CV."""
+    yield "summary", cv.summary
+    yield "summary", cv.title
+    for s in cv.skills.all():
+        yield "skill", s.name
+    for p in cv.projects.all():
+        yield "project", p.technologies
+    for e in cv.experience.all():
+        yield "experience", f"{e.position} {e.company} {e.description or ''}"
+    for c in cv.certifications.all():
+        yield "certification", f"{c.name} {c.issuer}"
+
+
+def build_postings(cv):
+    """Return unsaved CVSearchTerm rows for one CV (sections must be loaded or loadable)."""
+    weights = defaultdict(float)
+    for field, text in _cv_field_texts(cv):
+        fw = FIELD_WEIGHTS[field]
+        for tok in tokenize(text):
+            weights[(field, tok)] += fw
+
+    return [
+        CVSearchTerm(cv_id=cv.pk, field=field, term=term, weight=w)
+        for (field, term), w in weights.items()
+    ]
+
+
+def reindex_cvs(cv_ids):
+    """Rebuild the postings of the given CVs (5 queries + 1 delete + 1 insert per batch)."""
+    cv_ids = [int(x) for x in cv_ids if x]
+    if not cv_ids:
+        return 0
+
+    cvs = CV.objects.filter(id__in=cv_ids).prefetch_related(
+        "skills", "projects", "experience", "certifications"
+    )
+    rows = []
+    for cv in cvs:
+        rows.extend(build_postings(cv))
+
+    with transaction.atomic():
+        CVSearchTerm.objects.filter(cv_id__in=cv_ids).delete()
+        CVSearchTerm.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+_pending = threading.local()
+
+
+def _flush_pending():
+    ids = getattr(_pending, "cv_ids", None) or set()
+    _pending.cv_ids = set()
+    if ids:
+        reindex_cvs(ids)
+
+
+def schedule_reindex(cv_id):
+    """
+    Queue a CV for reindexing once the current transaction commits.
+    Many saves of the same CV in one transaction (e.g. a bulk CV save) cost one reindex.
+    """
+    if not cv_id:
+        return
+    ids = getattr(_pending, "cv_ids", None)
+    if ids is None:
+        ids = _pending.cv_ids = set()
+    ids.add(int(cv_id))
+    # the first callback to run flushes the whole set; the rest are no-ops
+    # (if a transaction rolls back, its ids simply ride along with the next flush)
+    transaction.on_commit(_flush_pending)
+
+
+# ---------------- QUERYING ---------------- #
+
+def parse_query(q):
+    """
+    Parse a query string into OR-clauses; each clause is {"must": [...], "must_not": [...]}
+    where every entry is (term, is_prefix).
+    """
+    q = (q or "").strip()
+    if not q:
+        return []
+
+    # pull out "quoted phrases" first so their words stay together
+    parts = re.findall(r'-?"[^"]*"|\S+', q)
+
+    clauses = [{"must": [], "must_not": []}]
+    negate_next = False
+
+    for raw in parts:
+        upper = raw.upper()
+        if upper == "OR":
+            if clauses[-1]["must"] or clauses[-1]["must_not"]:
+                clauses.append({"must": [], "must_not": []})
+            continue
+        if upper == "AND":
+            continue
+        if upper == "NOT":
+            negate_next = True
+            continue
+
+        negate = negate_next
+        negate_next = False
+        if raw.startswith("-") and len(raw) > 1:
+            negate = True
+            raw = raw[1:]
+
+        prefix = raw.endswith("*") and not raw.startswith('"')
+        tokens = tokenize(raw.strip('"').rstrip("*"))
+        if not tokens:
+            continue
+
+        target = clauses[-1]["must_not" if negate else "must"]
+        for i, tok in enumerate(tokens):
+            is_prefix = prefix and i == len(tokens) - 1 and len(tok) >= MIN_PREFIX_LENGTH
+            target.append((tok, is_prefix))
+
+    return [c for c in clauses if c["must"]]
+
+
+def _postings(term, is_prefix, base_qs):
+    """{cv_id: summed weight} for one term (one query)."""
+    qs = base_qs.filter(term__startswith=term) if is_prefix else base_qs.filter(term=term)
+    return {
+        row["cv_id"]: float(row["score"] or 0)
+        for row in qs.values("cv_id").annotate(score=Sum("weight"))
+    }
+
+
+def search_cvs(q, status="approved"):
+    """
+    Run a talent search. Returns (ranked [(cv_id, score)], parsed clauses).
+    status=None searches every CV regardless of review status.
+    """
+    clauses = parse_query(q)
+    if not clauses:
+        return [], clauses
+
+    base_qs = CVSearchTerm.objects.all()
+    cv_qs = CV.objects.all()
+    if status:
+        base_qs = base_qs.filter(cv__status=status)
+        cv_qs = cv_qs.filter(status=status)
+
+    total_docs = max(cv_qs.count(), 1)
+    cache = {}
+
+    def postings(term, is_prefix):
+        key = (term, is_prefix)
+        if key not in cache:
+            cache[key] = _postings(term, is_prefix, base_qs)
+        return cache[key]
+
+    scores = defaultdict(float)
+    for clause in clauses:
+        matched = None
+        clause_scores = defaultdict(float)
+
+        for term, is_prefix in clause["must"]:
+            p = postings(term, is_prefix)
+            idf = math.log(1.0 + total_docs / (1.0 + len(p)))
+            ids = set(p)
+            matched = ids if matched is None else (matched & ids)
+            if not matched:
+                break
+            for cv_id in matched:
+                clause_scores[cv_id] += p[cv_id] * idf
+
+        if not matched:
+            continue
+
+        for term, is_prefix in clause["must_not"]:
+            matched -= set(postings(term, is_prefix))
+
+        for cv_id in matched:
+            # a CV matching several OR-clauses keeps its best clause score
+            scores[cv_id] = max(scores[cv_id], clause_scores[cv_id])
+
+    ranked = sorted(scores.items(), key=lambda kv: (-kv[1], -kv[0]))
+    return ranked, clauses
+
+
+def facet_counts(cv_ids):
+    """Counts of matched CVs by student year and program."""
+    by_year = defaultdict(int)
+    by_program = defaultdict(int)
+
+    cv_ids = list(cv_ids)
+    for i in range(0, len(cv_ids), FACET_CHUNK_SIZE):
+        chunk = cv_ids[i:i + FACET_CHUNK_SIZE]
+        rows = CV.objects.filter(id__in=chunk).values_list(
+            "student__student_profile__year", "student__student_profile__program"
+        )
+        for year, program in rows:
+            by_year[year or "unknown"] += 1
+            by_program[program or "unknown"] += 1
+
+    return {
+        "year": dict(sorted(by_year.items())),
+        "program": dict(sorted(by_program.items(), key=lambda kv: (-kv[1], kv[0]))),
+    }
@@ -0,0 +1,316 @@
+"""
+Dashboard summaries.
+
+Everything is computed with aggregate queries (no full-list serialization) and
+the result is cached briefly. The cache key embeds the versions of the models
+the summary depends on, so any booking/rental/CV/equipment write invalidates it
+immediately; the short TTL covers bulk .update() calls that skip signals.
+"""
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .caching import versions_fingerprint
+from .models import (
+    User,
+    StudentProfile,
+    Lab,
+    LabBooking,
+    Equipment,
+    EquipmentRental,
+    EquipmentRequest,
+    CV,
+    Tutorial,
+    TutorialProgress,
+)
+
+
+ADMIN_DASHBOARD_TTL = 30  # seconds
+# recent-activity rows show student names, so User is included (logins only
+# write last_login, which bumps no version: see signals.py)
+ADMIN_DASHBOARD_MODELS = (
+    User, StudentProfile, Lab, LabBooking, Equipment, EquipmentRental, EquipmentRequest, CV,
+)
+
+def _status_counts(qs, statuses, extra=None):
+    """One query: {status: count, ..., "total": n} using conditional aggregation."""
+    aggs = {s: Count("id", filter=Q(status=s)) for s in statuses}
+    aggs["total"] = Count("id")
+    aggs.update(extra or {})
+    return qs.aggregate(**aggs)
+
+
+def _full_name(user_obj):
+    if not user_obj:
+        return ""
+    full = (user_obj.get_full_name() or "").strip()
+    return full or (user_obj.username or "")
+
+
+def _student_id(user_obj):
+    sp = getattr(user_obj, "student_profile", None) if user_obj else None
+    return getattr(sp, "student_id", None)
+
+
+def _file_url(field_file, request=None):
+    if not field_file:
+        return None
+    url = field_file.url
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def _booking_row(b):
+    return {
+        "id": b.id,
+        "student_name": _full_name(b.student),
+        "student_id": _student_id(b.student),
+        "lab_room": b.lab.name if b.lab else None,
+        "date": b.booking_date.isoformat() if b.booking_date else None,
+        "time_slot": b.time_slot or "",
+        "imac_number": b.imac_number,
+        "created_at": b.created_at,
+    }
+
+
+def _rental_row(r):
+    return {
+        "id": r.id,
+        "student_name": _full_name(r.student),
+        "student_id": _student_id(r.student),
+        "equipment_name": r.equipment.name if r.equipment else None,
+        "equipment_id": r.equipment.equipment_id if r.equipment else None,
+        "status": r.status,
+        "duration_days": r.duration_days,
+        "expected_return_date": r.expected_return_date,
+        "created_at": r.created_at,
+    }
+
+
+def _cv_row(cv):
+    return {
+        "id": cv.id,
+        "student_name": _full_name(cv.student),
+        "student_id": _student_id(cv.student),
+        "full_name": cv.full_name,
+        "title": cv.title,
+        "status": cv.status,
+        "created_at": cv.created_at,
+    }
+
+
+def build_admin_dashboard(top_n=10, low_stock_threshold=1):
+    """Compute the admin summary (about a dozen queries, independent of table sizes)."""
+    now = timezone.now()
+    today = timezone.localdate()
+
+    overdue_q = Q(status="overdue") | Q(status__in=["approved", "active"], expected_return_date__lt=now)
+
+    counts = {
+        "bookings": _status_counts(LabBooking.objects.all(), [s for s, _ in LabBooking.STATUS_CHOICES]),
+        "rentals": _status_counts(
+            EquipmentRental.objects.all(),
+            [s for s, _ in EquipmentRental.STATUS_CHOICES],
+            # approved/active past their return date count as overdue even before the
+            # rental list's auto-overdue pass has flipped their status
+            extra={"overdue_effective": Count("id", filter=overdue_q)},
+        ),
+        "cvs": _status_counts(CV.objects.all(), [s for s, _ in CV.STATUS_CHOICES]),
+        "equipment_requests": _status_counts(EquipmentRequest.objects.all(), [s for s, _ in EquipmentRequest.STATUS_CHOICES]),
+        "equipment": _status_counts(
+            Equipment.objects.filter(is_active=True),
+            [s for s, _ in Equipment.STATUS_CHOICES],
+        ),
+        "students": StudentProfile.objects.count(),
+    }
+
+    today_by_lab = list(
+        LabBooking.objects.filter(booking_date=today)
+        .values("lab_id", lab_name=F("lab__name"))
+        .annotate(
+            total=Count("id"),
+            pending=Count("id", filter=Q(status="pending")),
+            approved=Count("id", filter=Q(status="approved")),
+            completed=Count("id", filter=Q(status="completed")),
+        )
+        .order_by("lab_name")
+    )
+
+    pending_bookings = (
+        LabBooking.objects.filter(status="pending")
+        .select_related("lab", "student", "student__student_profile")
+        .order_by("created_at", "id")[:top_n]
+    )
+    pending_rentals = (
+        EquipmentRental.objects.filter(status="pending")
+        .select_related("equipment", "student", "student__student_profile")
+        .order_by("created_at", "id")[:top_n]
+    )
+    pending_cvs = (
+        CV.objects.filter(status="pending")
+        .select_related("student", "student__student_profile")
+        .order_by("created_at", "id")[:top_n]
+    )
+    overdue_rentals = (
+        EquipmentRental.objects.filter(overdue_q)
+        .select_related("equipment", "student", "student__student_profile")
+        .order_by("expected_return_date", "id")[:top_n]
+    )
+
+    low_stock = (
+        Equipment.objects.filter(is_active=True)
+        .annotate(
+            rented=Count("rentals", filter=Q(rentals__status__in=Equipment.RENTED_STATUSES))
+        )
+        .annotate(rentable=F("quantity_total") - F("rented") - F("quantity_under_maintenance"))
+        .filter(rentable__lte=low_stock_threshold)
+        .order_by("rentable", "name")
+        .values(
+            "id", "name", "equipment_id", "status",
+            "quantity_total", "quantity_under_maintenance", "rented", "rentable",
+        )[:top_n]
+    )
+
+    return {
+        "generated_at": now,
+        "counts": counts,
+        "today_bookings_by_lab": today_by_lab,
+        "pending": {
+            "bookings": [_booking_row(b) for b in pending_bookings],
+            "rentals": [_rental_row(r) for r in pending_rentals],
+            "cvs": [_cv_row(cv) for cv in pending_cvs],
+        },
+        "overdue_rentals": [_rental_row(r) for r in overdue_rentals],
+        "low_stock_equipment": list(low_stock),
+    }
+
+
+def get_admin_dashboard(top_n=10, low_stock_threshold=1):
+    """Cached build_admin_dashboard(). Returns (data, cache_hit)."""
+    key = "dashboard:admin:{}:{}:{}:{}".format(
+        versions_fingerprint(ADMIN_DASHBOARD_MODELS),
+        timezone.localdate().isoformat(),
+        top_n,
+        low_stock_threshold,
+    )
+    data = cache.get(key)
+    if data is not None:
+        return data, True
+
+    data = build_admin_dashboard(top_n=top_n, low_stock_threshold=low_stock_threshold)
+    cache.set(key, data, ADMIN_DASHBOARD_TTL)
+    return data, False
+
+
+# ---------------- STUDENT HOME ---------------- #
+
+def build_student_dashboard(user, top_n=5, request=None):
+    """
+    Everything the student home page needs, in a fixed number of queries:
+    profile, upcoming bookings, active/overdue rentals, CV status,
+    continue-watching tutorials and the stat counters.
+    """
+    now = timezone.now()
+    today = timezone.localdate()
+
+    sp = getattr(user, "student_profile", None)
+
+    booking_stats = LabBooking.objects.filter(student=user).aggregate(
+        total=Count("id"),
+        upcoming=Count(
+            "id", filter=Q(booking_date__gte=today, status__in=["pending", "approved"])
+        ),
+        pending=Count("id", filter=Q(status="pending")),
+        completed=Count("id", filter=Q(status="completed")),
+    )
+    upcoming_bookings = (
+        LabBooking.objects.filter(
+            student=user, booking_date__gte=today, status__in=["pending", "approved"]
+        )
+        .select_related("lab")
+        .order_by("booking_date", "start_time", "id")[:top_n]
+    )
+
+    overdue_q = Q(status="overdue") | Q(status__in=["approved", "active"], expected_return_date__lt=now)
+    rental_stats = EquipmentRental.objects.filter(student=user).aggregate(
+        active=Count("id", filter=Q(status__in=Equipment.RENTED_STATUSES)),
+        overdue=Count("id", filter=overdue_q),
+        pending=Count("id", filter=Q(status="pending")),
+    )
+    active_rentals = (
+        EquipmentRental.objects.filter(student=user, status__in=Equipment.RENTED_STATUSES)
+        .select_related("equipment")
+        .order_by("expected_return_date", "id")
+    )
+
+    cv = (
+        CV.objects.filter(student=user)
+        .values("id", "status", "admin_comment", "reviewed_at", "updated_at")
+        .first()
+    )
+
+    progress_stats = TutorialProgress.objects.filter(student=user).aggregate(
+        started=Count("id"),
+        completed=Count("id", filter=Q(completed=True)),
+    )
+    continue_watching = (
+        TutorialProgress.objects.filter(student=user, completed=False, progress_percentage__gt=0)
+        .select_related("tutorial", "tutorial__category")
+        .order_by("-last_watched_at", "-id")[:top_n]
+    )
+    tutorials_available = Tutorial.objects.filter(is_active=True).count()
+
+    def rental_row(r):
+        is_overdue = r.status == "overdue" or (
+            r.status in ("approved", "active") and r.expected_return_date and r.expected_return_date < now
+        )
+        return {
+            "id": r.id,
+            "equipment_name": r.equipment.name if r.equipment else None,
+            "equipment_id": r.equipment.equipment_id if r.equipment else None,
+            "status": "overdue" if is_overdue else r.status,
+            "rental_date": r.rental_date,
+            "expected_return_date": r.expected_return_date,
+        }
+
+    return {
+        "profile": {
+            "id": user.id,
+            "username": user.username,
+            "full_name": _full_name(user),
+            "email": user.email,
+            "student_id": getattr(sp, "student_id", None),
+            "program": getattr(sp, "program", None),
+            "year": getattr(sp, "year", None),
+        },
+        "stats": {
+            "bookings": booking_stats,
+            "rentals": rental_stats,
+            "tutorials": {**progress_stats, "available": tutorials_available},
+        },
+        "upcoming_bookings": [
+            {
+                "id": b.id,
+                "lab_room": b.lab.name if b.lab else None,
+                "date": b.booking_date.isoformat() if b.booking_date else None,
+                "time_slot": b.time_slot or "",
+                "imac_number": b.imac_number,
+                "status": b.status,
+            }
+            for b in upcoming_bookings
+        ],
+        "rentals": [rental_row(r) for r in active_rentals],
+        "cv": cv,
+        "continue_watching": [
+            {
+                "tutorial_id": p.tutorial_id,
+                "title": p.tutorial.title,
+                "category_name": p.tutorial.category.name if p.tutorial.category else None,
+                "thumbnail": _file_url(p.tutorial.thumbnail, request),
+                "duration": p.tutorial.duration,
+                "progress_percentage": p.progress_percentage,
+                "last_watched_at": p.last_watched_at,
+            }
+            for p in continue_watching
+        ],
+    }
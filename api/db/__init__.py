@@ -0,0 +1,8 @@
+"""
+Pooled database backends.
+
+    ENGINE = 'api.db.mysql'     # django.db.backends.mysql + pool
+    ENGINE = 'api.db.sqlite3'   # django.db.backends.sqlite3 + pool (local tries)
+
+See api.db.pool for the pool itself and the "POOL" settings key.
+"""
@@ -0,0 +1,280 @@
+"""
+Per-process pool of raw DB-API connections behind Django's DatabaseWrapper.
+
+Django opens a connection when a request first touches the database and
+(with CONN_MAX_AGE=0) closes it when the request ends. With a pooled
+ENGINE the close hands the connection back to the pool instead, and the
+next request (in any thread of the worker) checks it out again, so the
+TCP/TLS/auth handshake is paid once per connection lifetime rather than
+once per request.
+
+Options, in the database's "POOL" dict:
+
+    SIZE              connections per worker process (in use + idle), default 4
+    TIMEOUT           seconds to wait for a free connection before failing, default 10
+    MAX_LIFETIME      close connections older than this many seconds, default 1800
+    IDLE_TIMEOUT      close connections idle longer than this, default 300
+    HEALTH_CHECK      ping a connection before handing it out, default True
+
+Idle and expired connections are reaped whenever the pool is used, so no
+background thread is needed. A pool belongs to the process that created it:
+a forked child starts with empty pools, and a preloading master calls
+close_all() before forking. pool_stats() feeds the /metrics gauges.
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+
+
+logger = logging.getLogger("api.db.pool")
+
+DEFAULTS = {
+    "SIZE": 4,
+    "TIMEOUT": 10.0,
+    "MAX_LIFETIME": 1800.0,
+    "IDLE_TIMEOUT": 300.0,
+    "HEALTH_CHECK": True,
+}
+
+
+class _Entry:
+    __slots__ = ("raw", "created", "last_used")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created = self.last_used = time.monotonic()
+
+
+def _close_quietly(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    def __init__(self, alias, size, timeout, max_lifetime, idle_timeout, health_check):
+        self.alias = alias
+        self.size = max(int(size), 1)
+        self.timeout = float(timeout)
+        self.max_lifetime = float(max_lifetime)
+        self.idle_timeout = float(idle_timeout)
+        self.health_check = bool(health_check)
+        self.cond = threading.Condition()
+        self.idle = []  # LIFO: the warmest connection is reused first
+        self.in_use = 0
+        self.stats = {
+            "checkouts": 0, "connects": 0, "reused": 0, "closed": 0, "timeouts": 0,
+            "health_failures": 0, "wait_seconds": 0.0, "wait_max": 0.0, "connect_seconds": 0.0,
+        }
+
+    def _expired(self, entry, now):
+        return now - entry.created > self.max_lifetime or now - entry.last_used > self.idle_timeout
+
+    def _reap(self, now):
+        """Drop expired idle connections; call with the lock held."""
+        keep, dead = [], []
+        for entry in self.idle:
+            (dead if self._expired(entry, now) else keep).append(entry)
+        self.idle = keep
+        self.stats["closed"] += len(dead)
+        return dead
+
+    def checkout(self, connect, ping, error_class):
+        """An _Entry: an idle connection that passed its ping, or a new one from connect()."""
+        t0 = time.monotonic()
+        while True:
+            entry, dead = None, []
+            with self.cond:
+                while True:
+                    dead = self._reap(time.monotonic())
+                    if self.idle:
+                        entry = self.idle.pop()
+                        break
+                    if self.in_use + len(self.idle) < self.size:
+                        break
+                    remaining = self.timeout - (time.monotonic() - t0)
+                    if remaining <= 0:
+                        self.stats["timeouts"] += 1
+                        raise error_class(
+                            f"Connection pool for '{self.alias}' exhausted: {self.size} connections "
+                            f"in use for {self.timeout:.1f}s"
+                        )
+                    self.cond.wait(remaining)
+                self.in_use += 1
+                waited = time.monotonic() - t0
+                self.stats["checkouts"] += 1
+                self.stats["wait_seconds"] += waited
+                self.stats["wait_max"] = max(self.stats["wait_max"], waited)
+            for d in dead:
+                _close_quietly(d.raw)
+
+            if entry is None:
+                return self._connect(connect)
+            if not self.health_check or self._ping(entry, ping):
+                with self.cond:
+                    self.stats["reused"] += 1
+                return entry
+            # a dead idle connection: try the next one
+            self._release_slot()
+
+    def _ping(self, entry, ping):
+        try:
+            ping(entry.raw)
+            return True
+        except Exception:
+            logger.info("Discarding a pooled '%s' connection that failed its health check", self.alias)
+            with self.cond:
+                self.stats["health_failures"] += 1
+                self.stats["closed"] += 1
+            _close_quietly(entry.raw)
+            return False
+
+    def _connect(self, connect):
+        t0 = time.monotonic()
+        try:
+            raw = connect()
+        except BaseException:
+            self._release_slot()
+            raise
+        with self.cond:
+            self.stats["connects"] += 1
+            self.stats["connect_seconds"] += time.monotonic() - t0
+        return _Entry(raw)
+
+    def _release_slot(self):
+        with self.cond:
+            self.in_use -= 1
+            self.cond.notify()
+
+    def checkin(self, entry):
+        now = time.monotonic()
+        entry.last_used = now
+        with self.cond:
+            self.in_use -= 1
+            expired = now - entry.created > self.max_lifetime
+            if not expired:
+                self.idle.append(entry)
+            else:
+                self.stats["closed"] += 1
+            dead = self._reap(now)
+            self.cond.notify()
+        if expired:
+            _close_quietly(entry.raw)
+        for d in dead:
+            _close_quietly(d.raw)
+
+    def discard(self, entry):
+        _close_quietly(entry.raw)
+        with self.cond:
+            self.stats["closed"] += 1
+        self._release_slot()
+
+    def close_idle(self):
+        """Close every idle connection; returns how many were closed."""
+        with self.cond:
+            idle, self.idle = self.idle, []
+            self.stats["closed"] += len(idle)
+        for entry in idle:
+            _close_quietly(entry.raw)
+        return len(idle)
+
+    def snapshot(self):
+        with self.cond:
+            return dict(self.stats, size=self.size, in_use=self.in_use, idle=len(self.idle))
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+def get_pool(key, alias, options):
+    global _pools, _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # forked: the parent's sockets are not ours to use or close
+            _pools, _pools_pid = {}, os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            opts = {**DEFAULTS, **(options or {})}
+            pool = _pools[key] = ConnectionPool(
+                alias, opts["SIZE"], opts["TIMEOUT"], opts["MAX_LIFETIME"], opts["IDLE_TIMEOUT"], opts["HEALTH_CHECK"],
+            )
+        return pool
+
+
+def close_all():
+    """
+    Close the idle connections of this process's pools. Call it after
+    connections.close_all() (which checks connections back in) and before
+    forking, so no worker inherits a socket the master holds.
+    """
+    with _pools_lock:
+        pools = list(_pools.values()) if _pools_pid == os.getpid() else []
+    return sum(pool.close_idle() for pool in pools)
+
+
+def pool_stats():
+    """{alias: counters and gauges} summed over this process's pools."""
+    with _pools_lock:
+        pools = list(_pools.values()) if _pools_pid == os.getpid() else []
+    out = {}
+    for pool in pools:
+        snap = pool.snapshot()
+        cur = out.get(pool.alias)
+        if cur is None:
+            out[pool.alias] = snap
+            continue
+        for k, v in snap.items():
+            cur[k] = max(cur[k], v) if k == "wait_max" else cur[k] + v
+    return out
+
+
+# ---------------- DJANGO BACKEND ---------------- #
+
+class PooledDatabaseWrapperMixin:
+    """
+    Mixed into a backend's DatabaseWrapper: get_new_connection() checks out
+    of the pool and _close() checks back in. Subclasses define pool_ping(raw).
+    """
+
+    _pool_entry = None
+
+    def _get_pool(self):
+        s = self.settings_dict
+        key = (self.alias, s.get("ENGINE"), s.get("NAME"), s.get("HOST"), s.get("PORT"), s.get("USER"))
+        return get_pool(key, self.alias, s.get("POOL"))
+
+    def get_new_connection(self, conn_params):
+        connect = functools.partial(super().get_new_connection, conn_params)
+        entry = self._get_pool().checkout(connect, self.pool_ping, self.Database.OperationalError)
+        self._pool_entry = entry
+        self._pool_reused = entry.last_used != entry.created
+        return entry.raw
+
+    def init_connection_state(self):
+        # session settings survive on a reused connection
+        if not getattr(self, "_pool_reused", False):
+            super().init_connection_state()
+
+    def _close(self):
+        entry, self._pool_entry = self._pool_entry, None
+        if entry is None or entry.raw is not self.connection:
+            return super()._close()
+        pool = self._get_pool()
+        if self.in_atomic_block:
+            # close() keeps the dead connection on the wrapper in this case
+            pool.discard(entry)
+            return None
+        try:
+            if not self.autocommit:
+                entry.raw.rollback()
+        except Exception:
+            pool.discard(entry)
+            return None
+        pool.checkin(entry)
+        return None
@@ -0,0 +1,266 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+ReplicaRoutingMiddleware (api.middleware) picks the database for a
+request's reads before the view runs; ReplicaRouter sends them there and
+every write to "default".
+
+A GET/HEAD request reads from a replica (DATABASE_REPLICAS, round robin)
+unless
+  * its user wrote something in the last REPLICA_STICKY_SECONDS (the user
+    id comes from the JWT or the session, without a query; the marks live in
+    REPLICA_STICKY_CACHE_ALIAS, shared by every worker, see api.W003),
+  * a staff user asks for the primary with "X-DB-Primary: 1" / ?_primary=1,
+  * no replica is healthy: a replica whose lag is above REPLICA_MAX_LAG
+    seconds (checked at most every REPLICA_LAG_CHECK_INTERVAL per worker)
+    or that cannot be reached is skipped.
+Reads inside transaction.atomic() on the primary stay on the primary, and
+code outside a request (management commands, the shell) never uses a
+replica. primary_reads() pins a block of code to the primary.
+
+Cached viewset responses may be built from a replica, so a response can
+lag the primary by up to REPLICA_MAX_LAG for at most VIEWSET_CACHE_TTL.
+"""
+
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .caching import is_process_local
+
+
+logger = logging.getLogger("api.db_router")
+
+PRIMARY_HEADER = "HTTP_X_DB_PRIMARY"
+PRIMARY_PARAM = "_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def replica_aliases():
+    return [a for a in getattr(settings, "DATABASE_REPLICAS", ()) if a in settings.DATABASES]
+
+
+# alias the current request's reads go to; None means the primary
+_read_alias = contextvars.ContextVar("aiu_read_alias", default=None)
+
+
+@contextmanager
+def use_read_alias(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block (read-modify-write code)."""
+    with use_read_alias(None):
+        yield
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        pool = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get their schema through replication
+        if db in replica_aliases():
+            return False
+        return None
+
+
+# ---------------- STICKINESS ---------------- #
+
+def _sticky_cache():
+    try:
+        return caches[getattr(settings, "REPLICA_STICKY_CACHE_ALIAS", "sticky")]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+def check_sticky_cache_shared(app_configs, **kwargs):
+    """Per-process marks would send a user's next request on another worker to a lagging replica."""
+    if not replica_aliases() or settings.DEBUG:
+        return []
+    try:
+        local = is_process_local(_sticky_cache())
+    except Exception:
+        return []
+    if not local:
+        return []
+    return [checks.Warning(
+        "The read-your-writes cache is process-local, so after a write only the worker "
+        "that handled it keeps the user on the primary; other workers read from replicas.",
+        hint="Point REPLICA_STICKY_CACHE_ALIAS at a file or Redis cache shared by every worker.",
+        id="api.W003",
+    )]
+
+
+def _sticky_key(user_id) -> str:
+    return f"db:sticky:{user_id}"
+
+
+def mark_wrote(user_id) -> None:
+    """Send this user's reads to the primary for the next REPLICA_STICKY_SECONDS."""
+    if not user_id:
+        return
+    seconds = int(getattr(settings, "REPLICA_STICKY_SECONDS", 10))
+    try:
+        _sticky_cache().set(_sticky_key(user_id), 1, seconds)
+    except Exception:
+        logger.warning("Could not record read-your-writes stickiness for user %s", user_id, exc_info=True)
+
+
+def is_sticky(user_id) -> bool:
+    if not user_id:
+        return False
+    try:
+        return _sticky_cache().get(_sticky_key(user_id)) is not None
+    except Exception:
+        return True  # unknown: be safe
+
+
+def request_user_id(request):
+    """User id from the bearer token or the session, without touching the database."""
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    if header.startswith("Bearer "):
+        try:
+            from rest_framework_simplejwt.settings import api_settings
+            from rest_framework_simplejwt.tokens import AccessToken
+
+            return AccessToken(header[7:].strip()).get(api_settings.USER_ID_CLAIM)
+        except Exception:
+            return None
+    session = getattr(request, "session", None)
+    if session is not None:
+        try:
+            return session.get("_auth_user_id")
+        except Exception:
+            return None
+    return None
+
+
+def primary_requested(request) -> bool:
+    value = request.META.get(PRIMARY_HEADER)
+    if value is None and PRIMARY_PARAM in request.META.get("QUERY_STRING", ""):
+        value = request.GET.get(PRIMARY_PARAM)
+    if (value or "").strip().lower() not in ("1", "true"):
+        return False
+    from .profiling import is_staff_request
+
+    return is_staff_request(request)
+
+
+# ---------------- REPLICA HEALTH ---------------- #
+
+class ReplicaHealth:
+    """Per-worker view of replica lag, refreshed at most every REPLICA_LAG_CHECK_INTERVAL."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = {}  # alias -> (monotonic time, lag seconds or None)
+        self._cycle = None
+        self._cycle_aliases = None
+
+    def lag(self, alias):
+        interval = float(getattr(settings, "REPLICA_LAG_CHECK_INTERVAL", 5))
+        now = time.monotonic()
+        with self.lock:
+            checked = self.checked.get(alias)
+            if checked is not None and now - checked[0] < interval:
+                return checked[1]
+            # claim the check so concurrent requests keep using the old value
+            self.checked[alias] = (now, checked[1] if checked else 0.0)
+        lag = measure_lag(alias)
+        with self.lock:
+            self.checked[alias] = (now, lag)
+        return lag
+
+    def healthy(self, alias) -> bool:
+        max_lag = getattr(settings, "REPLICA_MAX_LAG", 10)
+        if max_lag is None:
+            return True
+        lag = self.lag(alias)
+        return lag is not None and lag <= float(max_lag)
+
+    def pick(self):
+        """A healthy replica alias in round-robin order, or None."""
+        aliases = replica_aliases()
+        if not aliases:
+            return None
+        with self.lock:
+            if self._cycle_aliases != aliases:
+                self._cycle = itertools.cycle(aliases)
+                self._cycle_aliases = aliases
+            order = [next(self._cycle) for _ in aliases]
+        for alias in order:
+            if self.healthy(alias):
+                return alias
+        return None
+
+    def status(self):
+        return {
+            alias: {"lag": self.checked.get(alias, (None, None))[1], "healthy": self.healthy(alias)}
+            for alias in replica_aliases()
+        }
+
+
+def measure_lag(alias):
+    """Seconds the replica is behind, or None when unknown (unreachable, not replicating)."""
+    conn = connections[alias]
+    try:
+        if conn.vendor != "mysql":
+            return 0.0  # local stand-ins (SQLite copies) have no replication to measure
+        with conn.cursor() as cursor:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except Exception:
+                cursor.execute("SHOW SLAVE STATUS")  # MySQL < 8.0.22
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            columns = [c[0] for c in cursor.description]
+        status = dict(zip(columns, row))
+        lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+        return float(lag) if lag is not None else None
+    except Exception:
+        logger.warning("Replica %s lag check failed", alias, exc_info=True)
+        return None
+
+
+health = ReplicaHealth()
+
+
+def choose_read_alias(request):
+    """The replica this request should read from, or None for the primary."""
+    if request.method not in SAFE_METHODS or not replica_aliases():
+        return None
+    if primary_requested(request):
+        return None
+    if is_sticky(request_user_id(request)):
+        return None
+    return health.pick()
@@ -0,0 +1,419 @@
+"""
+HTTP load testing against the real WSGI stack.
+
+The `loadtest` management command starts aiu_backend.wsgi in a threaded
+server on localhost (or targets --url) and runs virtual users, one thread
+each, through scripted scenarios until the duration is up:
+
+    login-storm      POST /api/auth/login/
+    booking-rush     available iMacs for a slot, then book one
+    heartbeats       tutorial progress updates, as a playing video sends them
+    admin-dashboard  admin dashboard and the bookings/rentals lists
+
+Every request is timed on the client side and reported per endpoint
+(throughput, status codes, p50/p95/p99). Results are JSON so two runs can
+be compared with --compare.
+
+Fixture accounts (loadtest_*, staff included, all with FIXTURE_PASSWORD) are
+created for the run and deleted after it (--keep-fixtures keeps them,
+--teardown removes leftovers). The command refuses any database but a
+stand-in SQLite one (DB_ENGINE=sqlite) unless --allow-real-db is given.
+"""
+
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from socketserver import ThreadingMixIn
+from urllib.parse import urlencode, urlsplit
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+FIXTURE_PREFIX = "loadtest_"
+FIXTURE_PASSWORD = "loadtest-password-1"
+FIXTURE_LAB = "Load Test Lab"
+FIXTURE_TUTORIAL = "Load test tutorial"
+TIME_SLOTS = ("09:00-11:00", "11:00-13:00", "13:00-15:00", "15:00-17:00", "17:00-19:00")
+
+
+# ---------------- FIXTURES ---------------- #
+
+def ensure_fixtures(students, admins=1):
+    """Create (or top up) loadtest_* accounts, a lab and a tutorial; returns (students, admins, lab, tutorial)."""
+    from .caching import bump_versions_on_commit
+    from .models import AdminProfile, Category, Lab, StudentProfile, Tutorial, User
+
+    with transaction.atomic():
+        existing = set(User.objects.filter(username__startswith=FIXTURE_PREFIX).values_list("username", flat=True))
+        # hashing once keeps setup fast: every fixture user shares the password
+        password = make_password(FIXTURE_PASSWORD)
+
+        new_users = []
+        for i in range(students):
+            name = f"{FIXTURE_PREFIX}s{i}"
+            if name not in existing:
+                new_users.append(User(
+                    username=name, email=f"{name}@loadtest.invalid", password=password,
+                    first_name="Load", last_name=f"Student {i}", user_type="student",
+                ))
+        for i in range(admins):
+            name = f"{FIXTURE_PREFIX}admin{i}"
+            if name not in existing:
+                new_users.append(User(
+                    username=name, email=f"{name}@loadtest.invalid", password=password,
+                    first_name="Load", last_name=f"Admin {i}", user_type="admin", is_staff=True,
+                ))
+        User.objects.bulk_create(new_users)
+
+        admin_profiles, student_profiles = [], []
+        for u in User.objects.filter(username__in=[u.username for u in new_users]):
+            if u.user_type == "admin":
+                admin_profiles.append(AdminProfile(user=u, admin_id=f"LT-{u.pk}", role="Load test"))
+            else:
+                student_profiles.append(StudentProfile(user=u, student_id=f"LT{u.pk:06d}", year="1"))
+        AdminProfile.objects.bulk_create(admin_profiles)
+        StudentProfile.objects.bulk_create(student_profiles)
+        bump_versions_on_commit(User, AdminProfile, StudentProfile)
+
+        lab, _ = Lab.objects.get_or_create(
+            name=FIXTURE_LAB, defaults={"description": "load test", "capacity": 30, "location": "-", "facilities": "iMac"},
+        )
+        category, _ = Category.objects.get_or_create(name="Load test")
+        admin_user = User.objects.filter(username=f"{FIXTURE_PREFIX}admin0").first()
+        tutorial, _ = Tutorial.objects.get_or_create(
+            title=FIXTURE_TUTORIAL,
+            defaults={"description": "load test", "category": category, "video_url": "https://example.com/v",
+                      "duration": 30, "created_by": admin_user},
+        )
+
+    student_users = list(
+        User.objects.filter(username__startswith=f"{FIXTURE_PREFIX}s").order_by("id")[:students]
+    )
+    admin_users = list(
+        User.objects.filter(username__startswith=f"{FIXTURE_PREFIX}admin").order_by("id")[:admins]
+    )
+    return student_users, admin_users, lab, tutorial
+
+
+def teardown_fixtures():
+    """Delete every loadtest_* account (their bookings, progress... cascade) and the fixture lab/tutorial."""
+    from .models import Category, Lab, Tutorial, User
+
+    with transaction.atomic():
+        Tutorial.objects.filter(title=FIXTURE_TUTORIAL).delete()
+        Category.objects.filter(name="Load test").delete()
+        Lab.objects.filter(name=FIXTURE_LAB).delete()
+        deleted, _ = User.objects.filter(username__startswith=FIXTURE_PREFIX).delete()
+    return deleted
+
+
+# ---------------- IN-PROCESS SERVER ---------------- #
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_in_thread(host="127.0.0.1", port=0):
+    """Serve aiu_backend.wsgi on a background thread; returns (server, base_url)."""
+    from aiu_backend.wsgi import application
+
+    server = make_server(host, port, application, server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, name="loadtest-wsgi", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+# ---------------- CLIENT ---------------- #
+
+class Recorder:
+    """Latencies and status codes per endpoint label, shared by all virtual users."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)  # label -> [seconds]
+        self.statuses = defaultdict(lambda: defaultdict(int))  # label -> {status: n}
+
+    def add(self, label, seconds, status):
+        with self.lock:
+            self.samples[label].append(seconds)
+            self.statuses[label][str(status)] += 1
+
+
+class VirtualUser:
+    def __init__(self, base_url, recorder, user=None, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.recorder = recorder
+        self.user = user
+        self.timeout = timeout
+        self.token = str(RefreshToken.for_user(user).access_token) if user is not None else None
+        self.state = {}
+
+    def request(self, method, path, label, body=None, auth=True):
+        conn_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        headers = {"Accept": "application/json"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        if auth and self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        t0 = time.perf_counter()
+        status, data = "error", None
+        try:
+            conn = conn_class(self.host, self.port, timeout=self.timeout)
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                raw = response.read()
+                status = response.status
+            finally:
+                conn.close()
+            if raw and status < 500:
+                try:
+                    data = json.loads(raw)
+                except ValueError:
+                    data = None
+        except (OSError, http.client.HTTPException):
+            pass
+        self.recorder.add(f"{method} {label}", time.perf_counter() - t0, status)
+        return status, data
+
+
+# ---------------- SCENARIOS ---------------- #
+
+def login_storm(vu, ctx):
+    vu.request(
+        "POST", "/api/auth/login/", "/api/auth/login/",
+        body={"username": vu.user.username, "password": FIXTURE_PASSWORD}, auth=False,
+    )
+
+
+def booking_rush(vu, ctx):
+    day = (timezone.localdate() + timedelta(days=random.randint(1, 14))).isoformat()
+    slot = random.choice(TIME_SLOTS)
+    query = urlencode({"lab_room": ctx["lab"].name, "date": day, "time_slot": slot})
+    status, data = vu.request(
+        "GET", f"/api/lab-bookings/available-imacs/?{query}", "/api/lab-bookings/available-imacs/",
+    )
+    free = (data or {}).get("available_imacs") or []
+    if status != 200 or not free:
+        return
+    vu.request(
+        "POST", "/api/lab-bookings/", "/api/lab-bookings/",
+        body={"lab_room": ctx["lab"].name, "date": day, "time_slot": slot,
+              "imac_number": random.choice(free), "purpose": "load test"},
+    )
+
+
+def heartbeats(vu, ctx):
+    progress = vu.state.get("progress", 0)
+    progress = progress + 5 if progress < 90 else 0
+    vu.state["progress"] = progress
+    vu.request(
+        "POST", "/api/tutorial-progress/", "/api/tutorial-progress/",
+        body={"tutorial": ctx["tutorial"].pk, "progress_percentage": progress},
+    )
+
+
+def admin_dashboard(vu, ctx):
+    vu.request("GET", "/api/dashboard/admin/", "/api/dashboard/admin/")
+    vu.request("GET", "/api/lab-bookings/?page_size=50", "/api/lab-bookings/")
+    vu.request("GET", "/api/equipment-rentals/?page_size=50", "/api/equipment-rentals/")
+
+
+# name: (function, runs as admin, pause between iterations in seconds)
+SCENARIOS = {
+    "login-storm": (login_storm, False, 0.0),
+    "booking-rush": (booking_rush, False, 0.0),
+    "heartbeats": (heartbeats, False, 1.0),
+    "admin-dashboard": (admin_dashboard, True, 0.5),
+}
+
+
+def run(base_url, scenarios, students, admins, duration, ramp_up, ctx, think_scale=1.0):
+    """
+    Drive `scenarios` with one thread per virtual user for `duration` seconds.
+    Student scenarios share the student accounts round-robin; admin
+    scenarios use the admin accounts. Returns a results dict (see summarize).
+    """
+    recorder = Recorder()
+    plan = []
+    student_scenarios = [s for s in scenarios if not SCENARIOS[s][1]]
+    if student_scenarios:
+        plan.extend((student_scenarios[i % len(student_scenarios)], u) for i, u in enumerate(students))
+    if any(SCENARIOS[s][1] for s in scenarios):
+        for admin in admins:
+            plan.extend((s, admin) for s in scenarios if SCENARIOS[s][1])
+
+    stop_at = time.monotonic() + ramp_up + duration
+    started = time.monotonic()
+
+    def worker(index, scenario, user):
+        fn, _admin, pause = SCENARIOS[scenario]
+        time.sleep(ramp_up * index / max(len(plan), 1))
+        vu = VirtualUser(base_url, recorder, user)
+        while time.monotonic() < stop_at:
+            fn(vu, ctx)
+            if pause:
+                # jitter so heartbeats don't arrive in lockstep
+                time.sleep(pause * think_scale * random.uniform(0.5, 1.5))
+
+    threads = [
+        threading.Thread(target=worker, args=(i, s, u), name=f"vu-{i}", daemon=True)
+        for i, (s, u) in enumerate(plan)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    return summarize(recorder, elapsed, ramp_up, {
+        "base_url": base_url,
+        "scenarios": list(scenarios),
+        "virtual_users": len(plan),
+        "duration_s": duration,
+        "ramp_up_s": ramp_up,
+    })
+
+
+# ---------------- REPORTING ---------------- #
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _endpoint_stats(samples, statuses, elapsed):
+    values = sorted(samples)
+    errors = sum(n for code, n in statuses.items() if code == "error" or code.startswith("5"))
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "statuses": dict(sorted(statuses.items())),
+        "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+def summarize(recorder, elapsed, ramp_up, meta):
+    window = max(elapsed - ramp_up / 2.0, 0.001)  # users ramp in, so count half the ramp
+    endpoints = {
+        label: _endpoint_stats(recorder.samples[label], recorder.statuses[label], window)
+        for label in sorted(recorder.samples)
+    }
+    all_samples = [s for values in recorder.samples.values() for s in values]
+    all_statuses = defaultdict(int)
+    for statuses in recorder.statuses.values():
+        for code, n in statuses.items():
+            all_statuses[code] += n
+    return {
+        **meta,
+        "finished_at": timezone.now().isoformat(),
+        "elapsed_s": round(elapsed, 2),
+        "total": _endpoint_stats(all_samples, all_statuses, window),
+        "endpoints": endpoints,
+    }
+
+
+def db_pool_summary(before, after, requests):
+    """
+    What the connection pool did during a run (in-process server only):
+    connections opened vs reused, mean connect and wait time, and the
+    connect time saved per request by reuse.
+    """
+    out = {}
+    for alias, cur in after.items():
+        old = before.get(alias, {})
+        diff = {k: cur.get(k, 0) - old.get(k, 0) for k in ("checkouts", "connects", "reused", "timeouts",
+                                                            "wait_seconds", "connect_seconds")}
+        connect_ms = diff["connect_seconds"] / diff["connects"] * 1000 if diff["connects"] else 0.0
+        out[alias] = {
+            "checkouts": diff["checkouts"],
+            "connects": diff["connects"],
+            "reused": diff["reused"],
+            "timeouts": diff["timeouts"],
+            "connect_ms": round(connect_ms, 3),
+            "wait_ms": round(diff["wait_seconds"] / diff["checkouts"] * 1000, 3) if diff["checkouts"] else 0.0,
+            "saved_ms_per_request": round(diff["reused"] * connect_ms / requests, 3) if requests else 0.0,
+        }
+    return out
+
+
+def format_report(results):
+    lines = [
+        f"{results['virtual_users']} virtual users, {results['elapsed_s']}s against {results['base_url']} "
+        f"({', '.join(results['scenarios'])})",
+        f"{'endpoint':<48} {'reqs':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}  statuses",
+    ]
+    rows = list(results["endpoints"].items()) + [("TOTAL", results["total"])]
+    for label, s in rows:
+        statuses = " ".join(f"{code}:{n}" for code, n in s["statuses"].items())
+        lines.append(
+            f"{label:<48} {s['requests']:>7} {s['errors']:>5} {s['rps']:>8.1f} "
+            f"{s['p50_ms']:>7.1f}ms {s['p95_ms']:>6.1f}ms {s['p99_ms']:>6.1f}ms  {statuses}"
+        )
+    for alias, p in (results.get("db_pool") or {}).items():
+        lines.append(
+            f"db pool '{alias}': {p['checkouts']} checkouts, {p['connects']} opened, {p['reused']} reused, "
+            f"{p['timeouts']} timeouts; connect {p['connect_ms']:.2f}ms, wait {p['wait_ms']:.2f}ms avg; "
+            f"~{p['saved_ms_per_request']:.2f}ms connect time saved per request"
+        )
+    return "\n".join(lines)
+
+
+def compare(baseline, current, threshold_pct=None):
+    """
+    Table of p50/p95/rps changes per endpoint between two result files.
+    Returns (text, regressed endpoints) where regressed means p95 grew by more
+    than threshold_pct percent.
+    """
+    lines = [f"{'endpoint':<48} {'p50':>18} {'p95':>18} {'rps':>16}"]
+    regressed = []
+
+    def delta(old, new):
+        if not old:
+            return f"{new:>8.1f} (new)  "
+        return f"{new:>8.1f} ({(new - old) / old * 100:+5.0f}%)"
+
+    labels = sorted(set(baseline.get("endpoints", {})) | set(current.get("endpoints", {}))) + ["TOTAL"]
+    for label in labels:
+        old = baseline["total"] if label == "TOTAL" else baseline.get("endpoints", {}).get(label)
+        new = current["total"] if label == "TOTAL" else current.get("endpoints", {}).get(label)
+        if new is None:
+            lines.append(f"{label:<48} (not in this run)")
+            continue
+        old = old or {}
+        lines.append(
+            f"{label:<48} {delta(old.get('p50_ms'), new['p50_ms'])} "
+            f"{delta(old.get('p95_ms'), new['p95_ms'])} {delta(old.get('rps'), new['rps'])}"
+        )
+        if threshold_pct is not None and label != "TOTAL" and old.get("p95_ms"):
+            if (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 > threshold_pct:
+                regressed.append(label)
+    return "\n".join(lines), regressed
@@ -0,0 +1,95 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.hashers import check_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from api import views
+from api.models import User, StudentProfile
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the login endpoint in-process: logins/sec for one worker, "
+        "queries per login and how much of the time is password hashing. "
+        "Runs inside a transaction that is rolled back, so nothing is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--by-email", action="store_true", help="log in with the email instead of the username")
+        parser.add_argument("--wrong-password", action="store_true", help="measure failed logins")
+
+    def handle(self, *args, **options):
+        iterations = max(int(options["iterations"] or 50), 1)
+        try:
+            # the login throttle would reject the benchmark after a few attempts
+            with transaction.atomic(), override_settings(LOGIN_THROTTLE_ENABLED=False):
+                self._run(iterations, options["by_email"], options["wrong_password"])
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _run(self, iterations, by_email, wrong_password):
+        tag = uuid.uuid4().hex[:8]
+        password = "bench-" + tag
+        user = User.objects.create_user(
+            username=f"bench_{tag}", email=f"bench_{tag}@example.com", password=password,
+            first_name="Bench", last_name="User", user_type="student",
+        )
+        StudentProfile.objects.create(user=user, student_id=f"B{tag}", program="Benchmark")
+
+        identifier = user.email if by_email else user.username
+        sent_password = password + "x" if wrong_password else password
+        expected = 401 if wrong_password else 200
+
+        factory = APIRequestFactory()
+
+        def do_login():
+            request = factory.post(
+                "/api/auth/login/", {"username": identifier, "password": sent_password}, format="json"
+            )
+            return views.login(request)
+
+        # warm-up (imports, hasher setup) and sanity check
+        resp = do_login()
+        if resp.status_code != expected:
+            self.stderr.write(f"unexpected status {resp.status_code}: {resp.data}")
+            return
+
+        with CaptureQueriesContext(connection) as ctx:
+            do_login()
+        queries = len(ctx.captured_queries)
+
+        hash_times = []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            check_password(sent_password, user.password)
+            hash_times.append(time.perf_counter() - t0)
+
+        times = []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            do_login()
+            times.append(time.perf_counter() - t0)
+
+        mean = statistics.mean(times)
+        hash_mean = statistics.mean(hash_times)
+        p95 = sorted(times)[max(int(len(times) * 0.95) - 1, 0)]
+
+        self.stdout.write(f"identifier:         {'email' if by_email else 'username'}"
+                          f"{' (wrong password)' if wrong_password else ''}")
+        self.stdout.write(f"iterations:         {iterations}")
+        self.stdout.write(f"queries per login:  {queries}")
+        self.stdout.write(f"login mean / p95:   {mean * 1000:.1f} ms / {p95 * 1000:.1f} ms")
+        self.stdout.write(f"password hash:      {hash_mean * 1000:.1f} ms ({hash_mean / mean:.0%} of a login)")
+        self.stdout.write(f"everything else:    {max(mean - hash_mean, 0) * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"logins/sec/worker:  {1 / mean:.1f}"))
@@ -0,0 +1,89 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.middleware import brotli, compress
+from api.models import LabBooking, EquipmentRental
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import LabBookingSerializer, EquipmentRentalSerializer
+
+
+PAYLOADS = {
+    "lab-bookings": (
+        lambda: LabBooking.objects.select_related("lab", "student", "student__student_profile", "reviewed_by")
+        .order_by("-created_at", "-id"),
+        LabBookingSerializer,
+    ),
+    "equipment-rentals": (
+        lambda: EquipmentRental.objects.select_related("equipment", "student", "student__student_profile", "reviewed_by")
+        .order_by("-created_at", "-id"),
+        EquipmentRentalSerializer,
+    ),
+}
+
+
+def _best_of(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark admin list payloads: serializer time, JSON rendering (DRF vs orjson) "
+        "and compressed size / transfer time (gzip, brotli)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="rows per payload (existing rows are repeated)")
+        parser.add_argument("--repeat", type=int, default=5, help="runs per measurement, best is reported")
+        parser.add_argument("--mbps", type=float, default=10.0, help="link speed for the transfer estimate")
+
+    def handle(self, *args, **options):
+        rows = max(int(options["rows"] or 1000), 1)
+        repeat = max(int(options["repeat"] or 5), 1)
+        bytes_per_sec = max(float(options["mbps"] or 10.0), 0.001) * 1_000_000 / 8
+
+        self.stdout.write(f"orjson: {'yes' if orjson else 'no (DRF fallback)'}   brotli: {'yes' if brotli else 'no'}")
+
+        for name, (make_qs, serializer_class) in PAYLOADS.items():
+            objs = list(make_qs()[:rows])
+            if not objs:
+                self.stdout.write(f"\n{name}: no rows, skipped")
+                continue
+
+            ser_time, data = _best_of(lambda: serializer_class(objs, many=True).data, repeat)
+            data = list(data)
+            while len(data) < rows:
+                data.extend(data[: rows - len(data)])
+            per_row = ser_time / len(objs)
+
+            self.stdout.write(f"\n{name}: {len(data)} rows ({len(objs)} distinct)")
+            self.stdout.write(f"  serialize        {per_row * len(data) * 1000:8.1f} ms (scaled from {len(objs)} rows)")
+
+            renderers = [("DRF JSONRenderer", JSONRenderer())]
+            if orjson is not None:
+                renderers.append(("FastJSONRenderer", FastJSONRenderer()))
+            body = None
+            for label, renderer in renderers:
+                t, out = _best_of(lambda: renderer.render(data), repeat)
+                body = body or out
+                self.stdout.write(f"  render {label:<17} {t * 1000:8.1f} ms  {len(out) / 1024:8.1f} KiB")
+
+            encodings = [("identity", None), ("gzip", "gzip")] + ([("br", "br")] if brotli else [])
+            for label, enc in encodings:
+                if enc is None:
+                    t, out = 0.0, body
+                else:
+                    t, out = _best_of(lambda: compress(body, enc), repeat)
+                transfer = len(out) / bytes_per_sec
+                self.stdout.write(
+                    f"  {label:<9} {len(out) / 1024:8.1f} KiB  compress {t * 1000:6.1f} ms"
+                    f"  transfer {transfer * 1000:7.1f} ms  total {(t + transfer) * 1000:7.1f} ms"
+                )
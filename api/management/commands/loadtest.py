@@ -0,0 +1,121 @@
+import json
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from api import loadtest
+from api.db.pool import pool_stats
+from api.management.stand_in_db import add_allow_real_db_argument, require_stand_in_db
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the API over HTTP with scripted scenarios "
+        f"({', '.join(loadtest.SCENARIOS)}) and report throughput and "
+        "p50/p95/p99 latency per endpoint. Serves aiu_backend.wsgi in-process "
+        "unless --url is given. Refuses to run outside a stand-in database "
+        "(DB_ENGINE=sqlite) unless --allow-real-db; fixtures are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario", action="append", choices=sorted(loadtest.SCENARIOS) + ["all"],
+            help="scenario to run; repeat for a mix (default: all)",
+        )
+        parser.add_argument("--users", type=int, default=50, help="virtual students")
+        parser.add_argument("--admins", type=int, default=2, help="virtual admins (admin-dashboard)")
+        parser.add_argument("--duration", type=float, default=30.0, help="seconds at full load")
+        parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds to start all users")
+        parser.add_argument("--think-scale", type=float, default=1.0, help="multiplier for pauses between iterations")
+        parser.add_argument("--url", help="target a running server instead of serving in-process")
+        parser.add_argument("--keep-throttle", action="store_true",
+                            help="leave the login throttle on (all virtual users share one IP)")
+        parser.add_argument("--output", help="write the JSON results here")
+        parser.add_argument("--compare", help="baseline results JSON to compare against")
+        parser.add_argument("--fail-over", type=float,
+                            help="with --compare: exit 1 if any endpoint's p95 grew by more than this percent")
+        parser.add_argument("--teardown", action="store_true", help="delete the loadtest_* fixtures and exit")
+        parser.add_argument("--keep-fixtures", action="store_true",
+                            help="keep the loadtest_* accounts for the next run instead of deleting them")
+        add_allow_real_db_argument(parser)
+
+    def handle(self, *args, **options):
+        if options["teardown"]:
+            deleted = loadtest.teardown_fixtures()
+            self.stdout.write(f"Deleted {deleted} fixture rows.")
+            return
+
+        scenarios = options["scenario"] or ["all"]
+        if "all" in scenarios:
+            scenarios = list(loadtest.SCENARIOS)
+        scenarios = list(dict.fromkeys(scenarios))
+
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as fh:
+                    baseline = json.load(fh)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {exc}")
+
+        if settings.DEBUG:
+            self.stderr.write("DEBUG is on: query logging and the N+1 detector add overhead; DEBUG=False for real numbers.")
+
+        require_stand_in_db(options)
+        students, admins, lab, tutorial = loadtest.ensure_fixtures(
+            max(options["users"], 0), max(options["admins"], 1),
+        )
+        try:
+            results = self._run(options, scenarios, students, admins, {"lab": lab, "tutorial": tutorial})
+        finally:
+            if options["keep_fixtures"]:
+                self.stderr.write(
+                    "Kept the loadtest_* accounts; the staff ones share a published password. "
+                    "Remove them with --teardown."
+                )
+            else:
+                loadtest.teardown_fixtures()
+
+        self.stdout.write(loadtest.format_report(results))
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(f"\nResults written to {options['output']}")
+
+        if baseline is not None:
+            text, regressed = loadtest.compare(baseline, results, options["fail_over"])
+            self.stdout.write("\n" + text)
+            if regressed:
+                self.stderr.write(f"p95 regressed by more than {options['fail_over']}%: {', '.join(regressed)}")
+                sys.exit(1)
+
+    def _run(self, options, scenarios, students, admins, ctx):
+        overrides = {} if options["keep_throttle"] else {"LOGIN_THROTTLE_ENABLED": False}
+        server = None
+        with override_settings(**overrides):
+            if options["url"]:
+                base_url = options["url"].rstrip("/")
+                if overrides:
+                    self.stderr.write("--url: the login throttle of the target server is not changed.")
+            else:
+                server, base_url = loadtest.serve_in_thread()
+            pool_before = pool_stats()
+            try:
+                results = loadtest.run(
+                    base_url, scenarios, students, admins,
+                    duration=max(options["duration"], 1.0), ramp_up=max(options["ramp_up"], 0.0),
+                    ctx=ctx, think_scale=max(options["think_scale"], 0.0),
+                )
+            finally:
+                if server is not None:
+                    server.shutdown()
+                    server.server_close()
+
+        results["database"] = settings.DATABASES["default"]["ENGINE"].rsplit(".", 1)[-1]
+        if server is not None:
+            # only an in-process server's pool is visible from here
+            results["db_pool"] = loadtest.db_pool_summary(pool_before, pool_stats(), results["total"]["requests"])
+        return results
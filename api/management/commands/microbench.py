@@ -0,0 +1,96 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.benchmarks import BENCHMARKS, compare_results, load_results, measure, save_results
+from api.benchmarks.core import format_time
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the micro-benchmarks in api.benchmarks and print per-call statistics. "
+        "--save NAME stores a baseline, --compare NAME reports faster/slower/same against one. "
+        "Fixture rows are created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filter", action="append", help="only benchmarks whose name contains this (repeatable)")
+        parser.add_argument("--list", action="store_true", help="list benchmarks and exit")
+        parser.add_argument("--repeat", type=int, default=7, help="samples per benchmark")
+        parser.add_argument("--sample-time", type=float, default=0.1, help="seconds per sample")
+        parser.add_argument("--rows", type=int, default=200, help="rows in the booking/rental fixtures")
+        parser.add_argument("--save", help="save results as this baseline (name or path)")
+        parser.add_argument("--compare", help="baseline (name or path) to compare against")
+        parser.add_argument("--min-change", type=float, default=5.0,
+                            help="smallest change in percent reported as faster/slower")
+        parser.add_argument("--fail-slower", action="store_true", help="exit 1 if any benchmark got slower")
+
+    def handle(self, *args, **options):
+        from api.benchmarks import suites  # noqa: F401  (registers the benchmarks)
+
+        names = [
+            n for n in BENCHMARKS
+            if not options["filter"] or any(f in n for f in options["filter"])
+        ]
+        if options["list"]:
+            for n in names:
+                self.stdout.write(f"{n:<28} {BENCHMARKS[n][1]}")
+            return
+        if not names:
+            raise CommandError("No benchmark matches --filter")
+
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = load_results(options["compare"])
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {exc}")
+
+        results = {}
+        try:
+            with transaction.atomic():
+                from api.benchmarks.fixtures import Fixtures
+
+                fixtures = Fixtures(rows=max(options["rows"], 1))
+                self.stdout.write(f"{'benchmark':<28} {'median':>10} {'min':>10} {'stdev':>8} {'loops':>8}")
+                for name in names:
+                    factory, _group = BENCHMARKS[name]
+                    stats = measure(
+                        factory(fixtures), repeat=max(options["repeat"], 2),
+                        sample_time=max(options["sample_time"], 0.001),
+                    )
+                    results[name] = stats
+                    spread = stats["stdev"] / stats["median"] * 100 if stats["median"] else 0.0
+                    self.stdout.write(
+                        f"{name:<28} {format_time(stats['median']):>10} {format_time(stats['min']):>10} "
+                        f"{spread:>7.1f}% {stats['loops']:>8}"
+                    )
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        if options["save"]:
+            path = save_results(options["save"], results)
+            self.stdout.write(f"\nSaved baseline to {path}")
+
+        if baseline is not None:
+            rows = compare_results(baseline, results, min_change=max(options["min_change"], 0.0) / 100)
+            self.stdout.write(f"\n{'benchmark':<28} {'before':>10} {'after':>10} {'change':>8}")
+            slower = []
+            for name, old, new, ratio, verdict in rows:
+                if old is None:
+                    self.stdout.write(f"{name:<28} {'-':>10} {format_time(new):>10} {'new':>8}")
+                    continue
+                change = f"{(ratio - 1) * 100:+.1f}%"
+                line = f"{name:<28} {format_time(old):>10} {format_time(new):>10} {change:>8}  {verdict}"
+                if verdict == "faster":
+                    line = self.style.SUCCESS(line)
+                elif verdict == "slower":
+                    line = self.style.ERROR(line)
+                    slower.append(name)
+                self.stdout.write(line)
+            if slower and options["fail_slower"]:
+                raise CommandError(f"Slower than {options['compare']}: {', '.join(slower)}")
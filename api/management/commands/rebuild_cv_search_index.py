@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api.cv_search import reindex_cvs
+from api.models import CV
+
+
+class Command(BaseCommand):
+    help = "Rebuild the CV talent-search index (cv_search_terms) from scratch, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = max(int(options["batch_size"] or 500), 1)
+        ids = list(CV.objects.order_by("id").values_list("id", flat=True))
+
+        total_rows = 0
+        for i in range(0, len(ids), batch_size):
+            total_rows += reindex_cvs(ids[i:i + batch_size])
+            self.stdout.write(f"indexed {min(i + batch_size, len(ids))}/{len(ids)} CVs")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {len(ids)} CVs, {total_rows} postings."))
@@ -0,0 +1,491 @@
+import random
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, time as dtime, timedelta
+from itertools import accumulate
+
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.caching import bump_model_version
+from api.cv_search import reindex_cvs
+from api.management.stand_in_db import add_allow_real_db_argument, require_stand_in_db
+from api.models import (
+    AdminProfile, Award, CV, CVSearchTerm, Category, Certification, Education, Equipment,
+    EquipmentCategory, EquipmentCategoryMapping, EquipmentRental, Experience, Involvement, Lab,
+    LabBooking, Language, Project, Reference, Skill, StudentProfile, Tutorial, TutorialProgress, User,
+)
+
+
+TIME_SLOTS = ("09:00-11:00", "11:00-13:00", "13:00-15:00", "15:00-17:00", "17:00-19:00")
+IMACS_PER_LAB = 30
+
+SKILLS = (
+    "Premiere Pro", "After Effects", "Final Cut Pro", "DaVinci Resolve", "Photoshop", "Lightroom",
+    "Illustrator", "InDesign", "Audition", "Pro Tools", "Cinema 4D", "Blender", "Photography",
+    "Videography", "Copywriting", "Social Media", "Public Relations", "Storyboarding", "Podcasting",
+    "Broadcast Journalism", "Colour Grading", "Motion Graphics", "Sound Design", "Script Writing",
+)
+COMPANIES = ("Astro", "Media Prima", "BFM", "Star Media", "Ogilvy", "Leo Burnett", "Freelance", "AIU Studio")
+POSITIONS = ("Video Editor", "Intern", "Camera Operator", "Content Creator", "Producer", "Designer", "Reporter")
+LANGUAGES = ("English", "Malay", "Arabic", "Mandarin", "French", "Tamil")
+EQUIPMENT_KINDS = (
+    ("camera", "Camera"), ("audio", "Microphone"), ("lighting", "LED Panel"),
+    ("accessories", "Tripod"), ("camera", "Lens"), ("audio", "Recorder"), ("other", "Gimbal"),
+)
+
+
+def _zipf_cum_weights(n, skew):
+    """Cumulative weights where item i is chosen with probability ~ 1 / (i+1)**skew."""
+    return list(accumulate(1.0 / (i + 1) ** skew for i in range(n)))
+
+
+def _pick_distinct(rng, cum_weights, k):
+    """Up to k distinct indexes drawn with the given popularity."""
+    total = cum_weights[-1]
+    seen = set()
+    for _ in range(k * 3):
+        if len(seen) >= k:
+            break
+        seen.add(bisect_left(cum_weights, rng.random() * total))
+    return seen
+
+
+def _weighted(rng, table):
+    """Pick a key of {value: weight}."""
+    return rng.choices(list(table), weights=list(table.values()))[0]
+
+
+@contextmanager
+def _explicit_timestamps(*models):
+    """
+    Let bulk_create keep the created_at/updated_at values we generate:
+    auto_now / auto_now_add would stamp every row with the load time.
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class _Writer:
+    """Buffers rows per model and writes them with bulk_create in batches."""
+
+    def __init__(self, batch_size, stdout):
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.buffers = defaultdict(list)
+        self.counts = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+    def add(self, obj):
+        model = type(obj)
+        buf = self.buffers[model]
+        buf.append(obj)
+        if len(buf) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model=None):
+        for m in [model] if model else list(self.buffers):
+            buf = self.buffers[m]
+            if not buf:
+                continue
+            t0 = time.perf_counter()
+            m.objects.bulk_create(buf, batch_size=self.batch_size)
+            self.seconds[m] += time.perf_counter() - t0
+            self.counts[m] += len(buf)
+            self.buffers[m] = []
+
+    def report(self):
+        for model, n in sorted(self.counts.items(), key=lambda kv: -kv[1]):
+            secs = self.seconds[model]
+            rate = n / secs if secs else 0
+            self.stdout.write(f"  {model.__name__:<26} {n:>10,} rows  {secs:7.1f}s  {rate:>10,.0f} rows/s")
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large synthetic dataset for scale testing: students with profiles, tutorials and "
+        "progress, years of lab bookings, equipment and rentals, full CVs. Deterministic for a given "
+        "--seed; written with batched bulk_create and one precomputed password hash per role. "
+        "All rows are tagged with --prefix so --clear can remove them. Staff accounts are created too, "
+        "so --password is required and only a stand-in SQLite database is accepted unless --allow-real-db."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--scale", type=float, default=1.0, help="multiplies every volume below")
+        parser.add_argument("--students", type=int, default=20000)
+        parser.add_argument("--admins", type=int, default=25)
+        parser.add_argument("--categories", type=int, default=15)
+        parser.add_argument("--tutorials", type=int, default=1000)
+        parser.add_argument("--progress-per-student", type=float, default=50.0,
+                            help="mean tutorials started per student (exponential)")
+        parser.add_argument("--labs", type=int, default=3)
+        parser.add_argument("--years", type=float, default=3.0, help="history of bookings and rentals")
+        parser.add_argument("--bookings-per-student", type=float, default=4.0, help="mean per student per year")
+        parser.add_argument("--equipment", type=int, default=300)
+        parser.add_argument("--rentals-per-student", type=float, default=3.0, help="mean per student over --years")
+        parser.add_argument("--cv-ratio", type=float, default=0.6, help="share of students with a CV")
+        parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for tutorial/equipment popularity")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--prefix", default="scale", help="username / name prefix of generated rows")
+        parser.add_argument("--password", help="password of every generated user, staff included (required)")
+        parser.add_argument("--skip-search-index", action="store_true", help="do not index the generated CVs")
+        parser.add_argument("--clear", action="store_true", help="delete rows from a previous run with this prefix and exit")
+        add_allow_real_db_argument(parser)
+
+    # ---------------- ENTRY ---------------- #
+
+    def handle(self, *args, **o):
+        prefix = (o["prefix"] or "").strip()
+        if not prefix or not prefix.isalnum():
+            raise CommandError("--prefix must be a non-empty alphanumeric string")
+        self.prefix = prefix
+
+        if o["clear"]:
+            self._clear()
+            return
+
+        require_stand_in_db(o)
+        if not o["password"]:
+            raise CommandError("--password is required: the generated staff accounts must not share a published default")
+        if User.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(f"Rows with prefix '{prefix}' exist; run with --clear first or use another --prefix")
+
+        scale = max(o["scale"], 0.0)
+
+        def n(name):
+            return max(int(round(o[name] * scale)), 0)
+
+        self.rng = random.Random(o["seed"])
+        self.now = timezone.now().replace(microsecond=0)
+        self.start = self.now - timedelta(days=int(365 * max(o["years"], 0.1)))
+        self.writer = _Writer(max(o["batch_size"], 100), self.stdout)
+        self.skew = max(o["skew"], 0.0)
+
+        t0 = time.perf_counter()
+        with _explicit_timestamps(User, TutorialProgress, LabBooking, EquipmentRental, CV):
+            students, admins = self._users(max(n("students"), 1), max(n("admins"), 1), o["password"])
+            tutorials = self._tutorials(max(n("categories"), 1), max(n("tutorials"), 1), admins)
+            equipment = self._equipment(max(n("equipment"), 1))
+            labs = self._labs(max(int(o["labs"]), 1))
+
+            stats = defaultdict(lambda: [0, 0, 0])  # user id -> [bookings, active rentals, tutorials completed]
+            self._progress(students, tutorials, o["progress_per_student"], stats)
+            self._bookings(students, admins, labs, o["bookings_per_student"] * max(o["years"], 0.1), stats)
+            self._rentals(students, admins, equipment, o["rentals_per_student"], stats)
+            self._profiles(students, admins, stats)
+            cv_ids = self._cvs(students, admins, min(max(o["cv_ratio"], 0.0), 1.0))
+        self.writer.flush()
+
+        if cv_ids and not o["skip_search_index"]:
+            t_index = time.perf_counter()
+            for i in range(0, len(cv_ids), 500):
+                reindex_cvs(cv_ids[i:i + 500])
+            self.stdout.write(f"Indexed {len(cv_ids):,} CVs for search in {time.perf_counter() - t_index:.1f}s")
+
+        # bulk_create sends no signals: invalidate cached responses/dashboards once
+        for model in apps.get_app_config("api").get_models():
+            bump_model_version(model)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {sum(self.writer.counts.values()):,} rows in {time.perf_counter() - t0:.1f}s "
+            f"(seed {o['seed']}, prefix '{prefix}')"
+        ))
+        self.writer.report()
+
+    # ---------------- GENERATORS ---------------- #
+
+    def _when(self, lo=None, hi=None):
+        lo, hi = lo or self.start, hi or self.now
+        span = max(int((hi - lo).total_seconds()), 1)
+        return lo + timedelta(seconds=self.rng.randrange(span))
+
+    def _ids_by(self, queryset, key):
+        return dict(queryset.values_list(key, "id"))
+
+    def _users(self, n_students, n_admins, password):
+        p = self.prefix
+        # one hash per role: PBKDF2 per user would take hours at this volume
+        student_hash = make_password(password)
+        admin_hash = make_password(password)
+        w = self.writer
+        for i in range(n_admins):
+            joined = self._when()
+            w.add(User(
+                username=f"{p}_admin{i:04d}", email=f"{p}_admin{i:04d}@scale.invalid", password=admin_hash,
+                first_name="Admin", last_name=str(i), user_type="admin", is_staff=True,
+                date_joined=joined, created_at=joined, updated_at=joined,
+            ))
+        for i in range(n_students):
+            joined = self._when()
+            w.add(User(
+                username=f"{p}_s{i:06d}", email=f"{p}_s{i:06d}@scale.invalid", password=student_hash,
+                first_name="Student", last_name=str(i), user_type="student",
+                date_joined=joined, created_at=joined, updated_at=joined,
+            ))
+        w.flush(User)
+        ids = self._ids_by(User.objects.filter(username__startswith=f"{p}_"), "username")
+        admins = [ids[f"{p}_admin{i:04d}"] for i in range(n_admins)]
+        students = [ids[f"{p}_s{i:06d}"] for i in range(n_students)]
+        return students, admins
+
+    def _tutorials(self, n_categories, n_tutorials, admins):
+        p, rng, w = self.prefix, self.rng, self.writer
+        for i in range(n_categories):
+            w.add(Category(name=f"{p} category {i}"))
+        w.flush(Category)
+        categories = list(self._ids_by(Category.objects.filter(name__startswith=f"{p} category "), "name").values())
+
+        levels = {"beginner": 5, "intermediate": 3.5, "advanced": 1.5}
+        for i in range(n_tutorials):
+            w.add(Tutorial(
+                title=f"{p} tutorial {i:05d}", description="Synthetic tutorial", category_id=rng.choice(categories),
+                video_url=f"https://example.com/watch?v={p}{i}", duration=rng.randint(3, 60),
+                level=_weighted(rng, levels), views=int(rng.paretovariate(1.2) * 20),
+                is_active=rng.random() > 0.05, created_by_id=rng.choice(admins),
+            ))
+        w.flush(Tutorial)
+        by_title = self._ids_by(Tutorial.objects.filter(title__startswith=f"{p} tutorial "), "title")
+        return [by_title[f"{p} tutorial {i:05d}"] for i in range(n_tutorials)]
+
+    def _equipment(self, n_equipment):
+        p, rng, w = self.prefix, self.rng, self.writer
+        kinds = sorted({label for _c, label in EQUIPMENT_KINDS})
+        for label in kinds:
+            w.add(EquipmentCategory(name=f"{p} {label}"))
+        w.flush(EquipmentCategory)
+        category_ids = self._ids_by(EquipmentCategory.objects.filter(name__startswith=f"{p} "), "name")
+
+        plan = []
+        for i in range(n_equipment):
+            code, label = rng.choice(EQUIPMENT_KINDS)
+            eid = f"{p.upper()}-{i:05d}"
+            total = rng.randint(1, 5)
+            # bulk_create skips Equipment.save(), so no QR image is generated
+            w.add(Equipment(
+                name=f"{label} {i}", description="Synthetic equipment", category=code, equipment_id=eid,
+                quantity_total=total, quantity_available=total, quantity_under_maintenance=int(rng.random() < 0.1),
+            ))
+            plan.append((eid, label))
+        w.flush(Equipment)
+        ids = self._ids_by(Equipment.objects.filter(equipment_id__startswith=f"{p.upper()}-"), "equipment_id")
+        for eid, label in plan:
+            w.add(EquipmentCategoryMapping(equipment_id=ids[eid], category_id=category_ids[f"{p} {label}"]))
+        return [ids[eid] for eid, _label in plan]
+
+    def _labs(self, n_labs):
+        p = self.prefix
+        for i in range(n_labs):
+            self.writer.add(Lab(
+                name=f"{p} Lab {i}", description="Synthetic lab", capacity=IMACS_PER_LAB,
+                location=f"Block {i}", facilities="iMac, Wacom, Headphones",
+            ))
+        self.writer.flush(Lab)
+        return list(Lab.objects.filter(name__startswith=f"{p} Lab ").order_by("id").values_list("id", flat=True))
+
+    def _progress(self, students, tutorials, mean, stats):
+        rng, w = self.rng, self.writer
+        cum = _zipf_cum_weights(len(tutorials), self.skew)
+        for sid in students:
+            k = min(int(rng.expovariate(1.0 / mean)) if mean > 0 else 0, len(tutorials))
+            for idx in _pick_distinct(rng, cum, k):
+                completed = rng.random() < 0.4
+                w.add(TutorialProgress(
+                    student_id=sid, tutorial_id=tutorials[idx], completed=completed,
+                    progress_percentage=100 if completed else rng.randint(1, 94), last_watched_at=self._when(),
+                ))
+                stats[sid][2] += completed
+
+    def _bookings(self, students, admins, labs, mean_total, stats):
+        rng, w = self.rng, self.writer
+        today = timezone.localdate()
+        last_day = today + timedelta(days=14)
+        days = (last_day - self.start.date()).days
+        taken = set()  # (lab, date, slot, imac) of bookings that hold the seat
+        tz = timezone.get_current_timezone()
+
+        for sid in students:
+            k = max(int(rng.gauss(mean_total, mean_total / 3.0)), 0)
+            for _ in range(k):
+                for _attempt in range(5):
+                    day = self.start.date() + timedelta(days=rng.randrange(days))
+                    if day.weekday() >= 5:
+                        continue
+                    lab, slot, imac = rng.choice(labs), rng.randrange(len(TIME_SLOTS)), rng.randint(1, IMACS_PER_LAB)
+                    if (lab, day, slot, imac) not in taken:
+                        break
+                else:
+                    continue
+
+                future = day >= today
+                if future:
+                    status = _weighted(rng, {"pending": 6, "approved": 4})
+                else:
+                    status = _weighted(rng, {"completed": 80, "cancelled": 10, "rejected": 10})
+                if status not in ("cancelled", "rejected"):
+                    taken.add((lab, day, slot, imac))
+
+                start_s, end_s = TIME_SLOTS[slot].split("-")
+                start_t = dtime.fromisoformat(start_s)
+                created = timezone.make_aware(datetime.combine(day, start_t), tz) - timedelta(
+                    hours=rng.randint(2, 24 * 14)
+                )
+                created = min(created, self.now)
+                reviewed = status in ("approved", "rejected", "completed")
+                w.add(LabBooking(
+                    lab_id=lab, student_id=sid, booking_date=day, start_time=start_t,
+                    end_time=dtime.fromisoformat(end_s), time_slot=TIME_SLOTS[slot], imac_number=imac,
+                    purpose="Editing coursework", status=status,
+                    reviewed_by_id=rng.choice(admins) if reviewed else None,
+                    reviewed_at=created + timedelta(hours=rng.randint(1, 48)) if reviewed else None,
+                    created_at=created, updated_at=created,
+                ))
+                stats[sid][0] += 1
+
+    def _rentals(self, students, admins, equipment, mean, stats):
+        rng, w = self.rng, self.writer
+        cum = _zipf_cum_weights(len(equipment), self.skew)
+        recent = self.now - timedelta(days=30)
+        for sid in students:
+            k = int(rng.expovariate(1.0 / mean)) if mean > 0 else 0
+            for _ in range(k):
+                created = self._when()
+                if created < recent:
+                    status = _weighted(rng, {"returned": 80, "rejected": 10, "overdue": 5, "damaged": 2, "active": 3})
+                else:
+                    status = _weighted(rng, {"pending": 35, "approved": 30, "active": 20, "returned": 15})
+                days = rng.randint(1, 7)
+                rental_date = created + timedelta(hours=rng.randint(1, 48)) if status != "pending" else None
+                expected = (rental_date or created) + timedelta(days=days)
+                reviewed = status != "pending"
+                w.add(EquipmentRental(
+                    equipment_id=equipment[bisect_left(cum, rng.random() * cum[-1])], student_id=sid,
+                    pickup_date=(rental_date or created).date(), duration_days=days,
+                    rental_date=rental_date, expected_return_date=expected,
+                    actual_return_date=expected - timedelta(hours=rng.randint(0, 24)) if status == "returned" else None,
+                    status=status,
+                    reviewed_by_id=rng.choice(admins) if reviewed else None,
+                    reviewed_at=created + timedelta(hours=1) if reviewed else None,
+                    issued_by_id=rng.choice(admins) if rental_date else None,
+                    returned_to_id=rng.choice(admins) if status == "returned" else None,
+                    created_at=created, updated_at=created,
+                ))
+                stats[sid][1] += status == "approved"
+
+    def _profiles(self, students, admins, stats):
+        p, rng, w = self.prefix, self.rng, self.writer
+        for i, uid in enumerate(admins):
+            w.add(AdminProfile(user_id=uid, admin_id=f"{p.upper()}A{i:05d}", role="Lab staff"))
+        programs = ("Bachelor of Media & Communication", "Diploma in Media Studies", "Master of Communication")
+        for i, uid in enumerate(students):
+            bookings, rentals, watched = stats.get(uid, (0, 0, 0))
+            w.add(StudentProfile(
+                user_id=uid, student_id=f"{p.upper()}{i:06d}"[:20], program=_weighted(rng, dict(zip(programs, (8, 1.5, 0.5)))),
+                year=str(rng.randint(1, 4)), total_bookings=bookings, active_rentals=rentals, tutorials_watched=watched,
+            ))
+
+    def _cvs(self, students, admins, ratio):
+        rng, w = self.rng, self.writer
+        statuses = {"draft": 30, "pending": 25, "approved": 35, "needs-changes": 8, "flagged": 2}
+        owners = [sid for sid in students if rng.random() < ratio]
+        for sid in owners:
+            created = self._when()
+            status = _weighted(rng, statuses)
+            reviewed = status in ("approved", "needs-changes", "flagged")
+            w.add(CV(
+                student_id=sid, status=status, full_name=f"Student {sid}", title=rng.choice(POSITIONS),
+                summary=f"Media student focused on {', '.join(rng.sample(SKILLS, 3))}.",
+                email=f"cv{sid}@scale.invalid", phone="0100000000", location="Kuala Lumpur",
+                reviewed_by_id=rng.choice(admins) if reviewed else None,
+                reviewed_at=created + timedelta(days=2) if reviewed else None,
+                created_at=created, updated_at=self._when(created, self.now),
+            ))
+        w.flush(CV)
+
+        cv_ids = dict(CV.objects.filter(student_id__in=owners).values_list("student_id", "id")) if owners else {}
+        for sid in owners:
+            cv = cv_ids[sid]
+            for j in range(rng.randint(1, 2)):
+                w.add(Education(cv_id=cv, degree="BMC", institution="Albukhary International University",
+                                start_date=str(2018 + j * 3), end_date=str(2021 + j * 3), order=j))
+            for j in range(rng.randint(0, 4)):
+                w.add(Experience(cv_id=cv, position=rng.choice(POSITIONS), company=rng.choice(COMPANIES),
+                                 start_date=str(2019 + j), end_date=str(2020 + j), description="Synthetic", order=j))
+            for j in range(rng.randint(1, 5)):
+                w.add(Project(cv_id=cv, name=f"Project {j}", description="Synthetic project",
+                              technologies=", ".join(rng.sample(SKILLS, 2)), order=j))
+            for j, name in enumerate(rng.sample(SKILLS, rng.randint(3, 10))):
+                w.add(Skill(cv_id=cv, name=name, order=j))
+            for j, name in enumerate(rng.sample(LANGUAGES, rng.randint(1, 3))):
+                w.add(Language(cv_id=cv, name=name, proficiency=rng.choice(("Native", "Fluent", "Intermediate")), order=j))
+            for j in range(rng.randint(0, 2)):
+                w.add(Award(cv_id=cv, title=f"Award {j}", issuer="AIU", year=str(2020 + j), order=j))
+            for j in range(rng.randint(0, 3)):
+                w.add(Certification(cv_id=cv, name=f"{rng.choice(SKILLS)} Certified", issuer="Adobe",
+                                    year=str(2020 + j), order=j))
+            for j in range(rng.randint(0, 2)):
+                w.add(Involvement(cv_id=cv, role="Member", organization="Film Society", year=str(2021 + j), order=j))
+            for j in range(rng.randint(0, 2)):
+                w.add(Reference(cv_id=cv, name=f"Lecturer {j}", position="Lecturer", workplace="AIU",
+                                phone="0100000000", email=f"ref{j}@scale.invalid", order=j))
+        return sorted(cv_ids.values())
+
+    # ---------------- CLEANUP ---------------- #
+
+    def _clear(self):
+        p = self.prefix
+        users = User.objects.filter(username__startswith=f"{p}_")
+        tutorials = Tutorial.objects.filter(title__startswith=f"{p} tutorial ")
+        equipment = Equipment.objects.filter(equipment_id__startswith=f"{p.upper()}-")
+        cvs = CV.objects.filter(student__in=users)
+
+        # The big child tables go first with plain DELETEs. QuerySet.delete()
+        # would load millions of rows to send post_delete signals (every api
+        # model has receivers, so Django never fast-deletes them); _raw_delete
+        # is private Django API, used deliberately. Nothing those signals do is
+        # lost: the rows belong to CVs / users / equipment deleted through the
+        # ORM just below (their search terms go with them), and every model's
+        # cache version is bumped at the end.
+        big = [
+            CVSearchTerm.objects.filter(cv__in=cvs),
+            *(m.objects.filter(cv__in=cvs) for m in
+              (Education, Experience, Project, Skill, Language, Award, Certification, Involvement, Reference)),
+            TutorialProgress.objects.filter(student__in=users),
+            TutorialProgress.objects.filter(tutorial__in=tutorials),
+            LabBooking.objects.filter(student__in=users),
+            EquipmentRental.objects.filter(student__in=users),
+            EquipmentRental.objects.filter(equipment__in=equipment),
+            EquipmentCategoryMapping.objects.filter(equipment__in=equipment),
+        ]
+        total = 0
+        t0 = time.perf_counter()
+        for qs in big:
+            with transaction.atomic():
+                total += qs._raw_delete(qs.db)
+
+        with transaction.atomic():
+            for qs in (
+                cvs, equipment, EquipmentCategory.objects.filter(name__startswith=f"{p} "),
+                tutorials, Category.objects.filter(name__startswith=f"{p} category "),
+                Lab.objects.filter(name__startswith=f"{p} Lab "), users,
+            ):
+                deleted, _ = qs.delete()
+                total += deleted
+
+        for model in apps.get_app_config("api").get_models():
+            bump_model_version(model)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total:,} rows with prefix '{p}' in {time.perf_counter() - t0:.1f}s"))
@@ -0,0 +1,163 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import compare_results, load_results, save_results
+
+
+# what a worker does before its first request: settings, apps, middleware, URLconf (views, serializers)
+BOOT_SCRIPT = r"""
+import json, os, resource, sys, time
+t0 = time.perf_counter()
+from aiu_backend.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+boot = time.perf_counter() - t0
+try:
+    with open("/proc/self/statm") as fh:
+        rss = int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+except (OSError, ValueError):
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+print(json.dumps({
+    "boot": boot,
+    "rss": rss,
+    "modules": len(sys.modules),
+    "loaded": sorted(m for m in %(heavy)r if m in sys.modules),
+}))
+"""
+
+# imported inside the functions that need them (QR labels, CV PDFs, staff profiling),
+# never at boot; brotli and orjson are per-request speed-ups and stay eager
+HEAVY_MODULES = ("qrcode", "PIL.Image", "reportlab", "reportlab.pdfgen", "PyPDF2", "cProfile", "pstats")
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure worker start-up: boot time to a loaded URLconf and resident memory, "
+        "over --repeat fresh interpreters, plus an import-time profile (-X importtime) "
+        "of the slowest modules and a check that heavy optional dependencies stay "
+        "unimported. --save/--compare keep baselines; --budget-ms/--budget-mb fail "
+        "the command when exceeded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="fresh processes to time")
+        parser.add_argument("--top", type=int, default=20, help="slowest imports to list")
+        parser.add_argument("--no-imports", action="store_true", help="skip the import-time profile")
+        parser.add_argument("--save", help="save the result as this baseline (name or path)")
+        parser.add_argument("--compare", help="baseline (name or path) to compare against")
+        parser.add_argument("--budget-ms", type=float, help="fail if median boot time exceeds this")
+        parser.add_argument("--budget-mb", type=float, help="fail if median resident memory exceeds this")
+
+    def _run(self, *flags):
+        env = dict(os.environ)
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, *flags, "-c", BOOT_SCRIPT % {"heavy": HEAVY_MODULES}],
+            cwd=str(settings.BASE_DIR), env=env, capture_output=True, text=True,
+        )
+        wall = time.perf_counter() - t0
+        if proc.returncode != 0:
+            raise CommandError(f"Boot failed:\n{proc.stderr[-2000:]}")
+        return json.loads(proc.stdout.strip().splitlines()[-1]), wall, proc.stderr
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = load_results(options["compare"])
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {exc}")
+
+        boots, walls, rss = [], [], []
+        for _ in range(max(options["repeat"], 1)):
+            data, wall, _stderr = self._run()
+            boots.append(data["boot"])
+            walls.append(wall)
+            rss.append(data["rss"] / 2**20)
+
+        results = {
+            "startup.boot": _stats(boots),
+            "startup.process": _stats(walls),
+            "startup.rss_mb": _stats(rss),
+        }
+        self.stdout.write(
+            f"boot to URLconf   {results['startup.boot']['median'] * 1000:8.1f} ms  (min {min(boots) * 1000:.1f})\n"
+            f"whole process     {results['startup.process']['median'] * 1000:8.1f} ms  (interpreter start included)\n"
+            f"resident memory   {results['startup.rss_mb']['median']:8.1f} MB\n"
+            f"modules loaded    {data['modules']:8d}"
+        )
+        loaded = data["loaded"]
+        if loaded:
+            self.stdout.write(self.style.WARNING(f"heavy modules imported at boot: {', '.join(loaded)}"))
+        else:
+            self.stdout.write(f"heavy modules deferred: {', '.join(HEAVY_MODULES)}")
+
+        if not options["no_imports"]:
+            _data, _wall, stderr = self._run("-X", "importtime")
+            self._print_imports(stderr, max(options["top"], 1))
+
+        if options["save"]:
+            path = save_results(options["save"], results)
+            self.stdout.write(f"\nSaved baseline to {path}")
+
+        if baseline is not None:
+            self.stdout.write(f"\n{'metric':<18} {'before':>10} {'after':>10} {'change':>8}")
+            for name, old, new, ratio, verdict in compare_results(baseline, results):
+                if old is None:
+                    continue
+                unit = "MB" if name.endswith("_mb") else "ms"
+                scale = 1 if unit == "MB" else 1000
+                if name.endswith("_mb"):
+                    verdict = {"faster": "smaller", "slower": "larger"}.get(verdict, verdict)
+                self.stdout.write(
+                    f"{name:<18} {old * scale:>8.1f}{unit} {new * scale:>8.1f}{unit} "
+                    f"{(ratio - 1) * 100:>+7.1f}%  {verdict}"
+                )
+
+        problems = []
+        if options["budget_ms"] is not None and results["startup.boot"]["median"] * 1000 > options["budget_ms"]:
+            problems.append(f"boot {results['startup.boot']['median'] * 1000:.0f} ms > {options['budget_ms']:.0f} ms")
+        if options["budget_mb"] is not None and results["startup.rss_mb"]["median"] > options["budget_mb"]:
+            problems.append(f"memory {results['startup.rss_mb']['median']:.1f} MB > {options['budget_mb']:.1f} MB")
+        if problems:
+            raise CommandError("Start-up budget exceeded: " + "; ".join(problems))
+
+    def _print_imports(self, stderr, top):
+        rows = []
+        by_package = defaultdict(int)
+        for line in stderr.splitlines():
+            m = _IMPORTTIME_RE.match(line)
+            if not m:
+                continue
+            self_us, cumulative_us, module = int(m.group(1)), int(m.group(2)), m.group(4)
+            rows.append((cumulative_us, self_us, len(m.group(3)) // 2, module))
+            by_package[module.split(".", 1)[0]] += self_us
+
+        self.stdout.write(f"\n{'slowest imports (cumulative)':<48} {'cum ms':>8} {'self ms':>8}")
+        for cumulative_us, self_us, _depth, module in sorted(rows, reverse=True)[:top]:
+            self.stdout.write(f"{module:<48} {cumulative_us / 1000:>8.1f} {self_us / 1000:>8.1f}")
+
+        self.stdout.write(f"\n{'import time by top-level package (self)':<48} {'ms':>8}")
+        for package, self_us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+            self.stdout.write(f"{package:<48} {self_us / 1000:>8.1f}")
+
+
+def _stats(values):
+    return {
+        "median": statistics.median(values),
+        "min": min(values),
+        "mean": statistics.fmean(values),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "samples": values,
+    }
@@ -0,0 +1,125 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.tracing import read_traces
+
+
+class Command(BaseCommand):
+    help = (
+        "Inspect traces written by TracingMiddleware. Without arguments lists the "
+        "slowest recent traces; with a trace id (or --slowest) prints its span tree. "
+        "Consecutive sibling spans with the same name and SQL are folded into one line."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("trace_id", nargs="?", help="trace id or a unique prefix of one")
+        parser.add_argument("--endpoint", help="only traces of this endpoint (e.g. cv-download-pdf)")
+        parser.add_argument("--path", help="only traces whose path contains this")
+        parser.add_argument("--min-ms", type=float, default=0.0, help="only traces at least this slow")
+        parser.add_argument("--limit", type=int, default=20, help="traces to list")
+        parser.add_argument("--slowest", action="store_true", help="print the tree of the slowest match")
+        parser.add_argument("--hide-under", type=float, default=0.0,
+                            help="hide spans (and their children) shorter than this many ms")
+        parser.add_argument("--file", action="append", help="read this JSONL file instead of TRACING_DIR")
+
+    def handle(self, *args, **options):
+        traces = [
+            t for t in read_traces(options["file"])
+            if (not options["endpoint"] or t.get("endpoint") == options["endpoint"])
+            and (not options["path"] or options["path"] in (t.get("path") or ""))
+            and t.get("duration_ms", 0) >= options["min_ms"]
+        ]
+
+        if options["trace_id"]:
+            matches = [t for t in traces if t.get("trace_id", "").startswith(options["trace_id"])]
+            if not matches:
+                raise CommandError(f"No trace {options['trace_id']}")
+            if len(matches) > 1:
+                raise CommandError(f"{len(matches)} traces start with {options['trace_id']}; give more of the id")
+            self._print_tree(matches[0], options["hide_under"])
+            return
+
+        if not traces:
+            self.stdout.write("No traces recorded.")
+            return
+
+        traces.sort(key=lambda t: t.get("duration_ms", 0), reverse=True)
+        if options["slowest"]:
+            self._print_tree(traces[0], options["hide_under"])
+            return
+
+        self.stdout.write(f"{'trace':<12} {'ms':>9} {'spans':>6} {'db':>5} {'status':>6}  endpoint / path")
+        for t in traces[: max(options["limit"], 1)]:
+            spans = t.get("spans") or []
+            db = sum(1 for s in spans if s.get("kind") == "db")
+            self.stdout.write(
+                f"{t.get('trace_id', '')[:12]:<12} {t.get('duration_ms', 0):>9.1f} {len(spans):>6} {db:>5} "
+                f"{t.get('status', ''):>6}  {t.get('endpoint', '')}  {t.get('method', '')} {t.get('path', '')}"
+            )
+
+    # ---------------- TREE ---------------- #
+
+    def _print_tree(self, trace, hide_under):
+        spans = trace.get("spans") or []
+        children = defaultdict(list)
+        for s in spans:
+            children[s.get("parent")].append(s)
+
+        self.stdout.write(
+            f"trace {trace.get('trace_id')}  {trace.get('method', '')} {trace.get('path', '')}  "
+            f"status {trace.get('status', '')}  {trace.get('duration_ms', 0):.1f} ms  "
+            f"({trace.get('sampled_by', '?')}, {len(spans)} spans"
+            + (f", {trace['dropped_spans']} dropped" if trace.get("dropped_spans") else "")
+            + ")"
+        )
+        db_spans = [s for s in spans if s.get("kind") == "db"]
+        if db_spans:
+            db_ms = sum(s.get("duration_ms", 0) for s in db_spans)
+            self.stdout.write(f"{len(db_spans)} queries, {db_ms:.1f} ms in the database")
+        self.stdout.write("")
+        for root in children.get(None, []):
+            self._print_span(root, children, 0, hide_under)
+
+    def _print_span(self, s, children, depth, hide_under, count=1, total=None):
+        total = s.get("duration_ms", 0) if total is None else total
+        if total < hide_under:
+            return
+        kids = children.get(s["id"], [])
+        own = total - sum(k.get("duration_ms", 0) for k in kids)
+        label = s.get("name", "?")
+        attrs = dict(s.get("attrs") or {})
+        sql = attrs.pop("sql", None)
+        if sql:
+            label = f"{label}  {sql[:120]}"
+        extra = " ".join(f"{k}={v}" for k, v in attrs.items() if v not in (None, "", False))
+        times = f" x{count}" if count > 1 else ""
+        line = (
+            f"{'  ' * depth}{label}{times}  {total:.2f} ms"
+            + (f" (self {own:.2f})" if kids and count == 1 else "")
+            + (f"  [{extra}]" if extra else "")
+            + f"  @{s.get('start_ms', 0):.1f}"
+        )
+        if s.get("attrs", {}).get("error"):
+            line = self.style.ERROR(line)
+        elif count > 1 and s.get("kind") == "db":
+            line = self.style.WARNING(line)
+        self.stdout.write(line)
+
+        if count > 1:
+            return
+        for kid, n, kid_total in _fold(kids):
+            self._print_span(kid, children, depth + 1, hide_under, n, kid_total)
+
+
+def _fold(spans):
+    """[(first span, repeats, total ms)] with runs of identical leaf spans merged."""
+    out = []
+    for s in spans:
+        key = (s.get("name"), s.get("kind"), (s.get("attrs") or {}).get("sql"))
+        if out and out[-1][3] == key and s.get("kind") == "db":
+            first, n, total, _ = out[-1]
+            out[-1] = (first, n + 1, total + s.get("duration_ms", 0), key)
+        else:
+            out.append((s, 1, s.get("duration_ms", 0), key))
+    return [(s, n, total) for s, n, total, _key in out]
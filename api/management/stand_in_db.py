@@ -0,0 +1,29 @@
+"""
+Guard for commands that write throwaway rows (load-test fixtures, scale seeds)
+into the configured database. Those rows include staff accounts with a
+password known to anyone who reads the command, so by default they only go
+into a stand-in SQLite database (DB_ENGINE=sqlite); --allow-real-db overrides
+that for a disposable copy of another engine.
+"""
+
+from django.core.management.base import CommandError
+from django.db import connections
+
+
+def add_allow_real_db_argument(parser):
+    parser.add_argument(
+        "--allow-real-db", action="store_true",
+        help="write into a non-SQLite database (only for a disposable copy, never production)",
+    )
+
+
+def require_stand_in_db(options, using="default"):
+    """Raise CommandError unless the database is SQLite or --allow-real-db was given."""
+    connection = connections[using]
+    if connection.vendor == "sqlite" or options.get("allow_real_db"):
+        return
+    raise CommandError(
+        f"Refusing to create fixture accounts in the {connection.vendor} database "
+        f"{connection.settings_dict.get('NAME')!r}, which may hold production data. "
+        "Use DB_ENGINE=sqlite, or pass --allow-real-db for a disposable copy."
+    )
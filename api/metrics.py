@@ -0,0 +1,416 @@
+"""
+Per-request performance metrics, exported in Prometheus text format.
+
+MetricsMiddleware (api.middleware) measures every request: wall time, number
+of DB queries, DB time and serializer time. Each request is tagged with the
+endpoint that handled it: "<basename>-<action>" for viewsets (lab-booking-list,
+cv-download-pdf) or the URL name for plain views (login, admin-dashboard).
+
+Every worker keeps its own histograms in memory and writes them to
+METRICS_DIR/metrics-<pid>.json at most once per METRICS_FLUSH_INTERVAL.
+/metrics adds up all the files, so the numbers cover every gunicorn worker
+on the host. When a worker exits (max_requests recycling, restarts) it
+flushes one last time (gunicorn's worker_exit hook); the next /metrics read
+folds its histograms and cache counters into METRICS_DIR/retired.json and
+deletes its file, so counters stay monotonic without the directory
+growing by one file per recycled worker.
+"""
+
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+HISTOGRAMS = {
+    # name: (help, buckets, field of RequestStats)
+    "aiu_http_request_duration_seconds": ("Wall time of API requests.", DURATION_BUCKETS, "wall"),
+    "aiu_db_queries_per_request": ("Database queries per request.", QUERY_BUCKETS, "queries"),
+    "aiu_db_duration_seconds": ("Time spent in the database per request.", DURATION_BUCKETS, "db_time"),
+    "aiu_serializer_duration_seconds": ("Time spent in DRF serializers per request.", DURATION_BUCKETS, "serializer_time"),
+}
+
+
+DB_POOL_METRICS = (
+    # name, type, help, ((state label or None, field of pool_stats), ...) - summed over workers
+    ("aiu_db_pool_connections", "gauge", "Pooled DB connections by state.", (("in_use", "in_use"), ("idle", "idle"))),
+    ("aiu_db_pool_size", "gauge", "Configured pool size, all workers.", ((None, "size"),)),
+    ("aiu_db_pool_checkouts_total", "counter", "Connections handed out by the pool.", ((None, "checkouts"),)),
+    ("aiu_db_pool_connects_total", "counter", "New connections opened by the pool.", ((None, "connects"),)),
+    ("aiu_db_pool_timeouts_total", "counter", "Checkouts that gave up waiting.", ((None, "timeouts"),)),
+    ("aiu_db_pool_health_failures_total", "counter", "Idle connections that failed their ping.", ((None, "health_failures"),)),
+    ("aiu_db_pool_wait_seconds_total", "counter", "Time spent waiting for a free connection.", ((None, "wait_seconds"),)),
+    ("aiu_db_pool_wait_seconds_max", "gauge", "Longest wait for a connection in any worker.", ((None, "wait_max"),)),
+    ("aiu_db_pool_connect_seconds_total", "counter", "Time spent opening connections.", ((None, "connect_seconds"),)),
+)
+
+
+def metrics_enabled() -> bool:
+    return bool(getattr(settings, "METRICS_ENABLED", True))
+
+
+def metrics_dir() -> str:
+    return getattr(settings, "METRICS_DIR", None) or os.path.join(tempfile.gettempdir(), "aiu_metrics")
+
+
+# ---------------- PER-REQUEST STATE ---------------- #
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "serializer_time", "serializer_depth", "wall")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.wall = 0.0
+
+
+current_stats = contextvars.ContextVar("aiu_request_stats", default=None)
+
+
+def db_wrapper(stats):
+    """connection.execute_wrapper callback that counts and times queries."""
+    def wrapper(execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats.queries += 1
+            stats.db_time += time.perf_counter() - t0
+    return wrapper
+
+
+_patched = False
+_patch_lock = threading.Lock()
+
+
+def install_serializer_timing():
+    """
+    Time BaseSerializer.data, where DRF turns instances into primitives.
+    Only the outermost .data of a request is timed, so serializers built
+    inside other serializers are not counted twice. Idempotent.
+    """
+    global _patched
+    with _patch_lock:
+        if _patched:
+            return
+        from rest_framework.serializers import BaseSerializer
+
+        original = BaseSerializer.data.fget
+
+        def timed_data(self):
+            stats = current_stats.get()
+            if stats is None:
+                return original(self)
+            stats.serializer_depth += 1
+            t0 = time.perf_counter()
+            try:
+                return original(self)
+            finally:
+                stats.serializer_depth -= 1
+                if stats.serializer_depth == 0:
+                    stats.serializer_time += time.perf_counter() - t0
+
+        BaseSerializer.data = property(timed_data)
+        _patched = True
+
+
+def endpoint_name(request, view_func):
+    """'lab-booking-list', 'cv-download-pdf', 'login' ... for the view handling this request."""
+    actions = getattr(view_func, "actions", None)
+    initkwargs = getattr(view_func, "initkwargs", None) or {}
+    if actions:
+        action = actions.get(request.method.lower())
+        if action is None and request.method == "HEAD":
+            action = actions.get("get")
+        basename = initkwargs.get("basename") or getattr(getattr(view_func, "cls", None), "__name__", "view")
+        return f"{basename}-{(action or request.method.lower()).replace('_', '-')}"
+    match = getattr(request, "resolver_match", None)
+    if match is not None and match.url_name:
+        return match.url_name
+    return getattr(view_func, "__name__", "unknown")
+
+
+# ---------------- AGGREGATION ---------------- #
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class MetricsStore:
+    """In-process aggregate for one worker, flushed to its own file."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # (metric, endpoint, method, status) -> _Histogram
+        self.last_flush = 0.0
+
+    def observe(self, endpoint, method, status_code, stats):
+        status_class = f"{status_code // 100}xx"
+        with self.lock:
+            for metric, (_help, buckets, attr) in HISTOGRAMS.items():
+                key = (metric, endpoint, method, status_class)
+                hist = self.histograms.get(key)
+                if hist is None:
+                    hist = self.histograms[key] = _Histogram(buckets)
+                hist.observe(getattr(stats, attr))
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                {"key": list(key), "counts": list(h.counts), "sum": h.sum, "count": h.count}
+                for key, h in self.histograms.items()
+            ]
+
+    def maybe_flush(self, force=False):
+        interval = float(getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0))
+        now = time.monotonic()
+        if not force and now - self.last_flush < interval:
+            return
+        self.last_flush = now
+        try:
+            from .caching import cache_stats
+            from .db.pool import pool_stats
+
+            payload = {
+                "pid": os.getpid(),
+                "written_at": time.time(),
+                "histograms": self.snapshot(),
+                "cache": cache_stats(),
+                "db_pool": pool_stats(),
+            }
+            directory = metrics_dir()
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "w") as fh:
+                json.dump(payload, fh)
+            os.replace(tmp, path)
+        except Exception:
+            # metrics must never break a request
+            pass
+
+
+store = MetricsStore()
+
+
+RETIRED_FILE = "retired.json"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # someone else's process: the pid is in use
+    return True
+
+
+def _fold_histograms(merged, histograms):
+    for h in histograms:
+        key = tuple(h["key"])
+        cur = merged.get(key)
+        if cur is None:
+            merged[key] = {"counts": list(h["counts"]), "sum": h["sum"], "count": h["count"]}
+        else:
+            cur["counts"] = [a + b for a, b in zip(cur["counts"], h["counts"])]
+            cur["sum"] += h["sum"]
+            cur["count"] += h["count"]
+
+
+def _fold_cache(totals, cache):
+    for viewset, counts in (cache or {}).get("viewsets", {}).items():
+        totals[viewset]["hits"] += counts.get("hits", 0)
+        totals[viewset]["misses"] += counts.get("misses", 0)
+
+
+def _read_retired(directory):
+    try:
+        with open(os.path.join(directory, RETIRED_FILE)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {"histograms": [], "cache": {"viewsets": {}}}
+
+
+def _retire(directory, paths):
+    """Fold the files of exited workers into RETIRED_FILE, then delete them."""
+    import fcntl
+
+    with open(os.path.join(directory, "retire.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)  # another worker may be retiring the same files
+        retired = _read_retired(directory)
+        histograms = {}
+        _fold_histograms(histograms, retired.get("histograms", []))
+        cache = defaultdict(lambda: {"hits": 0, "misses": 0})
+        _fold_cache(cache, retired.get("cache"))
+        folded = []
+        for path in paths:
+            try:
+                with open(path) as fh:
+                    payload = json.load(fh)
+            except FileNotFoundError:
+                continue  # already retired
+            except (OSError, ValueError):
+                payload = {}
+            _fold_histograms(histograms, payload.get("histograms", []))
+            _fold_cache(cache, payload.get("cache"))
+            folded.append(path)
+        if not folded:
+            return
+        retired = {
+            "written_at": time.time(),
+            "histograms": [{"key": list(key), **h} for key, h in histograms.items()],
+            "cache": {"viewsets": dict(cache)},
+        }
+        target = os.path.join(directory, RETIRED_FILE)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(retired, fh)
+        os.replace(tmp, target)
+        for path in folded:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _read_worker_files():
+    directory = metrics_dir()
+    stale_after = float(getattr(settings, "METRICS_STALE_AFTER", 7 * 24 * 3600))
+    out = []
+    dead = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return out
+    for name in names:
+        if not (name.startswith("metrics-") and name.endswith(".json")):
+            continue
+        path = os.path.join(directory, name)
+        pid = name[len("metrics-"):-len(".json")]
+        # os.kill(pid, 0) only probes on POSIX; elsewhere files just age out
+        if os.name == "posix" and pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            dead.append(path)
+            continue
+        try:
+            if time.time() - os.path.getmtime(path) > stale_after:
+                os.remove(path)
+                continue
+            with open(path) as fh:
+                out.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+    if dead:
+        try:
+            _retire(directory, dead)
+        except OSError:
+            pass
+    return out
+
+
+# ---------------- PROMETHEUS TEXT ---------------- #
+
+def _labels(**labels):
+    inner = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels.items()
+    )
+    return "{" + inner + "}"
+
+
+def _fmt(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def render_prometheus():
+    """All workers' metrics (plus login throttle and cache counters) as Prometheus text."""
+    store.maybe_flush(force=True)
+    workers = _read_worker_files()
+    retired = _read_retired(metrics_dir())
+
+    merged = {}
+    for w in [retired, *workers]:
+        _fold_histograms(merged, w.get("histograms", []))
+
+    lines = []
+    by_metric = defaultdict(list)
+    for key, h in sorted(merged.items()):
+        by_metric[key[0]].append((key, h))
+
+    for metric, (help_text, buckets, _attr) in HISTOGRAMS.items():
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for (_m, endpoint, method, status_class), h in by_metric.get(metric, []):
+            base = dict(endpoint=endpoint, method=method, status=status_class)
+            cumulative = 0
+            for bound, n in zip(buckets, h["counts"]):
+                cumulative += n
+                lines.append(f"{metric}_bucket{_labels(**base, le=_fmt(float(bound)))} {cumulative}")
+            lines.append(f"{metric}_bucket{_labels(**base, le='+Inf')} {h['count']}")
+            lines.append(f"{metric}_sum{_labels(**base)} {_fmt(float(h['sum']))}")
+            lines.append(f"{metric}_count{_labels(**base)} {h['count']}")
+
+    cache_totals = defaultdict(lambda: {"hits": 0, "misses": 0})
+    for w in [retired, *workers]:
+        _fold_cache(cache_totals, w.get("cache"))
+    lines.append("# HELP aiu_viewset_cache_requests_total Viewset response cache lookups.")
+    lines.append("# TYPE aiu_viewset_cache_requests_total counter")
+    for viewset, counts in sorted(cache_totals.items()):
+        for result, field in (("hit", "hits"), ("miss", "misses")):
+            lines.append(f"aiu_viewset_cache_requests_total{_labels(viewset=viewset, result=result)} {counts[field]}")
+
+    try:
+        from .throttles import login_throttle_stats
+
+        throttle = login_throttle_stats()
+    except Exception:
+        throttle = {}
+    lines.append("# HELP aiu_login_throttle_rejected_total Login attempts rejected by the admission throttle.")
+    lines.append("# TYPE aiu_login_throttle_rejected_total counter")
+    for scope, info in sorted(throttle.items()):
+        lines.append(f"aiu_login_throttle_rejected_total{_labels(scope=scope)} {info.get('rejected', 0)}")
+
+    pools = defaultdict(lambda: defaultdict(float))
+    for w in workers:
+        for alias, p in (w.get("db_pool") or {}).items():
+            for k, v in p.items():
+                pools[alias][k] = max(pools[alias][k], v) if k == "wait_max" else pools[alias][k] + v
+    for metric, kind, help_text, fields in DB_POOL_METRICS:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for alias, p in sorted(pools.items()):
+            for label, field in fields:
+                labels = _labels(alias=alias, state=label) if label else _labels(alias=alias)
+                lines.append(f"{metric}{labels} {_fmt(p[field])}")
+
+    lines.append("# HELP aiu_metrics_workers Worker processes that reported metrics.")
+    lines.append("# TYPE aiu_metrics_workers gauge")
+    lines.append(f"aiu_metrics_workers {len(workers)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,310 @@
+"""
+HTTP middleware for the api app.
+"""
+
+import gzip
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from .db_router import SAFE_METHODS, choose_read_alias, mark_wrote, replica_aliases, request_user_id, use_read_alias
+from .metrics import (
+    RequestStats, current_stats, db_wrapper, endpoint_name, install_serializer_timing,
+    metrics_enabled, store,
+)
+from .nplusone import detect_n_plus_one, nplusone_enabled
+from .profiling import (
+    is_staff_request, new_profile_id, profiling_enabled, requested_mode, save_profile, start_profiler, stop_profiler,
+)
+from .tracing import (
+    current_trace, db_span_wrapper, install_tracing_hooks, should_keep, start_trace, tracing_enabled,
+    write_trace,
+)
+
+try:
+    import brotli
+except ImportError:  # optional: brotli or brotlicffi
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+# ---------------- RESPONSE COMPRESSION ---------------- #
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "text/",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def parse_accept_encoding(header):
+    """{'gzip': 1.0, 'br': 0.8, ...} from an Accept-Encoding header (q=0 means refused)."""
+    out = {}
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        out[token] = q
+    return out
+
+
+def choose_encoding(header, brotli_available=None):
+    """'br', 'gzip' or None for the given Accept-Encoding."""
+    if brotli_available is None:
+        brotli_available = brotli is not None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+
+    def ok(name):
+        return accepted.get(name, wildcard) > 0
+
+    if brotli_available and ok("br"):
+        return "br"
+    if ok("gzip"):
+        return "gzip"
+    return None
+
+
+def compress(content, encoding):
+    if encoding == "br":
+        return brotli.compress(content, quality=getattr(settings, "BROTLI_QUALITY", 5))
+    # mtime=0 keeps the output identical for identical content
+    return gzip.compress(content, compresslevel=getattr(settings, "GZIP_LEVEL", 6), mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Brotli/gzip for text-like responses of at least COMPRESSION_MIN_SIZE bytes,
+    picked from the client's Accept-Encoding. Small bodies, binary files
+    (images, PDFs, QR codes), streaming and already-encoded responses pass
+    through untouched.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        content_type = (response.get("Content-Type") or "").lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        min_size = getattr(settings, "COMPRESSION_MIN_SIZE", 1024)
+        if len(response.content) < min_size:
+            return response
+
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # the bytes differ from the uncompressed representation
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
+
+
+# ---------------- METRICS ---------------- #
+
+class MetricsMiddleware:
+    """
+    Records wall time, DB queries, DB time and serializer time per request
+    (see api.metrics) and reports them in a Server-Timing header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if metrics_enabled():
+            install_serializer_timing()
+
+    def __call__(self, request):
+        if not metrics_enabled():
+            return self.get_response(request)
+
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        t0 = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(db_wrapper(stats)))
+                response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        stats.wall = time.perf_counter() - t0
+
+        endpoint = getattr(request, "_metrics_endpoint", None) or "unmatched"
+        store.observe(endpoint, request.method, response.status_code, stats)
+
+        response["Server-Timing"] = (
+            f"app;dur={stats.wall * 1000:.1f}, "
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+            f"serializer;dur={stats.serializer_time * 1000:.1f}"
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_endpoint = endpoint_name(request, view_func)
+        return None
+
+
+# ---------------- N+1 DETECTION ---------------- #
+
+class NPlusOneMiddleware:
+    """
+    Flags query shapes repeated more than NPLUSONE_THRESHOLD times in one
+    request (see api.nplusone). On by default in DEBUG and under the test runner.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not nplusone_enabled():
+            return self.get_response(request)
+        with detect_n_plus_one(label=f"{request.method} {request.path}"):
+            return self.get_response(request)
+
+
+# ---------------- TRACING ---------------- #
+
+class TracingMiddleware:
+    """
+    Records a span tree per request (see api.tracing) and writes sampled or
+    slow traces to TRACING_DIR. Kept traces get an X-Trace-Id header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if tracing_enabled():
+            install_tracing_hooks()
+
+    def __call__(self, request):
+        if not tracing_enabled():
+            return self.get_response(request)
+
+        with start_trace(f"{request.method} {request.path}") as trace:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(db_span_wrapper))
+                response = self.get_response(request)
+
+        if should_keep(trace):
+            write_trace(trace.to_record(
+                method=request.method,
+                path=request.path,
+                endpoint=getattr(request, "_metrics_endpoint", None) or "unmatched",
+                status=response.status_code,
+                sampled_by="rate" if trace.sampled else "slow",
+            ))
+            response["X-Trace-Id"] = trace.trace_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if current_trace() is not None and getattr(request, "_metrics_endpoint", None) is None:
+            request._metrics_endpoint = endpoint_name(request, view_func)
+        return None
+
+
+# ---------------- PROFILING ---------------- #
+
+class ProfilingMiddleware:
+    """
+    Profiles a staff request from its view onwards when it asks for it
+    (X-Profile / ?_profile=, see api.profiling) and returns X-Profile-Id.
+    Goes after AuthenticationMiddleware so session staff are recognised;
+    starting at process_view keeps Django's middleware recursion out of
+    the call graph.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested_mode(request)
+        if mode is None or not profiling_enabled() or not is_staff_request(request):
+            return self.get_response(request)
+
+        request._profile_mode = mode
+        response = self.get_response(request)
+        profiler = getattr(request, "_profiler", None)
+        if profiler is None:  # no view was resolved
+            return response
+        stop_profiler(profiler)
+
+        profile_id = new_profile_id()
+        user = getattr(request, "user", None)
+        save_profile(profile_id, profiler, {
+            "mode": mode,
+            "method": request.method,
+            "path": request.path,
+            "query": request.META.get("QUERY_STRING", ""),
+            "endpoint": getattr(request, "_metrics_endpoint", None) or "unmatched",
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - request._profile_t0) * 1000, 3),
+            "user": getattr(user, "username", "") if user is not None and user.is_authenticated else "",
+            "created": time.time(),
+        })
+        response["X-Profile-Id"] = profile_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        mode = getattr(request, "_profile_mode", None)
+        if mode is not None:
+            request._profile_t0 = time.perf_counter()
+            request._profiler = start_profiler(mode)
+        return None
+
+
+# ---------------- READ REPLICAS ---------------- #
+
+class ReplicaRoutingMiddleware:
+    """
+    Chooses where a request's reads go (see api.db_router) and makes the
+    user's following reads stick to the primary after a write.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_aliases():
+            return self.get_response(request)
+
+        alias = choose_read_alias(request)
+        with use_read_alias(alias):
+            response = self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            # DRF puts the authenticated user on the Django request as well
+            user = getattr(request, "user", None)
+            mark_wrote(user.pk if user is not None and user.is_authenticated else request_user_id(request))
+        response["X-DB-Read"] = alias or "primary"
+        return response
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_equipment_quantity_under_maintenance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('field', models.CharField(max_length=20)),
+                ('weight', models.FloatField(default=1.0)),
+                ('cv', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='api.cv')),
+            ],
+            options={
+                'db_table': 'cv_search_terms',
+                'indexes': [models.Index(fields=['term', 'cv'], name='cv_search_t_term_4a58de_idx')],
+            },
+        ),
+    ]
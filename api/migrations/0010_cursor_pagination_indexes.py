@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_cvsearchterm'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipmentrental',
+            index=models.Index(fields=['created_at', 'id'], name='api_equipme_created_114f92_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipmentrental',
+            index=models.Index(fields=['student', 'created_at', 'id'], name='api_equipme_student_81b771_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='labbooking',
+            index=models.Index(fields=['created_at', 'id'], name='lab_booking_created_c61d07_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='labbooking',
+            index=models.Index(fields=['student', 'created_at', 'id'], name='lab_booking_student_b7e58a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['created_at', 'id'], name='student_pro_created_ce177b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at', 'id'], name='users_created_1b562c_idx'),
+        ),
+    ]
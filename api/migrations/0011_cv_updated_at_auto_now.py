@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cv',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -3,10 +3,10 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 
-import qrcode
-from io import BytesIO
-from django.core.files import File
-from PIL import Image
+from django.core.files.base import ContentFile
+
+from .qr import qr_png
+from .tracing import span
 
 
 class User(AbstractUser):
@@ -25,6 +25,9 @@ class User(AbstractUser):
     class Meta:
         db_table = 'users'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.username})"
@@ -63,6 +66,9 @@ class StudentProfile(models.Model):
     class Meta:
         db_table = 'student_profiles'
         ordering = ['student_id']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.student_id} - {self.user.get_full_name()}"
@@ -227,6 +233,9 @@ class LabBooking(models.Model):
         indexes = [
             models.Index(fields=['lab', 'booking_date', 'time_slot', 'imac_number']),
             models.Index(fields=['student', 'booking_date', 'time_slot']),
+            # cursor pagination: ORDER BY -created_at, -id (all / per student)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['student', 'created_at', 'id']),
         ]
 
     def __str__(self):
@@ -267,6 +276,9 @@ class Equipment(models.Model):
         ('damaged', 'Damaged'),
     )
 
+    # rental statuses that hold a unit
+    RENTED_STATUSES = ('approved', 'active', 'overdue')
+
     name = models.CharField(max_length=255)
     description = models.TextField()
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)  # keep for backward-compat
@@ -308,10 +320,14 @@ class Equipment(models.Model):
         """
         Each approved/active/overdue rental counts as 1 unit (because rental has no quantity field).
         IMPORTANT: When creating Equipment (no PK yet), reverse relation can't be used -> return 0.
+        Querysets annotated with `rented_count` (EquipmentViewSet) skip the COUNT query.
         """
         if not self.pk:
             return 0
-        return self.rentals.filter(status__in=['approved', 'active', 'overdue']).count()
+        annotated = getattr(self, "rented_count", None)
+        if annotated is not None:
+            return int(annotated)
+        return self.rentals.filter(status__in=self.RENTED_STATUSES).count()
 
     @property
     def computed_available(self) -> int:
@@ -377,16 +393,11 @@ class Equipment(models.Model):
 
         # QR generation unchanged
         if not self.qr_code and self.equipment_id:
-            qr = qrcode.QRCode(version=1, box_size=10, border=5)
-            qr.add_data(self.equipment_id)
-            qr.make(fit=True)
-
-            img = qr.make_image(fill_color="black", back_color="white")
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-
             file_name = f'qr_{self.equipment_id}.png'
-            self.qr_code.save(file_name, File(buffer), save=False)
+            with span("qr.render", "render"):
+                png = qr_png(self.equipment_id)
+            with span("file.write", "io", file=file_name, size=len(png)):
+                self.qr_code.save(file_name, ContentFile(png), save=False)
 
         super().save(*args, **kwargs)
 
@@ -440,6 +451,13 @@ class EquipmentRental(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # cursor pagination: ORDER BY -created_at, -id (all / per student)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['student', 'created_at', 'id']),
+        ]
+
 
 class EquipmentRequest(models.Model):
     STATUS_CHOICES = (
@@ -549,7 +567,8 @@ class CV(models.Model):
     admin_comment = models.TextField(blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now_add=True)
+    # also moved by edits to any section (see signals.py), so it dates the whole CV
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'cvs'
@@ -701,3 +720,21 @@ class Award(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class CVSearchTerm(models.Model):
+    """Inverted index posting for CV talent search: one row per (cv, field, term)."""
+    cv = models.ForeignKey(CV, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=64)
+    field = models.CharField(max_length=20)  # skill / project / experience / certification / summary
+    weight = models.FloatField(default=1.0)  # field weight x term frequency
+
+    class Meta:
+        db_table = 'cv_search_terms'
+        indexes = [
+            # term lookups and prefix (LIKE 'abc%') scans
+            models.Index(fields=['term', 'cv']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> CV {self.cv_id} ({self.field})"
@@ -0,0 +1,161 @@
+"""
+N+1 query detector.
+
+Every SQL statement run while detection is active is reduced to its shape
+(literals and IN-lists collapsed). When one shape repeats more than
+NPLUSONE_THRESHOLD times within a request (or a detect_n_plus_one() block)
+the first project frame that issued it is reported: logged, or raised as
+NPlusOneError when NPLUSONE_RAISE is on (the test runner turns it on, so
+regressions fail the build).
+
+    NPLUSONE_ENABLED    run the middleware (default: DEBUG)
+    NPLUSONE_THRESHOLD  allowed repeats of one shape (default 5)
+    NPLUSONE_RAISE      raise instead of logging
+    NPLUSONE_IGNORE     regexes of SQL shapes to ignore
+
+Code that repeats a query on purpose can wrap it in allow_n_plus_one().
+"""
+
+import contextvars
+import logging
+import os
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger("api.nplusone")
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+_IN_LIST_RE = re.compile(r"\bIN \((?:%s, )*%s\)", re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WS_RE = re.compile(r"\s+")
+
+
+def query_shape(sql):
+    """SQL with parameters, literals and IN-list lengths normalised away."""
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _WS_RE.sub(" ", sql).strip()
+
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+# project frames that only wrap the real caller
+_WRAPPER_FILES = {os.path.join(_THIS_DIR, name) for name in ("nplusone.py", "metrics.py", "middleware.py")}
+_ORM_DIR = os.sep + os.path.join("django", "db") + os.sep
+
+
+def _frame_label(frame, path, base):
+    if path.startswith(base) and "site-packages" not in path:
+        path = os.path.relpath(path, base)
+    return f"{path}:{frame.lineno} in {frame.name}"
+
+
+def call_site():
+    """
+    Innermost project frame behind the current query, e.g.
+    'api/views.py:850 in get_queryset', followed by the library frame that
+    touched the ORM when that is somewhere else:
+    'api/views.py:120 in list (via rest_framework/fields.py:97 in get_attribute)'.
+    """
+    base = str(settings.BASE_DIR)
+    library = None
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        path = os.path.abspath(frame.filename)
+        if path in _WRAPPER_FILES:
+            continue
+        in_project = path.startswith(base) and "site-packages" not in path
+        if in_project:
+            site = _frame_label(frame, path, base)
+            return f"{site} (via {library})" if library else site
+        if library is None and _ORM_DIR not in path:
+            library = _frame_label(frame, path.split("site-packages" + os.sep)[-1], base)
+    return library or "unknown"
+
+
+class QueryShapeTracker:
+    """connection.execute_wrapper that counts query shapes and flags repeats."""
+
+    def __init__(self, threshold=None, raise_errors=None, label=""):
+        self.threshold = int(threshold if threshold is not None else getattr(settings, "NPLUSONE_THRESHOLD", 5))
+        self.raise_errors = bool(raise_errors if raise_errors is not None else getattr(settings, "NPLUSONE_RAISE", False))
+        self.ignore = [re.compile(p) for p in getattr(settings, "NPLUSONE_IGNORE", ())]
+        self.label = label
+        self.counts = Counter()
+        self.violations = {}  # shape -> call site
+        self.paused = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not self.paused:
+            self._track(sql)
+        return execute(sql, params, many, context)
+
+    def _track(self, sql):
+        shape = query_shape(sql)
+        self.counts[shape] += 1
+        if self.counts[shape] != self.threshold + 1 or shape in self.violations:
+            return
+        if any(p.search(shape) for p in self.ignore):
+            return
+        site = call_site()
+        self.violations[shape] = site
+        if self.raise_errors:
+            raise NPlusOneError(
+                f"N+1 query{' in ' + self.label if self.label else ''}: the same query ran more than "
+                f"{self.threshold} times, from {site}\n    {shape}"
+            )
+
+    def report(self):
+        """Log every repeated shape with its final count."""
+        for shape, site in self.violations.items():
+            logger.warning(
+                "N+1 query%s: %d x from %s\n    %s",
+                f" in {self.label}" if self.label else "", self.counts[shape], site, shape,
+            )
+
+
+_current = contextvars.ContextVar("aiu_nplusone_tracker", default=None)
+
+
+@contextmanager
+def detect_n_plus_one(threshold=None, raise_errors=None, label=""):
+    """Track query shapes inside the block on every database connection."""
+    tracker = QueryShapeTracker(threshold=threshold, raise_errors=raise_errors, label=label)
+    token = _current.set(tracker)
+    try:
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(tracker))
+            yield tracker
+    finally:
+        _current.reset(token)
+    if not tracker.raise_errors:
+        tracker.report()
+
+
+@contextmanager
+def allow_n_plus_one():
+    """Suspend detection for code that repeats a query on purpose."""
+    tracker = _current.get()
+    if tracker is None:
+        yield
+        return
+    tracker.paused += 1
+    try:
+        yield
+    finally:
+        tracker.paused -= 1
+
+
+def nplusone_enabled() -> bool:
+    return bool(getattr(settings, "NPLUSONE_ENABLED", settings.DEBUG))
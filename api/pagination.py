@@ -0,0 +1,190 @@
+"""
+API pagination.
+
+HybridPagination keeps the page-number format existing clients use, and adds
+an opt-in keyset (cursor) mode for the large, ever-growing lists. Cursor mode
+never runs COUNT(*) and never uses OFFSET over earlier pages, so page 500
+costs the same as page 1.
+
+    GET /api/lab-bookings/?pagination=cursor          first page
+    GET /api/lab-bookings/?cursor=<next from before>  following pages
+    ...&count=approx                                  add an estimated total
+    ...&count=exact                                   add an exact total (slow on big tables)
+
+Cursor mode is only available on viewsets that declare `cursor_ordering`
+(a stable ordering of non-null columns ending in a unique one, backed by an
+index); elsewhere the parameters are ignored. A cursor holds the value of
+every ordering column of its boundary row, so rows that tie on created_at
+page correctly in both directions (DRF's CursorPagination keys on the first
+column only and skips ties with offsets, which loses rows going backwards).
+"""
+
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+APPROX_COUNT_CAP = 10000
+
+
+def _json_value(value):
+    # full precision: DjangoJSONEncoder would cut datetimes to milliseconds
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _table_row_estimate(model, using):
+    """Row estimate from the database statistics (no table scan), or None."""
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "mysql":
+                cursor.execute(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    [table],
+                )
+            elif connection.vendor == "postgresql":
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except Exception:
+        return None
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def approximate_count(queryset, cap=APPROX_COUNT_CAP):
+    """
+    (count, is_approximate) in bounded time.
+    Unfiltered big tables use the table statistics; anything else counts at
+    most cap + 1 rows and reports "cap" as approximate beyond that.
+    """
+    if not queryset.query.where:
+        estimate = _table_row_estimate(queryset.model, queryset.db)
+        if estimate is not None and estimate > cap:
+            return estimate, True
+
+    n = queryset.order_by()[:cap + 1].count()
+    if n > cap:
+        return cap, True
+    return n, False
+
+
+class KeysetCursorPagination(CursorPagination):
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, "cursor_ordering", None) or self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = (request.query_params.get("count") or "").strip().lower()
+        self.total = None
+        if self.count_mode == "exact":
+            self.total = (queryset.count(), False)
+        elif self.count_mode == "approx":
+            self.total = approximate_count(queryset)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [queryset.model._meta.get_field(key.lstrip("-")) for key in self.ordering]
+
+        self.cursor = self.decode_cursor(request)
+        reverse, position = (False, None) if self.cursor is None else (self.cursor.reverse, self.cursor.position)
+        ordering = [key[1:] if key.startswith("-") else "-" + key for key in self.ordering] if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._beyond(self._decode_position(position), ordering))
+        rows = list(queryset[:self.page_size + 1])
+        self.page = rows[:self.page_size]
+        more = len(rows) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, more
+        else:
+            self.has_next, self.has_previous = more, position is not None
+        return self.page
+
+    def _beyond(self, values, ordering):
+        """Rows after `values` in `ordering` (a row-value comparison spelled out as ORs)."""
+        condition = Q()
+        for i, key in enumerate(ordering):
+            step = Q(**{f"{key.lstrip('-')}__{'lt' if key.startswith('-') else 'gt'}": values[i]})
+            for prev_key, prev_value in zip(ordering[:i], values[:i]):
+                step &= Q(**{prev_key.lstrip("-"): prev_value})
+            condition |= step
+        return condition
+
+    def _encode_position(self, obj):
+        return json.dumps([f.value_from_object(obj) for f in self.fields], default=_json_value)
+
+    def _decode_position(self, position):
+        try:
+            raw = json.loads(position)
+            if not isinstance(raw, list) or len(raw) != len(self.fields):
+                raise ValueError(position)
+            return [f.to_python(v) for f, v in zip(self.fields, raw)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._encode_position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._encode_position(self.page[0])))
+
+    def get_paginated_response(self, data):
+        body = OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+        ])
+        if self.total is not None:
+            body["count"], body["count_is_approximate"] = self.total
+        body["results"] = data
+        return Response(body)
+
+
+class HybridPagination(PageNumberPagination):
+    """Page numbers by default; keyset pages with ?cursor= or ?pagination=cursor."""
+
+    cursor_class = KeysetCursorPagination
+    # same ?page_size= as the keyset pages
+    page_size_query_param = KeysetCursorPagination.page_size_query_param
+    max_page_size = KeysetCursorPagination.max_page_size
+
+    def _wants_cursor(self, request, view):
+        if not getattr(view, "cursor_ordering", None):
+            return False
+        params = request.query_params
+        return "cursor" in params or (params.get("pagination") or "").lower() == "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self._wants_cursor(request, view):
+            self.cursor_paginator = self.cursor_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if getattr(self, "cursor_paginator", None) is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
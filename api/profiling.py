@@ -0,0 +1,304 @@
+"""
+On-demand request profiling for staff.
+
+A staff user (session or JWT) adds "X-Profile: 1" or "?_profile=1" to any
+request and ProfilingMiddleware (api.middleware) runs its view (and the
+response rendering) under cProfile; "sample" instead of "1" uses a stack
+sampler, which gives exact stacks for flamegraphs at lower overhead. The
+profile is stored in PROFILING_DIR and its id returned in X-Profile-Id.
+
+    GET /api/profiles/                    recent profiles
+    GET /api/profiles/<id>/               metadata and the top functions
+    GET /api/profiles/<id>/pstats/        for python -m pstats / snakeviz
+    GET /api/profiles/<id>/collapsed/     for flamegraph.pl / speedscope
+
+Requests without the flag only pay for a header and query-string lookup.
+Only the newest PROFILING_KEEP profiles are kept.
+"""
+
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+
+HEADER = "HTTP_X_PROFILE"
+QUERY_PARAM = "_profile"
+MODES = {"1": "cprofile", "true": "cprofile", "cprofile": "cprofile", "sample": "sample"}
+
+_ID_RE = re.compile(r"^[0-9]{14}-[0-9a-f]{8}$")
+
+
+def profiling_enabled() -> bool:
+    return bool(getattr(settings, "PROFILING_ENABLED", True))
+
+
+def profiles_dir() -> str:
+    return getattr(settings, "PROFILING_DIR", None) or os.path.join(tempfile.gettempdir(), "aiu_profiles")
+
+
+def requested_mode(request):
+    """'cprofile', 'sample' or None from the X-Profile header or ?_profile=."""
+    value = request.META.get(HEADER)
+    if value is None:
+        if QUERY_PARAM not in request.META.get("QUERY_STRING", ""):
+            return None
+        value = request.GET.get(QUERY_PARAM)
+    return MODES.get((value or "").strip().lower())
+
+
+def is_staff_request(request) -> bool:
+    """Session user or JWT bearer is staff/admin."""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        try:
+            from .authentication import CachedJWTAuthentication
+
+            result = CachedJWTAuthentication().authenticate(request)
+        except Exception:
+            result = None
+        user = result[0] if result else None
+    return bool(
+        user is not None and user.is_authenticated
+        and (user.is_staff or getattr(user, "user_type", "") == "admin")
+    )
+
+
+# ---------------- PROFILERS ---------------- #
+
+def _label(filename, lineno, funcname):
+    if filename == "~":  # built-ins
+        return funcname.replace(";", ":")
+    base = str(settings.BASE_DIR)
+    if filename.startswith(base) and "site-packages" not in filename:
+        filename = os.path.relpath(filename, base)
+    else:
+        filename = filename.split("site-packages" + os.sep)[-1]
+    return f"{funcname} ({filename}:{lineno})".replace(";", ":")
+
+
+# sys.setswitchinterval is process-wide: overlapping samplers (gthread workers)
+# share one lowered value, and the original comes back when the last one stops
+_switch_lock = threading.Lock()
+_switch_users = 0
+_switch_original = None
+
+
+def _lower_switch_interval(interval):
+    global _switch_users, _switch_original
+    with _switch_lock:
+        if _switch_users == 0:
+            _switch_original = sys.getswitchinterval()
+        _switch_users += 1
+        sys.setswitchinterval(min(sys.getswitchinterval(), interval))
+
+
+def _restore_switch_interval():
+    global _switch_users, _switch_original
+    with _switch_lock:
+        _switch_users = max(_switch_users - 1, 0)
+        if _switch_users == 0 and _switch_original is not None:
+            sys.setswitchinterval(_switch_original)
+            _switch_original = None
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds into collapsed-stack counts."""
+
+    def __init__(self, interval=None):
+        self.interval = float(interval if interval is not None else getattr(settings, "PROFILING_SAMPLE_INTERVAL", 0.001))
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="aiu-profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_label(code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        # the sampler needs the GIL to take a sample; hand it over at least as often
+        _lower_switch_interval(self.interval)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        _restore_switch_interval()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in sorted(self.stacks.items()))
+
+
+def pstats_to_collapsed(stats, min_us=10, max_recursion=3):
+    """
+    Collapsed stacks ("a;b;c <microseconds>") rebuilt from cProfile's
+    caller/callee edges. cProfile keeps no full stacks, so time reached
+    through a function called from several places is split in proportion
+    to each edge; paths under `min_us` are dropped. The profiler starts at
+    the view, so the roots are the view and what it calls.
+    """
+    entries = stats.stats  # func -> (cc, nc, tt, ct, callers{caller: (cc, nc, tt, ct)})
+    callees = defaultdict(dict)
+    for func, (_cc, _nc, _tt, _ct, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+
+    out = Counter()
+
+    def walk(func, share, stack, on_path):
+        _cc, _nc, tt, ct, _callers = entries[func]
+        stack = stack + [_label(*func)]
+        scale = share / ct if ct else 0.0
+        own = tt * scale * 1e6
+        if own >= 1:
+            out[";".join(stack)] += own
+        for callee, edge_ct in callees.get(func, {}).items():
+            part = edge_ct * scale
+            # recursion (nested serializers) is followed a little way, not forever
+            if on_path[callee] >= max_recursion or callee not in entries or part * 1e6 < min_us:
+                continue
+            walk(callee, part, stack, on_path + Counter([callee]))
+
+    for func, (_cc, _nc, _tt, ct, callers) in entries.items():
+        if not callers:
+            walk(func, ct, [], Counter([func]))
+    return "".join(f"{stack} {int(us)}\n" for stack, us in sorted(out.items()) if int(us) > 0)
+
+
+def start_profiler(mode):
+    """A running cProfile.Profile or StackSampler; stop it with stop_profiler()."""
+    if mode == "sample":
+        profiler = StackSampler()
+        profiler.start()
+    else:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+
+def stop_profiler(profiler):
+    if isinstance(profiler, StackSampler):
+        profiler.stop()
+    else:
+        profiler.disable()
+
+
+# ---------------- STORAGE ---------------- #
+
+def new_profile_id() -> str:
+    return time.strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:8]
+
+
+def _path(profile_id, ext):
+    if not _ID_RE.match(profile_id or ""):
+        raise FileNotFoundError(profile_id)
+    return os.path.join(profiles_dir(), f"{profile_id}.{ext}")
+
+
+def save_profile(profile_id, profiler, meta):
+    """Write the profile (.prof or .collapsed) and its metadata, then prune old ones."""
+    try:
+        os.makedirs(profiles_dir(), exist_ok=True)
+        if isinstance(profiler, StackSampler):
+            with open(_path(profile_id, "collapsed"), "w") as fh:
+                fh.write(profiler.collapsed())
+            meta["formats"] = ["collapsed"]
+            meta["samples"] = sum(profiler.stacks.values())
+        else:
+            profiler.dump_stats(_path(profile_id, "prof"))
+            meta["formats"] = ["pstats", "collapsed"]
+        with open(_path(profile_id, "json"), "w") as fh:
+            json.dump(dict(meta, id=profile_id), fh)
+        _prune()
+    except Exception:
+        # profiling must never break the request it profiled
+        pass
+
+
+def _prune():
+    keep = int(getattr(settings, "PROFILING_KEEP", 50))
+    ids = [p["id"] for p in list_profiles()]
+    for profile_id in ids[keep:]:
+        for ext in ("json", "prof", "collapsed"):
+            try:
+                os.remove(_path(profile_id, ext))
+            except OSError:
+                pass
+
+
+def list_profiles():
+    """Metadata of stored profiles, newest first."""
+    out = []
+    try:
+        names = os.listdir(profiles_dir())
+    except FileNotFoundError:
+        return out
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(profiles_dir(), name)) as fh:
+                out.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+    out.sort(key=lambda p: p.get("id", ""), reverse=True)
+    return out
+
+
+def load_meta(profile_id):
+    with open(_path(profile_id, "json")) as fh:
+        return json.load(fh)
+
+
+def load_stats(profile_id):
+    import pstats
+
+    return pstats.Stats(_path(profile_id, "prof"))
+
+
+def read_pstats(profile_id) -> bytes:
+    with open(_path(profile_id, "prof"), "rb") as fh:
+        return fh.read()
+
+
+def read_collapsed(profile_id) -> str:
+    try:
+        with open(_path(profile_id, "collapsed")) as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return pstats_to_collapsed(load_stats(profile_id))
+
+
+def top_functions(profile_id, limit=30):
+    """[{function, calls, tottime_ms, cumtime_ms}] by cumulative time (cProfile profiles only)."""
+    try:
+        stats = load_stats(profile_id)
+    except FileNotFoundError:
+        return []
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            "function": _label(*func),
+            "calls": nc,
+            "tottime_ms": round(tt * 1000, 3),
+            "cumtime_ms": round(ct * 1000, 3),
+        }
+        for func, (_cc, nc, tt, ct, _callers) in rows
+    ]
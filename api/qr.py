@@ -0,0 +1,19 @@
+"""
+QR code images for equipment labels.
+"""
+
+from io import BytesIO
+
+
+def qr_png(data: str) -> bytes:
+    """PNG bytes of a QR code encoding `data` (version 1, 10px boxes, 5-box border)."""
+    import qrcode  # pulls in PIL; only equipment saves need it, not worker boot
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
@@ -0,0 +1,40 @@
+"""
+JSON renderer backed by orjson when it is installed.
+
+Output matches DRF's JSONRenderer (compact, UTF-8): anything orjson does not
+handle natively (datetimes, Decimal, lazy strings, querysets...) is passed to
+DRF's own encoder, so values come out exactly as before. Without orjson, or
+when an indented response is requested, DRF's renderer is used unchanged.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+_drf_encoder = JSONEncoder()
+
+
+def _default(obj):
+    return _drf_encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type or "", renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return orjson.dumps(
+                data,
+                default=_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            # e.g. integers beyond 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
@@ -3,14 +3,16 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db import transaction
+from .caching import bump_versions_on_commit
 from .models import *
+from .sparse_fields import SparseFieldsMixin
 
 User = get_user_model()
 
 
 # ---------------- USERS / PROFILES ---------------- #
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
@@ -26,10 +28,13 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     full_name = serializers.SerializerMethodField()
 
+    # read by get_full_name (see SparseFieldsMixin)
+    sparse_extra_sources = {'full_name': 'user'}
+
     class Meta:
         model = StudentProfile
         fields = '__all__'
@@ -39,10 +44,13 @@ class StudentProfileSerializer(serializers.ModelSerializer):
         return obj.user.get_full_name()
 
 
-class AdminProfileSerializer(serializers.ModelSerializer):
+class AdminProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     full_name = serializers.SerializerMethodField()
 
+    # read by get_full_name (see SparseFieldsMixin)
+    sparse_extra_sources = {'full_name': 'user'}
+
     class Meta:
         model = AdminProfile
         fields = '__all__'
@@ -97,7 +105,7 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 # ---------------- TUTORIALS ---------------- #
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tutorial_count = serializers.SerializerMethodField()
 
     class Meta:
@@ -105,10 +113,13 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_tutorial_count(self, obj):
+        annotated = getattr(obj, 'active_tutorial_count', None)
+        if annotated is not None:
+            return annotated
         return obj.tutorials.filter(is_active=True).count()
 
 
-class TutorialSerializer(serializers.ModelSerializer):
+class TutorialSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     category_color = serializers.CharField(source='category.color', read_only=True)
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
@@ -138,7 +149,7 @@ class TutorialSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class TutorialProgressSerializer(serializers.ModelSerializer):
+class TutorialProgressSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tutorial_title = serializers.CharField(source='tutorial.title', read_only=True)
 
     class Meta:
@@ -187,7 +198,7 @@ class TutorialProgressSerializer(serializers.ModelSerializer):
 
 # ---------------- LABS ---------------- #
 
-class LabSerializer(serializers.ModelSerializer):
+class LabSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     facilities_list = serializers.SerializerMethodField()
 
     class Meta:
@@ -198,7 +209,7 @@ class LabSerializer(serializers.ModelSerializer):
         return [f.strip() for f in obj.facilities.split(',')] if obj.facilities else []
 
 
-class LabBookingSerializer(serializers.ModelSerializer):
+class LabBookingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     lab = serializers.PrimaryKeyRelatedField(queryset=Lab.objects.all(), required=False, allow_null=True)
     booking_date = serializers.DateField(required=False, allow_null=True)
     start_time = serializers.TimeField(required=False, allow_null=True)
@@ -209,6 +220,9 @@ class LabBookingSerializer(serializers.ModelSerializer):
     lab_room = serializers.CharField(write_only=True, required=False, allow_blank=True)
     date = serializers.DateField(write_only=True, required=False, allow_null=True)
 
+    # added in to_representation (see SparseFieldsMixin)
+    sparse_extra_sources = {'lab_room': 'lab.name', 'date': 'booking_date'}
+
     # read-only helpers
     lab_name = serializers.CharField(source='lab.name', read_only=True)
     student_name = serializers.CharField(source='student.get_full_name', read_only=True)
@@ -327,21 +341,23 @@ class LabBookingSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        data['lab_room'] = instance.lab.name if instance.lab else None
-        data['date'] = instance.booking_date.isoformat() if instance.booking_date else None
+        if self.wants_field('lab_room'):
+            data['lab_room'] = instance.lab.name if instance.lab else None
+        if self.wants_field('date'):
+            data['date'] = instance.booking_date.isoformat() if instance.booking_date else None
         return data
 
 
 # ---------------- EQUIPMENT ---------------- #
 
-class EquipmentCategorySerializer(serializers.ModelSerializer):
+class EquipmentCategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = EquipmentCategory
         fields = '__all__'
         read_only_fields = ['id', 'created_at']
 
 
-class EquipmentSerializer(serializers.ModelSerializer):
+class EquipmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # ✅ read-only categories objects
     categories = EquipmentCategorySerializer(many=True, read_only=True)
 
@@ -484,7 +500,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
         return obj
 
 
-class EquipmentRentalSerializer(serializers.ModelSerializer):
+class EquipmentRentalSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     equipment_name = serializers.CharField(source='equipment.name', read_only=True)
     equipment_id = serializers.CharField(source='equipment.equipment_id', read_only=True)
 
@@ -516,7 +532,7 @@ class EquipmentRentalSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class EquipmentRequestItemSerializer(serializers.ModelSerializer):
+class EquipmentRequestItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     equipment = serializers.PrimaryKeyRelatedField(queryset=Equipment.objects.all(), required=False)
     equipment_name = serializers.CharField(source='equipment.name', read_only=True)
     equipment_code = serializers.CharField(source='equipment.equipment_id', read_only=True)
@@ -528,6 +544,9 @@ class EquipmentRequestItemSerializer(serializers.ModelSerializer):
 
     rental_id = serializers.SerializerMethodField()
 
+    # read by get_rental_id (see SparseFieldsMixin)
+    sparse_extra_sources = {'rental_id': 'rental'}
+
     class Meta:
         model = EquipmentRequestItem
         fields = '__all__'
@@ -556,7 +575,7 @@ class EquipmentRequestCreateItemSerializer(serializers.Serializer):
     notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
 
 
-class EquipmentRequestSerializer(serializers.ModelSerializer):
+class EquipmentRequestSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = EquipmentRequestItemSerializer(many=True, read_only=True)
     cart_items = EquipmentRequestCreateItemSerializer(many=True, write_only=True)
 
@@ -621,76 +640,77 @@ class EquipmentRequestSerializer(serializers.ModelSerializer):
                 )
 
             EquipmentRequestItem.objects.bulk_create(items)
+            bump_versions_on_commit(EquipmentRequestItem)
 
         return req_obj
 
 
 # ---------------- CV (unchanged) ---------------- #
 
-class EducationSerializer(serializers.ModelSerializer):
+class EducationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Education
         fields = '__all__'
         read_only_fields = ['cv']
 
 
-class ExperienceSerializer(serializers.ModelSerializer):
+class ExperienceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Experience
         fields = '__all__'
         read_only_fields = ['cv']
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = '__all__'
         read_only_fields = ['cv']
 
 
-class CertificationSerializer(serializers.ModelSerializer):
+class CertificationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Certification
         fields = '__all__'
         read_only_fields = ['cv']
 
 
-class InvolvementSerializer(serializers.ModelSerializer):
+class InvolvementSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Involvement
         fields = '__all__'
         read_only_fields = ['cv']
 
 
-class SkillSerializer(serializers.ModelSerializer):
+class SkillSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Skill
         fields = '__all__'
         read_only_fields = ['cv']
 
 
-class ReferenceSerializer(serializers.ModelSerializer):
+class ReferenceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Reference
         fields = '__all__'
         read_only_fields = ['cv']
 
 
-class LanguageSerializer(serializers.ModelSerializer):
+class LanguageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Language
         fields = '__all__'
         read_only_fields = ['cv']
 
 
-class AwardSerializer(serializers.ModelSerializer):
+class AwardSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Award
         fields = '__all__'
         read_only_fields = ['cv']
 
 
-class CVSerializer(serializers.ModelSerializer):
+class CVSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     education = EducationSerializer(many=True, read_only=True)
     experience = ExperienceSerializer(many=True, read_only=True)
     projects = ProjectSerializer(many=True, read_only=True)
@@ -700,3 +720,15 @@ class CVSerializer(serializers.ModelSerializer):
         model = CV
         fields = '__all__'
         read_only_fields = ['student', 'reviewed_by', 'created_at']
+
+
+class CVDocumentSerializer(CVSerializer):
+    """Full CV with every section nested (use with cv_document_queryset)."""
+    certifications = CertificationSerializer(many=True, read_only=True)
+    involvement = InvolvementSerializer(many=True, read_only=True)
+    references = ReferenceSerializer(many=True, read_only=True)
+    languages = LanguageSerializer(many=True, read_only=True)
+    awards = AwardSerializer(many=True, read_only=True)
+
+    class Meta(CVSerializer.Meta):
+        pass
@@ -0,0 +1,93 @@
+"""
+Model signal handlers for the api app (connected in ApiConfig.ready).
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import User, StudentProfile, AdminProfile, CV, Skill, Project, Experience, Certification
+from .authentication import invalidate_cached_user
+from .caching import bump_versions_on_commit
+from .cv_document import CV_SECTIONS
+from .cv_search import schedule_reindex
+
+
+# ---------------- AUTH USER CACHE ---------------- #
+
+# Invalidated once the write commits: a request running alongside it could
+# otherwise re-cache the old row (still active, old password) under the new version.
+
+def _invalidate_on_commit(user_id):
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _user_changed_invalidate(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_delete, sender=StudentProfile)
+@receiver(post_save, sender=AdminProfile)
+@receiver(post_delete, sender=AdminProfile)
+def _profile_changed_invalidate(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.user_id)
+
+
+# ---------------- CV SEARCH INDEX ---------------- #
+
+@receiver(post_save, sender=CV)
+def _cv_saved_reindex(sender, instance, **kwargs):
+    schedule_reindex(instance.pk)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Experience)
+@receiver(post_save, sender=Certification)
+@receiver(post_delete, sender=Skill)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Experience)
+@receiver(post_delete, sender=Certification)
+def _cv_section_changed_reindex(sender, instance, **kwargs):
+    schedule_reindex(instance.cv_id)
+
+
+# ---------------- CV TIMESTAMP ---------------- #
+
+# A section edit moves its CV's updated_at, so the CV list/retrieve ETags (which
+# aggregate max(updated_at)) change with the rows, not only with the versions.
+
+def _cv_section_changed_touch(sender, instance, **kwargs):
+    CV.objects.filter(pk=instance.cv_id).update(updated_at=timezone.now())
+    bump_versions_on_commit(CV)  # .update() sends no signals
+
+
+for _name, _model, _serializer in CV_SECTIONS:
+    post_save.connect(_cv_section_changed_touch, sender=_model, dispatch_uid=f"touch-cv-save-{_name}")
+    post_delete.connect(_cv_section_changed_touch, sender=_model, dispatch_uid=f"touch-cv-delete-{_name}")
+
+
+# ---------------- CACHE VERSIONS ---------------- #
+
+# Every api model gets a version (dashboards, viewset CachePolicy), so a new
+# cached endpoint never needs its own receivers. Many-to-many edits bump the
+# through model; list it in a policy's models when the output shows the relation.
+# A login only writes User.last_login, which no cached response shows, so it
+# leaves the User version alone and policies can depend on User cheaply.
+# The bump waits for the commit: bumped earlier, a concurrent reader could still
+# see the old rows and cache them under the new version for the whole TTL.
+
+@receiver(post_save, dispatch_uid="bump-model-version-save")
+@receiver(post_delete, dispatch_uid="bump-model-version-delete")
+@receiver(m2m_changed, dispatch_uid="bump-model-version-m2m")
+def _bump_version(sender, **kwargs):
+    if sender._meta.app_label != "api":
+        return
+    if kwargs.get("update_fields") == frozenset({"last_login"}):
+        return
+    if kwargs.get("action", "post_").startswith("post_"):
+        bump_versions_on_commit(sender)
@@ -0,0 +1,217 @@
+"""
+Sparse fieldsets and expansion control for API reads.
+
+    ?fields=id,status,equipment_name        only these fields
+    ?fields=id,user.username                dotted names select inside nested objects
+    ?expand=user                            nested objects to include; once ?expand is
+                                            given, nested objects not named are left out
+                                            (?expand= with no value drops them all)
+
+Without either parameter responses are unchanged. A name the serializer
+cannot return (a typo, a write-only field, ?expand= on a plain field) is a
+400 naming it, rather than a silently empty object. Pruning happens when the
+serializer is built (GET/HEAD only, the view's own serializer only), so
+dropped fields are never evaluated, and SparseFieldsViewSetMixin rebuilds the
+queryset's select_related / prefetch_related from the fields that are left,
+so relations nobody asked for are never joined or queried.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def _split(value):
+    return {p.strip() for p in (value or "").split(",") if p.strip()}
+
+
+def sparse_params(request):
+    """(fields, expand) from the query string; each is a set or None when absent."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+    params = request.query_params
+    fields = _split(params.get("fields")) if "fields" in params else None
+    expand = _split(params.get("expand")) if "expand" in params else None
+    return fields or None, expand
+
+
+def _nested_serializer(field):
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.BaseSerializer):
+        return field
+    return None
+
+
+def unknown_fields(serializer, fields=None, expand=None):
+    """Requested names (dotted below nested serializers) the serializer cannot return."""
+    extra = getattr(serializer, "sparse_extra_sources", {})
+    unknown = set()
+    for name in fields or ():
+        head, _, rest = name.partition(".")
+        field = serializer.fields.get(head)
+        if field is None or field.write_only:
+            if head not in extra or rest:
+                unknown.add(name)
+            continue
+        nested = _nested_serializer(field)
+        if rest and nested is None:
+            unknown.add(name)
+        elif rest:
+            unknown.update(f"{head}.{sub}" for sub in unknown_fields(nested, {rest}))
+    for name in expand or ():
+        field = serializer.fields.get(name)
+        if field is None or field.write_only or _nested_serializer(field) is None:
+            unknown.add(name)
+    return unknown
+
+
+def prune_fields(serializer, fields=None, expand=None):
+    """Drop unrequested fields from serializer.fields (in place), recursing into nested serializers."""
+    top = {f.split(".", 1)[0] for f in fields} if fields is not None else None
+
+    for name in list(serializer.fields):
+        field = serializer.fields[name]
+        nested = _nested_serializer(field)
+        if field.write_only:
+            continue
+
+        wanted = top is None or name in top
+        if nested is not None:
+            if expand is not None and name in expand:
+                wanted = True
+            elif expand is not None and (top is None or name not in top):
+                wanted = False
+        if not wanted:
+            serializer.fields.pop(name)
+            continue
+
+        if nested is not None and fields is not None:
+            sub = {f.split(".", 1)[1] for f in fields if f.startswith(name + ".")}
+            if sub:
+                prune_fields(nested, sub, None)
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin: honours ?fields= / ?expand= on reads.
+    `sparse_extra_sources` maps keys added in to_representation, and
+    SerializerMethodFields (whose source is "*"), to the relation they read,
+    so querysets still join what those keys need.
+    """
+
+    sparse_extra_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        context = kwargs.get("context") or {}
+        # only the view's own serializer; nested/helper serializers are left alone
+        if context.get("view") is None or getattr(self, "parent", None) is not None:
+            return
+        fields, expand = sparse_params(context.get("request"))
+        if fields is None and expand is None:
+            return
+        errors = {}
+        for param, names in (("fields", unknown_fields(self, fields)), ("expand", unknown_fields(self, None, expand))):
+            if names:
+                errors[param] = [f"Unknown field(s): {', '.join(sorted(names))}."]
+        if errors:
+            raise serializers.ValidationError(errors)
+        self._sparse_fields = fields
+        prune_fields(self, fields, expand)
+
+    def wants_field(self, name):
+        """For keys added in to_representation: were they requested?"""
+        fields = getattr(self, "_sparse_fields", None)
+        return fields is None or name in fields
+
+
+# ---------------- QUERYSET ADAPTATION ---------------- #
+
+def _source_relations(model, attrs, prefix=""):
+    """
+    Walk a source path over model relations.
+    Returns (select_related paths, prefetch path or None, model the path ends on).
+    """
+    selects = []
+    path = prefix
+    for attr in attrs:
+        try:
+            f = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not f.is_relation or f.related_model is None:
+            break
+        path = f"{path}__{attr}" if path else attr
+        model = f.related_model
+        if f.many_to_many or f.one_to_many:
+            return selects, path, model
+        selects.append(path)
+    return selects, None, model
+
+
+def serializer_relations(serializer, model, prefix=""):
+    """(select_related set, prefetch_related set) needed to render the serializer's fields."""
+    selects, prefetches = set(), set()
+
+    def add(source_attrs, nested=None):
+        sel, pre, end_model = _source_relations(model, source_attrs, prefix)
+        selects.update(sel)
+        if pre:
+            prefetches.add(pre)
+        if nested is not None and end_model is not None and end_model is not model:
+            base = pre or (sel[-1] if sel else None)
+            if base:
+                s2, p2 = serializer_relations(nested, end_model, base)
+                if pre:
+                    # below a prefetch, joins have to ride along in the prefetch
+                    prefetches.update(s2 | p2)
+                else:
+                    selects.update(s2)
+                    prefetches.update(p2)
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+        add(field.source.split("."), _nested_serializer(field))
+
+    wants = getattr(serializer, "wants_field", lambda name: True)
+    for key, source in getattr(serializer, "sparse_extra_sources", {}).items():
+        if wants(key):
+            add(source.split("."))
+
+    return selects, prefetches
+
+
+class SparseFieldsViewSetMixin:
+    """
+    Viewset mixin: when fields are pruned, join/prefetch only what the remaining fields read.
+    Hooks filter_queryset, which list/retrieve apply to whatever get_queryset returns.
+    """
+
+    def filter_queryset(self, queryset):
+        qs = super().filter_queryset(queryset)
+        if self.action not in ("list", "retrieve"):
+            return qs
+        fields, expand = sparse_params(getattr(self, "request", None))
+        if fields is None and expand is None:
+            return qs
+
+        serializer = self.get_serializer()
+        selects, prefetches = serializer_relations(serializer, qs.model)
+
+        kept = [
+            lookup for lookup in qs._prefetch_related_lookups
+            if any(getattr(lookup, "prefetch_to", lookup).startswith(p) for p in prefetches)
+        ]
+        covered = {getattr(lookup, "prefetch_to", lookup) for lookup in kept}
+        kept += sorted(p for p in prefetches if p not in covered)
+
+        qs = qs.select_related(None).prefetch_related(None)
+        if selects:
+            qs = qs.select_related(*sorted(selects))
+        if kept:
+            qs = qs.prefetch_related(*kept)
+        return qs
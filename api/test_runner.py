@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class NPlusOneTestRunner(DiscoverRunner):
+    """
+    DiscoverRunner with the N+1 detector switched on in raise mode: any request
+    made by a test that repeats one query shape more than NPLUSONE_THRESHOLD
+    times fails with api.nplusone.NPlusOneError and the offending call site.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._nplusone_saved = (
+            getattr(settings, "NPLUSONE_ENABLED", False),
+            getattr(settings, "NPLUSONE_RAISE", False),
+        )
+        settings.NPLUSONE_ENABLED = True
+        settings.NPLUSONE_RAISE = True
+
+    def teardown_test_environment(self, **kwargs):
+        settings.NPLUSONE_ENABLED, settings.NPLUSONE_RAISE = self._nplusone_saved
+        super().teardown_test_environment(**kwargs)
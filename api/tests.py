@@ -1,3 +1,1334 @@
-from django.test import TestCase
+"""
+Query and response-time budgets for every GET endpoint.
 
-# Create your tests here.
+Each viewset registered in api/urls.py is listed and retrieved, and every
+custom GET action (exports, search, documents, availability...) and the
+function views in GET_ENDPOINTS are called, as a student and as an admin
+against a seeded dataset. The query count of every (role, endpoint) pair must
+not exceed its entry in api/query_budgets.json and its wall time must stay
+within the time budget; a regression fails with a diff of the endpoints that
+got worse. Budgets are recorded per database vendor, since query counts
+differ between SQLite and MySQL; on a vendor with no table yet (only SQLite
+is recorded so far) the check is skipped. After an intentional change (or to
+add a vendor), regenerate the table and commit it:
+
+    UPDATE_QUERY_BUDGETS=1 python manage.py test api
+
+QUERY_BUDGET_TIMING=0 skips the time checks (slow or shared CI machines).
+The runner (api.test_runner) also fails any request that repeats a query
+shape, so N+1 patterns surface here as errors with their call site.
+"""
+
+import gzip
+import json
+import math
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+import uuid
+from datetime import time as dtime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import update_last_login
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from unittest import mock
+
+from . import db_router
+from .backends import find_login_user
+from .caching import CachePolicy, bump_model_version, cache_stats as viewset_cache_stats, model_version
+from .cv_search import facet_counts, parse_query, search_cvs
+from .db import pool as db_pool
+from .db.pool import ConnectionPool
+from .middleware import CompressionMiddleware, brotli, choose_encoding
+from .models import *
+from .nplusone import NPlusOneError, allow_n_plus_one, detect_n_plus_one, query_shape
+from .profiling import StackSampler
+from .renderers import FastJSONRenderer
+from .tracing import read_traces, span, start_trace, write_trace
+from .urls import router
+from .views import TutorialViewSet
+
+
+BUDGETS_PATH = Path(__file__).with_name("query_budgets.json")
+
+# new time budgets: measured time x headroom, at least the floor, rounded up
+TIME_HEADROOM = 5
+TIME_FLOOR_MS = 200
+TIME_STEP_MS = 50
+
+# function views outside the router: (name, path)
+GET_ENDPOINTS = (
+    ("auth-profile", "/api/auth/profile/"),
+    ("admin-dashboard", "/api/dashboard/admin/"),
+    ("student-dashboard", "/api/dashboard/student/"),
+)
+
+# query parameters for custom GET actions that need them, by "<basename>-<url_name>"
+BOOKING_SLOT = "09:00-10:00"
+
+
+def _action_params(day):
+    return {
+        "lab-availability": {"date": day, "time_slot": BOOKING_SLOT},
+        "lab-booking-available-imacs": {"lab_room": "BMC Lab", "date": day, "time_slot": BOOKING_SLOT},
+        "cv-search": {"q": "premiere"},
+        "equipment-rental-export-rentals": {"equipment_id": "EQ-000"},
+    }
+
+
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "budget-default"},
+    "throttle": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "budget-throttle"},
+}
+
+
+def seed_dataset():
+    """A small but complete dataset: more rows per list than the N+1 threshold."""
+    admin = User.objects.create_user(
+        "budget_admin", "admin@aiu.test", "pw-budget-123", user_type="admin", is_staff=True,
+        first_name="Ada", last_name="Admin",
+    )
+    AdminProfile.objects.create(user=admin, admin_id="ADM-1", role="Lab manager")
+
+    students = []
+    for i in range(12):
+        u = User.objects.create_user(
+            f"budget_s{i}", f"s{i}@aiu.test", "pw-budget-123", first_name="Student", last_name=str(i),
+        )
+        StudentProfile.objects.create(user=u, student_id=f"AIU{i:04d}", year=str(i % 4 + 1))
+        students.append(u)
+
+    category = Category.objects.create(name="Video editing")
+    Category.objects.create(name="Photography")
+    tutorials = [
+        Tutorial.objects.create(
+            title=f"Tutorial {i}", description="d", category=category,
+            video_url="https://example.com/v", duration=10, created_by=admin,
+        )
+        for i in range(8)
+    ]
+    for u in students:
+        for t in tutorials:
+            TutorialProgress.objects.create(student=u, tutorial=t, progress_percentage=50)
+
+    lab = Lab.objects.create(name="BMC Lab", description="d", capacity=30, location="B1", facilities="iMac")
+    day = timezone.localdate() + timedelta(days=7)
+    for i, u in enumerate(students):
+        for j, status in enumerate(("pending", "approved")):
+            LabBooking.objects.create(
+                lab=lab, student=u, booking_date=day, start_time=dtime(9 + 2 * j), end_time=dtime(10 + 2 * j),
+                time_slot=f"{9 + 2 * j:02d}:00-{10 + 2 * j:02d}:00", imac_number=i + 1, purpose="edit",
+                status=status, reviewed_by=admin if status == "approved" else None,
+            )
+
+    cameras = EquipmentCategory.objects.create(name="Cameras")
+    due = timezone.now() + timedelta(days=7)
+    equipment = []
+    for i in range(8):
+        e = Equipment(name=f"Camera {i}", description="d", category="camera", equipment_id=f"EQ-{i:03d}", quantity_total=3)
+        e.save()
+        e.categories.add(cameras)
+        equipment.append(e)
+    for i, u in enumerate(students):
+        EquipmentRental.objects.create(
+            equipment=equipment[i % len(equipment)], student=u, status=("pending", "approved")[i % 2],
+            expected_return_date=due, reviewed_by=admin if i % 2 else None,
+        )
+        req = EquipmentRequest.objects.create(student=u)
+        for e in equipment[:2]:
+            EquipmentRequestItem.objects.create(request=req, equipment=e, quantity=1)
+
+    for i, u in enumerate(students):
+        cv = CV.objects.create(
+            student=u, full_name=f"Student {i}", email=u.email, phone="0100", summary="Editor",
+            status=("pending", "approved")[i % 2],
+        )
+        for j in range(2):
+            Education.objects.create(cv=cv, degree="BMC", institution="AIU", start_date="2021", end_date="2025", order=j)
+            Experience.objects.create(cv=cv, position="Editor", company="Studio", start_date="2023", end_date="2024", order=j)
+            Project.objects.create(cv=cv, name="Short film", description="d", technologies="Premiere Pro", order=j)
+            Certification.objects.create(cv=cv, name="Adobe", issuer="Adobe", year="2024", order=j)
+            Involvement.objects.create(cv=cv, role="Member", organization="Film club", year="2023", order=j)
+            Skill.objects.create(cv=cv, name=("Premiere Pro", "Lightroom")[j], order=j)
+            Reference.objects.create(cv=cv, name="Ref", position="Lecturer", workplace="AIU", phone="0100", email="r@aiu.test", order=j)
+            Language.objects.create(cv=cv, name=("English", "Arabic")[j], proficiency="Fluent", order=j)
+            Award.objects.create(cv=cv, title="Best edit", order=j)
+
+    return admin, students[0]
+
+
+def _rows(data):
+    if isinstance(data, dict):
+        data = data.get("results", [])
+    return data if isinstance(data, list) else []
+
+
+def _round_ms(ms):
+    return max(TIME_FLOOR_MS, int(math.ceil(ms * TIME_HEADROOM / TIME_STEP_MS) * TIME_STEP_MS))
+
+
+class SeededTestCase(TestCase):
+    """seed_dataset() once per class, with QR codes and uploads in a temporary MEDIA_ROOT."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._media = tempfile.mkdtemp(prefix="aiu-test-media-")
+        cls._media_override = override_settings(MEDIA_ROOT=cls._media)
+        cls._media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._media_override.disable()
+        shutil.rmtree(cls._media, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.student = seed_dataset()
+
+
+# ---------------- ENDPOINT BUDGETS ---------------- #
+
+@override_settings(CACHES=TEST_CACHES, LOGIN_THROTTLE_ENABLED=False, METRICS_ENABLED=False, TRACING_ENABLED=False)
+class EndpointBudgetTests(SeededTestCase):
+    def _measure(self, client, url):
+        """(status, queries, best wall ms) of a warm GET with cold response caches."""
+        client.get(url)  # warm-up; also settles lazy state changes (auto-complete, overdue)
+        queries, best = None, None
+        for _ in range(3):
+            caches["default"].clear()
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                response = client.get(url)
+                ms = (time.perf_counter() - t0) * 1000
+            queries = len(ctx.captured_queries) if queries is None else max(queries, len(ctx.captured_queries))
+            best = ms if best is None else min(best, ms)
+        return response, queries, best
+
+    def _measure_all(self):
+        results = {}
+        params = _action_params((timezone.localdate() + timedelta(days=7)).isoformat())
+        url_kwargs = {"tutorial_id": Tutorial.objects.order_by("pk").values_list("pk", flat=True).first()}
+
+        def record(key, url):
+            response, queries, ms = self._measure(client, url)
+            results[key] = {"status": response.status_code, "queries": queries, "ms": ms}
+            return response
+
+        for role, user in (("student", self.student), ("admin", self.admin)):
+            client = APIClient()
+            client.force_authenticate(user)
+            for prefix, viewset, basename in router.registry:
+                url = f"/api/{prefix}/"
+                response = record(f"{role} {basename}-list", url)
+
+                rows = _rows(response.data) if response.status_code == 200 else []
+                pk = rows[0].get("id") if rows and isinstance(rows[0], dict) else None
+                if pk is not None:
+                    record(f"{role} {basename}-retrieve", f"{url}{pk}/")
+
+                for extra in viewset.get_extra_actions():
+                    if "get" not in extra.mapping or (extra.detail and pk is None):
+                        continue
+                    path = re.sub(r"\(\?P<(\w+)>[^)]*\)", lambda m: str(url_kwargs[m.group(1)]), extra.url_path)
+                    name = f"{basename}-{extra.url_name}"
+                    action_url = f"{url}{pk}/{path}/" if extra.detail else f"{url}{path}/"
+                    if name in params:
+                        action_url += "?" + urlencode(params[name])
+                    record(f"{role} {name}", action_url)
+
+            for name, path in GET_ENDPOINTS:
+                record(f"{role} {name}", path)
+        return results
+
+    def _write_budgets(self, results):
+        """Replace this vendor's table; other vendors' tables are kept."""
+        table = {
+            key: {"status": r["status"], "queries": r["queries"], "ms": _round_ms(r["ms"])}
+            for key, r in sorted(results.items())
+        }
+        vendors = json.loads(BUDGETS_PATH.read_text()).get("vendors", {}) if BUDGETS_PATH.exists() else {}
+        vendors[connection.vendor] = {"endpoints": table}
+        payload = {
+            "_about": "Per-endpoint query/time budgets checked by api.tests, per database vendor. "
+                      "Regenerate with UPDATE_QUERY_BUDGETS=1 python manage.py test api.",
+            "vendors": dict(sorted(vendors.items())),
+        }
+        BUDGETS_PATH.write_text(json.dumps(payload, indent=2) + "\n")
+
+    def test_endpoints_within_budget(self):
+        if os.getenv("UPDATE_QUERY_BUDGETS") == "1":
+            self._write_budgets(self._measure_all())
+            return
+
+        self.assertTrue(BUDGETS_PATH.exists(), f"{BUDGETS_PATH.name} missing; run with UPDATE_QUERY_BUDGETS=1")
+        vendors = json.loads(BUDGETS_PATH.read_text()).get("vendors", {})
+        # counts recorded on one database say little about another
+        if connection.vendor not in vendors:
+            self.skipTest(
+                f"{BUDGETS_PATH.name} has no budgets for {connection.vendor} (only {', '.join(sorted(vendors)) or 'none'}); "
+                "record them with UPDATE_QUERY_BUDGETS=1 python manage.py test api and commit the file"
+            )
+        budgets = vendors[connection.vendor]["endpoints"]
+        results = self._measure_all()
+        check_time = os.getenv("QUERY_BUDGET_TIMING", "1") != "0"
+
+        problems = []
+        for key, r in sorted(results.items()):
+            budget = budgets.get(key)
+            if budget is None:
+                problems.append(f"  {key:<42} no budget (status {r['status']}, {r['queries']} queries, {r['ms']:.0f} ms)")
+                continue
+            if r["status"] != budget["status"]:
+                problems.append(f"  {key:<42} status   {budget['status']} -> {r['status']}")
+            if r["queries"] > budget["queries"]:
+                problems.append(
+                    f"  {key:<42} queries  {budget['queries']} -> {r['queries']} (+{r['queries'] - budget['queries']})"
+                )
+            if check_time and r["ms"] > budget["ms"]:
+                problems.append(f"  {key:<42} time     {budget['ms']} ms -> {r['ms']:.0f} ms")
+        for key in sorted(set(budgets) - set(results)):
+            problems.append(f"  {key:<42} budget for an endpoint that no longer answers")
+
+        if problems:
+            self.fail(
+                "Endpoint budgets exceeded (UPDATE_QUERY_BUDGETS=1 regenerates "
+                f"{BUDGETS_PATH.name} after an intentional change):\n" + "\n".join(problems)
+            )
+
+
+# ---------------- N+1 DETECTOR ---------------- #
+
+class NPlusOneDetectorTests(TestCase):
+    def test_query_shape_collapses_parameters(self):
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            query_shape("SELECT * FROM t WHERE id IN (%s) AND name = 'y' LIMIT 1"),
+        )
+
+    def test_repeated_shape_raises_with_call_site(self):
+        for i in range(4):
+            Category.objects.create(name=f"c{i}")
+        with self.assertRaises(NPlusOneError) as ctx:
+            with detect_n_plus_one(threshold=2, raise_errors=True):
+                for c in Category.objects.all():
+                    c.tutorials.count()
+        self.assertIn("api/tests.py", str(ctx.exception))
+
+    def test_allow_n_plus_one_suspends_detection(self):
+        for i in range(4):
+            Category.objects.create(name=f"c{i}")
+        with detect_n_plus_one(threshold=2, raise_errors=True) as tracker:
+            with allow_n_plus_one():
+                for c in Category.objects.all():
+                    c.tutorials.count()
+        self.assertEqual(tracker.violations, {})
+
+
+# ---------------- TRACING ---------------- #
+
+class TracingTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="aiu-test-traces-")
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def test_spans_nest_under_the_current_span(self):
+        with start_trace("GET /x") as trace:
+            with span("outer", "view"):
+                list(Category.objects.all())  # not wrapped: no db span
+                with span("inner", "io", file="photo.jpg"):
+                    pass
+        with span("outside"):
+            pass  # no active trace: ignored
+        names = {s.name: s for s in trace.spans}
+        self.assertEqual(sorted(names), ["GET /x", "inner", "outer"])
+        self.assertEqual(names["inner"].parent, names["outer"].id)
+        self.assertEqual(names["outer"].parent, names["GET /x"].id)
+
+    def test_trace_files_rotate(self):
+        with override_settings(TRACING_DIR=self.dir, TRACING_MAX_BYTES=2000, TRACING_BACKUP_COUNT=2):
+            for i in range(30):
+                with start_trace(f"GET /{i}") as trace:
+                    pass
+                write_trace(trace.to_record(path=f"/{i}"))
+            files = sorted(os.listdir(self.dir))
+            self.assertEqual(len(files), 3)
+            paths = [t["path"] for t in read_traces()]
+        self.assertEqual(paths[-1], "/29")
+        self.assertLess(len(paths), 30)
+
+    def test_files_of_recycled_workers_are_pruned(self):
+        old = os.path.join(self.dir, "traces-1.jsonl")
+        with open(old, "w") as fh:
+            fh.write("x" * 3000)
+        os.utime(old, (time.time() - 3600, time.time() - 3600))
+        with override_settings(TRACING_DIR=self.dir, TRACING_MAX_TOTAL_BYTES=2000), \
+                mock.patch("api.tracing._pruned_in", None):
+            with start_trace("GET /new") as trace:
+                pass
+            write_trace(trace.to_record(path="/new"))
+        self.assertEqual(os.listdir(self.dir), [f"traces-{os.getpid()}.jsonl"])
+
+
+# ---------------- METRICS ---------------- #
+
+class MetricsFileTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="aiu-test-metrics-")
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def _write_worker(self, pid, count):
+        payload = {
+            "pid": pid,
+            "histograms": [{
+                "key": ["aiu_http_request_duration_seconds", "tutorial-list", "GET", "2xx"],
+                "counts": [count] + [0] * 10, "sum": 0.001 * count, "count": count,
+            }],
+            "cache": {"viewsets": {"tutorial": {"hits": count, "misses": 0}}},
+        }
+        with open(os.path.join(self.dir, f"metrics-{pid}.json"), "w") as fh:
+            json.dump(payload, fh)
+
+    def _request_count(self, text):
+        line = next(l for l in text.splitlines()
+                    if l.startswith("aiu_http_request_duration_seconds_count") and "tutorial-list" in l)
+        return int(line.rsplit(" ", 1)[1])
+
+    def test_exited_workers_are_folded_into_the_retired_totals(self):
+        from . import metrics
+
+        live, dead = os.getppid(), 2 ** 22 + 1  # above PID_MAX_LIMIT: never alive
+        self._write_worker(live, 2)
+        self._write_worker(dead, 5)
+        with override_settings(METRICS_DIR=self.dir), mock.patch.object(metrics, "store", metrics.MetricsStore()):
+            first = metrics.render_prometheus()
+            self.assertNotIn(f"metrics-{dead}.json", os.listdir(self.dir))
+            self.assertIn(metrics.RETIRED_FILE, os.listdir(self.dir))
+            second = metrics.render_prometheus()
+        self.assertEqual(self._request_count(first), 7)
+        self.assertEqual(self._request_count(second), 7)  # counted once, not lost
+        self.assertIn('aiu_viewset_cache_requests_total{viewset="tutorial",result="hit"} 7', second)
+        self.assertIn("aiu_metrics_workers 2", second)  # the parent file and this process's
+
+    def test_exiting_worker_flushes_what_it_measured(self):
+        from aiu_backend import gunicorn_conf
+
+        from . import metrics
+
+        worker_store = metrics.MetricsStore()
+        worker_store.last_flush = time.monotonic()  # just flushed: the next request is held back
+        with override_settings(METRICS_DIR=self.dir, METRICS_ENABLED=True, METRICS_FLUSH_INTERVAL=60), \
+                mock.patch.object(metrics, "store", worker_store):
+            worker_store.observe("tutorial-list", "GET", 200, metrics.RequestStats())
+            self.assertEqual(os.listdir(self.dir), [])
+            gunicorn_conf.worker_exit(mock.Mock(), mock.Mock(pid=os.getpid()))
+        with open(os.path.join(self.dir, f"metrics-{os.getpid()}.json")) as fh:
+            payload = json.load(fh)
+        self.assertEqual(sum(h["count"] for h in payload["histograms"]), len(metrics.HISTOGRAMS))
+
+
+# ---------------- PROFILING ---------------- #
+
+@override_settings(CACHES=TEST_CACHES, TRACING_ENABLED=False)
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="aiu-test-profiles-")
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        override = override_settings(PROFILING_DIR=self.dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.admin = User.objects.create_user("prof_admin", "a@aiu.test", "pw-prof-123", user_type="admin", is_staff=True)
+        self.student = User.objects.create_user("prof_student", "s@aiu.test", "pw-prof-123")
+        Category.objects.create(name="Video editing")
+
+    def _get(self, user, url, **extra):
+        token = RefreshToken.for_user(user).access_token
+        return self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}", **extra)
+
+    def test_staff_profile_is_stored_and_downloadable(self):
+        response = self._get(self.admin, "/api/categories/?_profile=1")
+        profile_id = response.get("X-Profile-Id")
+        self.assertTrue(profile_id)
+
+        listing = self._get(self.admin, "/api/profiles/").json()
+        self.assertEqual([p["id"] for p in listing], [profile_id])
+        self.assertEqual(listing[0]["endpoint"], "category-list")
+
+        pstats_file = self._get(self.admin, f"/api/profiles/{profile_id}/pstats/")
+        self.assertEqual(pstats_file.status_code, 200)
+        collapsed = self._get(self.admin, f"/api/profiles/{profile_id}/collapsed/").content.decode()
+        self.assertIn("(api/views.py:", collapsed)  # the view's own frames
+
+    def test_flag_is_ignored_for_students(self):
+        response = self._get(self.student, "/api/categories/", HTTP_X_PROFILE="1")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("X-Profile-Id"))
+        self.assertEqual(os.listdir(self.dir), [])
+        self.assertEqual(self._get(self.student, "/api/profiles/").status_code, 403)
+
+    def test_overlapping_samplers_restore_the_switch_interval(self):
+        original = sys.getswitchinterval()
+        first, second = StackSampler(interval=0.001), StackSampler(interval=0.002)
+        first.start()
+        second.start()
+        first.stop()  # the other sampler still needs the short interval
+        self.assertEqual(sys.getswitchinterval(), 0.001)
+        second.stop()
+        self.assertEqual(sys.getswitchinterval(), original)
+
+
+# ---------------- READ REPLICAS ---------------- #
+
+# "default" doubles as the replica: routing decisions are what is under test
+@override_settings(CACHES=TEST_CACHES, DATABASE_REPLICAS=["default"], REPLICA_MAX_LAG=10)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        db_router.health.checked.clear()
+        self.factory = RequestFactory()
+        self.admin = User.objects.create_user("replica_admin", "a@aiu.test", "pw-rep-123", user_type="admin", is_staff=True)
+        self.student = User.objects.create_user("replica_student", "s@aiu.test", "pw-rep-123")
+
+    def _request(self, method, user, path="/api/labs/", **extra):
+        token = RefreshToken.for_user(user).access_token
+        return getattr(self.factory, method)(path, HTTP_AUTHORIZATION=f"Bearer {token}", **extra)
+
+    def test_safe_reads_use_replica_and_writes_stick_to_primary(self):
+        self.assertEqual(db_router.choose_read_alias(self._request("get", self.student)), "default")
+        self.assertIsNone(db_router.choose_read_alias(self._request("post", self.student)))
+
+        db_router.mark_wrote(self.student.pk)
+        self.assertIsNone(db_router.choose_read_alias(self._request("get", self.student)))
+        self.assertEqual(db_router.choose_read_alias(self._request("get", self.admin)), "default")
+
+    def test_primary_override_is_staff_only(self):
+        self.assertIsNone(db_router.choose_read_alias(self._request("get", self.admin, HTTP_X_DB_PRIMARY="1")))
+        self.assertEqual(db_router.choose_read_alias(self._request("get", self.student, HTTP_X_DB_PRIMARY="1")), "default")
+
+    def test_lagging_replica_is_skipped(self):
+        with mock.patch.object(db_router, "measure_lag", return_value=60.0):
+            self.assertIsNone(db_router.choose_read_alias(self._request("get", self.student)))
+
+    def test_stickiness_is_shared_between_workers(self):
+        from django.core.cache.backends.filebased import FileBasedCache
+
+        directory = tempfile.mkdtemp(prefix="aiu-test-sticky-")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        shared = dict(TEST_CACHES, sticky={
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directory,
+        })
+        with override_settings(CACHES=shared, REPLICA_STICKY_CACHE_ALIAS="sticky", DEBUG=False):
+            db_router.mark_wrote(self.student.pk)
+            self.assertEqual(db_router.check_sticky_cache_shared(None), [])
+        # a worker that did not handle the write reads the same mark
+        self.assertIsNotNone(FileBasedCache(directory, {}).get(db_router._sticky_key(self.student.pk)))
+
+        with override_settings(REPLICA_STICKY_CACHE_ALIAS="default", DEBUG=False):
+            self.assertEqual([w.id for w in db_router.check_sticky_cache_shared(None)], ["api.W003"])
+
+
+# ---------------- CONNECTION POOL ---------------- #
+
+class _FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.alive = True
+
+    def close(self):
+        self.closed = True
+
+
+class _PoolError(Exception):
+    pass
+
+
+class ConnectionPoolTests(TestCase):
+    def _pool(self, **kwargs):
+        opts = dict(size=2, timeout=0.05, max_lifetime=60, idle_timeout=60, health_check=True)
+        opts.update(kwargs)
+        return ConnectionPool("default", **opts)
+
+    @staticmethod
+    def _ping(raw):
+        if not raw.alive:
+            raise _PoolError("gone")
+
+    def test_connections_are_reused(self):
+        pool = self._pool()
+        first = pool.checkout(_FakeConnection, self._ping, _PoolError)
+        pool.checkin(first)
+        second = pool.checkout(_FakeConnection, self._ping, _PoolError)
+        self.assertIs(second.raw, first.raw)
+        self.assertEqual((pool.stats["connects"], pool.stats["reused"]), (1, 1))
+
+    def test_dead_connection_is_replaced(self):
+        pool = self._pool()
+        entry = pool.checkout(_FakeConnection, self._ping, _PoolError)
+        pool.checkin(entry)
+        entry.raw.alive = False
+        fresh = pool.checkout(_FakeConnection, self._ping, _PoolError)
+        self.assertIsNot(fresh.raw, entry.raw)
+        self.assertTrue(entry.raw.closed)
+        self.assertEqual(pool.stats["health_failures"], 1)
+
+    def test_exhausted_pool_times_out(self):
+        pool = self._pool()
+        pool.checkout(_FakeConnection, self._ping, _PoolError)
+        pool.checkout(_FakeConnection, self._ping, _PoolError)
+        with self.assertRaises(_PoolError):
+            pool.checkout(_FakeConnection, self._ping, _PoolError)
+        self.assertEqual(pool.snapshot()["in_use"], 2)
+
+    def test_idle_connections_are_reaped(self):
+        pool = self._pool(idle_timeout=0)
+        entry = pool.checkout(_FakeConnection, self._ping, _PoolError)
+        pool.checkin(entry)
+        time.sleep(0.01)
+        fresh = pool.checkout(_FakeConnection, self._ping, _PoolError)
+        self.assertIsNot(fresh.raw, entry.raw)
+        self.assertTrue(entry.raw.closed)
+
+    def test_close_all_closes_idle_connections_before_fork(self):
+        pool = db_pool.get_pool(("test-close-all",), "default", {"SIZE": 2})
+        self.addCleanup(db_pool._pools.pop, ("test-close-all",), None)
+        idle = pool.checkout(_FakeConnection, self._ping, _PoolError)
+        busy = pool.checkout(_FakeConnection, self._ping, _PoolError)
+        pool.checkin(idle)
+
+        self.assertGreaterEqual(db_pool.close_all(), 1)
+        self.assertTrue(idle.raw.closed)
+        self.assertFalse(busy.raw.closed)  # checked out: its owner closes it
+        self.assertEqual(pool.snapshot()["idle"], 0)
+
+
+class StartupImportTests(TestCase):
+    def test_heavy_modules_are_not_imported_at_boot(self):
+        from .management.commands.startup_profile import Command
+
+        data, _wall, _stderr = Command()._run()
+        self.assertEqual(data["loaded"], [])
+
+
+# ---------------- CV DOCUMENT ---------------- #
+
+@override_settings(CACHES=TEST_CACHES, TRACING_ENABLED=False, METRICS_ENABLED=False)
+class CVDocumentTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.student = User.objects.create_user("doc_student", "d@aiu.test", "pw-doc-123")
+        self.cv = CV.objects.create(student=self.student, full_name="Doc Student", email="d@aiu.test", phone="0100")
+        self.skill = Skill.objects.create(cv=self.cv, name="Premiere Pro", order=0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_document_put_invalidates_etag(self):
+        url = f"/api/cvs/{self.cv.pk}/"
+        first = self.client.get(url)
+        etag = first["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                "/api/cvs/my/document/", {"skills": [{"id": self.skill.pk, "name": "DaVinci Resolve", "order": 0}]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["changes"]["updated"], 1)
+
+        after = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after["ETag"], etag)
+        self.assertEqual([s["name"] for s in after.json()["skills"]], ["DaVinci Resolve"])
+
+
+# ---------------- CONDITIONAL GET ---------------- #
+
+@override_settings(CACHES=TEST_CACHES, TRACING_ENABLED=False, METRICS_ENABLED=False)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.admin = User.objects.create_user("cond_admin", "a@aiu.test", "pw-cond-123", user_type="admin", is_staff=True)
+        self.student = User.objects.create_user("cond_student", "s@aiu.test", "pw-cond-123")
+        self.category = Category.objects.create(name="Video editing")
+        self.tutorial = Tutorial.objects.create(
+            title="Cuts", description="d", category=self.category,
+            video_url="https://example.com/v", duration=10, created_by=self.admin,
+        )
+        self.lab = Lab.objects.create(name="BMC Lab", description="d", capacity=30, location="B1", facilities="iMac")
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_unchanged_list_is_304_and_a_new_row_is_200(self):
+        etag = self.client.get("/api/categories/")["ETag"]
+        not_modified = self.client.get("/api/categories/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], etag)
+        self.assertEqual(not_modified.content, b"")
+
+        Category.objects.create(name="Photography")
+        self.assertEqual(self.client.get("/api/categories/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_modified_since_on_single_model_retrieve(self):
+        first = self.client.get(f"/api/labs/{self.lab.pk}/")
+        since = first["Last-Modified"]
+        self.assertEqual(self.client.get(f"/api/labs/{self.lab.pk}/", HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+        # a missing row is still a 404, not a 304
+        self.assertEqual(self.client.get("/api/labs/999999/", HTTP_IF_MODIFIED_SINCE=since).status_code, 404)
+
+    def test_signal_less_write_changes_the_etag(self):
+        url = f"/api/tutorials/{self.tutorial.pk}/"
+        etag = self.client.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/tutorials/{self.tutorial.pk}/increment_views/")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["views"], self.tutorial.views + 1)
+
+    def test_queryset_side_effects_run_once_per_request(self):
+        from .views import EquipmentRentalViewSet, LabBookingViewSet
+
+        self.client.force_authenticate(self.admin)
+        for viewset, method, url in (
+            (LabBookingViewSet, "_auto_complete_qs", "/api/lab-bookings/"),
+            (EquipmentRentalViewSet, "_auto_overdue_qs", "/api/equipment-rentals/"),
+        ):
+            with self.subTest(url=url), mock.patch.object(viewset, method) as side_effect:
+                self.assertEqual(self.client.get(url).status_code, 200)
+                self.assertEqual(side_effect.call_count, 1)
+
+    def test_section_edit_changes_the_cv_etag_without_versions(self):
+        cv = CV.objects.create(student=self.student, full_name="Cond Student", email="s@aiu.test", phone="0100")
+        url = f"/api/cvs/{cv.pk}/"
+        # as seen by a worker whose version counters did not move
+        with mock.patch("api.conditional.versions_fingerprint", return_value="frozen"):
+            etag = self.client.get(url)["ETag"]
+            skill = Skill.objects.create(cv=cv, name="Premiere Pro")
+            after_create = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(after_create.status_code, 200)
+            skill.delete()
+            after_delete = self.client.get(url, HTTP_IF_NONE_MATCH=after_create["ETag"])
+            self.assertEqual(after_delete.status_code, 200)
+
+    def test_stale_document_save_is_rejected(self):
+        CV.objects.create(student=self.student, full_name="Cond Student", email="s@aiu.test", phone="0100")
+        current = self.client.get("/api/cvs/my/document/")["X-Content-Hash"]
+
+        stale = self.client.put(
+            "/api/cvs/my/document/", {"summary": "Editor"}, format="json", HTTP_IF_MATCH='"not-the-current-hash"',
+        )
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.json()["content_hash"], current)
+
+        fresh = self.client.put("/api/cvs/my/document/", {"summary": "Editor"}, format="json", HTTP_IF_MATCH=f'"{current}"')
+        self.assertEqual(fresh.status_code, 200)
+
+
+# ---------------- LOGIN BACKEND ---------------- #
+
+class LoginBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lena = User.objects.create_user("lena", "Lena.Kim@aiu.test", "pw-lena-123")
+        StudentProfile.objects.create(user=cls.lena, student_id="AIU9001", year="2")
+
+    def _auth(self, username, password="pw-lena-123"):
+        return authenticate(None, username=username, password=password)
+
+    def test_username_or_email_with_profile_in_one_query(self):
+        self.assertEqual(self._auth("lena"), self.lena)
+        with self.assertNumQueries(1):
+            user = find_login_user("Lena.Kim@aiu.test")
+            self.assertEqual(user.student_profile.student_id, "AIU9001")
+
+    def test_email_is_case_insensitive_but_username_is_not(self):
+        self.assertEqual(self._auth("lena.kim@AIU.TEST"), self.lena)
+        self.assertEqual(self._auth("  LENA.KIM@aiu.test "), self.lena)
+        self.assertIsNone(self._auth("Lena"))
+
+    def test_exact_email_wins_over_case_variant_and_username(self):
+        twin = User.objects.create_user("lena2", "lena.kim@aiu.test", "pw-lena-123")
+        User.objects.create_user("LENA.KIM@AIU.TEST", "other@aiu.test", "pw-lena-123")
+        self.assertEqual(self._auth("lena.kim@aiu.test"), twin)
+        self.assertEqual(self._auth("Lena.Kim@aiu.test"), self.lena)
+        self.assertEqual(self._auth("LENA.KIM@AIU.TEST"), self.lena)  # email before username
+
+    def test_wrong_password_inactive_and_unknown_users_are_rejected(self):
+        self.assertIsNone(self._auth("lena", "wrong"))
+        self.assertIsNone(self._auth("lena", None))
+        with mock.patch.object(User, "set_password") as hasher:
+            self.assertIsNone(self._auth("nobody@aiu.test"))
+        hasher.assert_called_once_with("pw-lena-123")  # same cost as a wrong password
+
+        User.objects.filter(pk=self.lena.pk).update(is_active=False)
+        self.assertIsNone(self._auth("lena"))
+        response = self.client.post(
+            "/api/auth/login/", {"username": "lena", "password": "pw-lena-123"}, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+# ---------------- LOGIN THROTTLES ---------------- #
+
+@override_settings(CACHES=TEST_CACHES, LOGIN_THROTTLE_ENABLED=True, TRACING_ENABLED=False, METRICS_ENABLED=False)
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        caches["throttle"].clear()
+        rates = mock.patch.object(SimpleRateThrottle, "THROTTLE_RATES", {"login_ip": "3/min", "login_username": "2/min"})
+        rates.start()
+        self.addCleanup(rates.stop)
+
+    def _login(self, username, ip="10.0.0.1", **extra):
+        return self.client.post(
+            "/api/auth/login/", {"username": username, "password": "wrong"},
+            content_type="application/json", REMOTE_ADDR=ip, **extra,
+        )
+
+    def test_per_ip_limit_ignores_forged_forwarded_for(self):
+        for i in range(3):
+            self.assertEqual(self._login(f"user{i}", HTTP_X_FORWARDED_FOR=f"203.0.113.{i}").status_code, 401)
+        self.assertEqual(self._login("user9", HTTP_X_FORWARDED_FOR="203.0.113.9").status_code, 429)
+        self.assertEqual(self._login("user9", ip="10.0.0.2").status_code, 401)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1})
+    def test_trusted_proxy_hop_is_the_client_ip(self):
+        for i in range(3):
+            self._login(f"user{i}", HTTP_X_FORWARDED_FOR="198.51.100.7, 203.0.113.1")
+        self.assertEqual(self._login("user9", HTTP_X_FORWARDED_FOR="203.0.113.1").status_code, 429)
+        self.assertEqual(self._login("user9", HTTP_X_FORWARDED_FOR="203.0.113.2").status_code, 401)
+
+    def test_per_username_limit_spans_ips(self):
+        self.assertEqual(self._login("Victim", ip="10.0.1.1").status_code, 401)
+        self.assertEqual(self._login("victim ", ip="10.0.1.2").status_code, 401)
+        self.assertEqual(self._login("VICTIM", ip="10.0.1.3").status_code, 429)
+        self.assertEqual(self._login("someone-else", ip="10.0.1.4").status_code, 401)
+
+    def test_counters_are_atomic_on_the_file_cache(self):
+        import threading
+
+        from django.core.cache.backends.filebased import FileBasedCache
+
+        from .throttles import _hit
+
+        directory = tempfile.mkdtemp(prefix="aiu-test-throttle-")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+
+        def burst():
+            cache = FileBasedCache(directory, {})  # one per "worker"
+            for _ in range(10):
+                _hit(cache, "throttle_login_ip_10.0.0.1:1", 60)
+
+        threads = [threading.Thread(target=burst) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(FileBasedCache(directory, {}).get("throttle_login_ip_10.0.0.1:1"), 80)
+
+
+# ---------------- AUTH USER CACHE ---------------- #
+
+@override_settings(CACHES=TEST_CACHES, TRACING_ENABLED=False, METRICS_ENABLED=False)
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.user = User.objects.create_user("auth_student", "auth@aiu.test", "pw-auth-123")
+        self.token = RefreshToken.for_user(self.user).access_token
+
+    def _get(self, token=None):
+        return self.client.get("/api/categories/", HTTP_AUTHORIZATION=f"Bearer {token or self.token}")
+
+    def test_deactivated_user_is_rejected_at_once(self):
+        self.assertEqual(self._get().status_code, 200)  # user now cached
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+            # until the commit another request could only re-cache the old row
+            self.assertEqual(self._get().status_code, 200)
+        self.assertEqual(self._get().status_code, 401)
+
+    def test_password_change_revokes_tokens(self):
+        self.assertEqual(self._get().status_code, 200)
+        self.user.set_password("pw-auth-456")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self._get().status_code, 401)
+        self.assertEqual(self._get(RefreshToken.for_user(self.user).access_token).status_code, 200)
+
+    def test_password_hash_is_not_cached(self):
+        from .authentication import get_cached_user, user_cache_version
+
+        self.assertEqual(self._get().status_code, 200)
+        entry = caches["default"].get(f"auth:user-entry:{self.user.pk}:v{user_cache_version(self.user.pk)}")
+        self.assertNotIn(self.user.password, repr(entry))
+        self.assertNotIn("password", entry["values"])
+
+        with self.assertNumQueries(0):
+            user = get_cached_user(self.user.pk)
+            self.assertEqual((user.username, user.is_active), ("auth_student", True))
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password("pw-auth-123"))  # deferred: loaded on demand
+
+    def test_process_local_auth_cache_is_reported(self):
+        from .authentication import check_auth_cache_shared
+
+        with override_settings(AUTH_USER_CACHE_ALIAS="default", DEBUG=False):
+            self.assertEqual([w.id for w in check_auth_cache_shared(None)], ["api.W001"])
+        shared = dict(TEST_CACHES, auth={
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.path.join(tempfile.gettempdir(), "aiu-test-auth"),
+        })
+        with override_settings(CACHES=shared, AUTH_USER_CACHE_ALIAS="auth", DEBUG=False):
+            self.assertEqual(check_auth_cache_shared(None), [])
+
+
+# ---------------- CV SEARCH ---------------- #
+
+@override_settings(CACHES=TEST_CACHES, TRACING_ENABLED=False, METRICS_ENABLED=False)
+class CVSearchTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user("search_admin", "a@aiu.test", "pw-search-123", user_type="admin", is_staff=True)
+        self.cvs = {}
+        with self.captureOnCommitCallbacks(execute=True):
+            for i, (name, skills, summary, status) in enumerate((
+                ("editor", ["Premiere Pro", "After Effects"], "Wedding films", "approved"),
+                ("photographer", ["Lightroom", "Photoshop"], "Premiere Pro basics", "approved"),
+                ("pending", ["Premiere Pro"], "", "pending"),
+            )):
+                u = User.objects.create_user(f"search_{name}", f"{name}@aiu.test", "pw-search-123")
+                StudentProfile.objects.create(user=u, student_id=f"S{i}", year=str(i + 1), program="BMC")
+                cv = CV.objects.create(student=u, full_name=name, email=u.email, phone="0100", summary=summary, status=status)
+                for j, skill in enumerate(skills):
+                    Skill.objects.create(cv=cv, name=skill, order=j)
+                self.cvs[name] = cv
+
+    def _ids(self, q, status="approved"):
+        ranked, _clauses = search_cvs(q, status=status)
+        return [cv_id for cv_id, _score in ranked]
+
+    def test_parse_query(self):
+        self.assertEqual(parse_query('"after effects" photo* -wedding'), [{
+            "must": [("after", False), ("effects", False), ("photo", True)],
+            "must_not": [("wedding", False)],
+        }])
+        self.assertEqual(parse_query("editor OR NOT x OR c++"), [
+            {"must": [("editor", False)], "must_not": []},
+            {"must": [("c++", False)], "must_not": []},
+        ])  # a clause with only exclusions matches nothing and is dropped
+        self.assertEqual(parse_query("the AND of"), [])
+
+    def test_ranking_and_filters(self):
+        editor, photographer = self.cvs["editor"].pk, self.cvs["photographer"].pk
+        # a skill hit outweighs a summary hit; the pending CV is filtered out
+        self.assertEqual(self._ids("premiere pro"), [editor, photographer])
+        self.assertEqual(len(self._ids("premiere", status=None)), 3)
+        self.assertEqual(self._ids("premiere -wedding"), [photographer])
+        self.assertEqual(self._ids("light*"), [photographer])
+        self.assertEqual(sorted(self._ids("lightroom OR effects")), sorted([editor, photographer]))
+        self.assertEqual(facet_counts([editor, photographer]), {"year": {"1": 1, "2": 1}, "program": {"BMC": 2}})
+
+    def test_section_save_and_delete_reindex(self):
+        cv = self.cvs["photographer"]
+        with self.captureOnCommitCallbacks(execute=True):
+            skill = Skill.objects.create(cv=cv, name="DaVinci Resolve", order=5)
+        self.assertEqual(self._ids("davinci"), [cv.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            skill.delete()
+        self.assertEqual(self._ids("davinci"), [])
+
+    def test_document_put_reindexes(self):
+        cv = self.cvs["editor"]
+        client = APIClient()
+        client.force_authenticate(cv.student)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.put("/api/cvs/my/document/", {"skills": [{"name": "Blender", "order": 0}]}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self._ids("blender"), [cv.pk])
+        self.assertNotIn(cv.pk, self._ids("effects"))
+
+    def test_search_endpoint_is_admin_only_and_returns_facets(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        data = client.get("/api/cvs/search/", {"q": "premiere"}).json()
+        self.assertEqual([r["id"] for r in data["results"]], [self.cvs["editor"].pk, self.cvs["photographer"].pk])
+        self.assertEqual(data["facets"]["program"], {"BMC": 2})
+        self.assertEqual(client.get("/api/cvs/search/").status_code, 400)
+        client.force_authenticate(self.cvs["editor"].student)
+        self.assertEqual(client.get("/api/cvs/search/", {"q": "premiere"}).status_code, 403)
+
+
+# ---------------- VIEWSET RESPONSE CACHE ---------------- #
+
+@override_settings(CACHES=TEST_CACHES, TRACING_ENABLED=False, METRICS_ENABLED=False)
+class ViewsetCacheTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.admin = User.objects.create_user(
+            "cache_admin", "a@aiu.test", "pw-cache-123", user_type="admin", is_staff=True, first_name="Ada", last_name="Admin",
+        )
+        self.student = User.objects.create_user("cache_student", "s@aiu.test", "pw-cache-123")
+        category = Category.objects.create(name="Video editing")
+        Tutorial.objects.create(
+            title="Cuts", description="d", category=category,
+            video_url="https://example.com/v", duration=10, created_by=self.admin,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_hit_and_invalidation_through_related_user(self):
+        first = self.client.get("/api/tutorials/")
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(self.client.get("/api/tutorials/")["X-Cache"], "HIT")
+
+        update_last_login(None, self.admin)  # a login changes nothing the list shows
+        self.assertEqual(self.client.get("/api/tutorials/")["X-Cache"], "HIT")
+
+        self.admin.first_name = "Grace"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.save()
+            # not before the commit: a reader could cache the old rows under the new version
+            self.assertEqual(self.client.get("/api/tutorials/")["X-Cache"], "HIT")
+        renamed = self.client.get("/api/tutorials/")
+        self.assertEqual(renamed["X-Cache"], "MISS")
+        self.assertEqual(_rows(renamed.json())[0]["created_by_name"], "Grace Admin")
+
+    def test_scope_decides_who_shares_an_entry(self):
+        factory = RequestFactory()
+        view = TutorialViewSet(basename="tutorial", action="list")
+        other = User.objects.create_user("cache_student2", "s2@aiu.test", "pw-cache-123")
+
+        def key(policy, user):
+            request = factory.get("/api/tutorials/")
+            request.user = user
+            return policy.key(view, request)
+
+        public, per_user, per_role = (CachePolicy(models=(Tutorial,), scope=s) for s in ("public", "user", "role"))
+        self.assertEqual(key(public, self.student), key(public, self.admin))
+        self.assertNotEqual(key(per_user, self.student), key(per_user, other))
+        self.assertEqual(key(per_role, self.student), key(per_role, other))
+        self.assertNotEqual(key(per_role, self.student), key(per_role, self.admin))
+        with self.assertRaises(ValueError):
+            CachePolicy(models=(Tutorial,), scope="everyone")
+
+    def test_stats_are_per_worker(self):
+        self.client.get("/api/tutorials/")
+        self.client.get("/api/tutorials/")
+        stats = viewset_cache_stats()
+        self.assertTrue(stats["per_worker"])
+        self.assertEqual(stats["pid"], os.getpid())
+        self.assertGreaterEqual(stats["viewsets"]["tutorial"]["hits"], 1)
+
+    def test_versions_live_in_the_shared_alias(self):
+        from django.core.cache.backends.filebased import FileBasedCache
+
+        from .caching import _version_key, check_versions_cache_shared
+
+        directory = tempfile.mkdtemp(prefix="aiu-test-versions-")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        shared = dict(TEST_CACHES, versions={
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directory,
+        })
+        with override_settings(CACHES=shared, MODEL_VERSION_CACHE_ALIAS="versions", DEBUG=False):
+            before = model_version(Tutorial)
+            bump_model_version(Tutorial)
+            self.assertEqual(check_versions_cache_shared(None), [])
+        other_worker = FileBasedCache(directory, {})
+        self.assertEqual(other_worker.get(_version_key(Tutorial)), before + 1)
+
+        with override_settings(MODEL_VERSION_CACHE_ALIAS="default", DEBUG=False):
+            self.assertEqual([w.id for w in check_versions_cache_shared(None)], ["api.W002"])
+
+
+# ---------------- DASHBOARDS ---------------- #
+
+@override_settings(CACHES=TEST_CACHES, TRACING_ENABLED=False, METRICS_ENABLED=False)
+class DashboardTests(SeededTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+
+    def test_admin_dashboard_counts(self):
+        self.client.force_authenticate(self.admin)
+        data = self.client.get("/api/dashboard/admin/", {"top": 5}).json()
+        counts = data["counts"]
+        self.assertEqual(counts["students"], 12)
+        self.assertEqual((counts["bookings"]["pending"], counts["bookings"]["approved"], counts["bookings"]["total"]), (12, 12, 24))
+        self.assertEqual((counts["rentals"]["pending"], counts["rentals"]["approved"]), (6, 6))
+        self.assertEqual((counts["cvs"]["pending"], counts["cvs"]["approved"]), (6, 6))
+        self.assertEqual(len(data["pending"]["bookings"]), 5)
+        self.assertEqual(data["pending"]["cvs"][0]["student_name"], "Student 0")
+        self.assertEqual(self.client.get("/api/dashboard/admin/").status_code, 200)
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.get("/api/dashboard/admin/").status_code, 403)
+
+    def test_admin_dashboard_cache_follows_model_versions(self):
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get("/api/dashboard/admin/")["X-Cache"], "MISS")
+        self.assertEqual(self.client.get("/api/dashboard/admin/")["X-Cache"], "HIT")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CV.objects.filter(student=self.student).get().delete()
+        response = self.client.get("/api/dashboard/admin/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["counts"]["cvs"]["pending"], 5)
+
+        self.student.last_name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.save()
+        self.assertEqual(self.client.get("/api/dashboard/admin/")["X-Cache"], "MISS")
+
+    def test_student_dashboard_content(self):
+        self.client.force_authenticate(self.student)
+        data = self.client.get("/api/dashboard/student/").json()
+        self.assertEqual(data["profile"]["student_id"], "AIU0000")
+        self.assertEqual(data["stats"]["bookings"], {"total": 2, "upcoming": 2, "pending": 1, "completed": 0})
+        self.assertEqual(data["stats"]["rentals"], {"active": 0, "overdue": 0, "pending": 1})
+        self.assertEqual(data["stats"]["tutorials"], {"started": 8, "completed": 0, "available": 8})
+        self.assertEqual(len(data["continue_watching"]), 5)
+        self.assertEqual(data["cv"]["status"], "pending")
+
+    def test_student_dashboard_etag(self):
+        self.client.force_authenticate(self.student)
+        etag = self.client.get("/api/dashboard/student/")["ETag"]
+        self.assertEqual(self.client.get("/api/dashboard/student/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        TutorialProgress.objects.filter(student=self.student).first().delete()
+        response = self.client.get("/api/dashboard/student/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["stats"]["tutorials"]["started"], 7)
+
+
+# ---------------- SPARSE FIELDS ---------------- #
+
+@override_settings(CACHES=TEST_CACHES, TRACING_ENABLED=False, METRICS_ENABLED=False)
+class SparseFieldsTests(SeededTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _get(self, url, **params):
+        return self.client.get(f"{url}?{urlencode(params)}")
+
+    def test_fields_select_top_level_nested_and_added_keys(self):
+        rows = _rows(self._get("/api/tutorials/", fields="id,title").json())
+        self.assertTrue(rows)
+        self.assertEqual({tuple(sorted(r)) for r in rows}, {("id", "title")})
+
+        row = _rows(self._get("/api/student-profiles/", fields="student_id,user.username").json())[0]
+        self.assertEqual(list(row), ["user", "student_id"])
+        self.assertEqual(list(row["user"]), ["username"])
+
+        row = _rows(self._get("/api/lab-bookings/", fields="id,lab_room").json())[0]
+        self.assertEqual(sorted(row), ["id", "lab_room"])
+        self.assertEqual(row["lab_room"], "BMC Lab")
+
+    def test_expand_controls_nested_objects_and_joins(self):
+        row = _rows(self._get("/api/student-profiles/", expand="").json())[0]
+        self.assertNotIn("user", row)
+        self.assertTrue(row["full_name"])  # still joined for get_full_name, no N+1
+
+        row = _rows(self._get("/api/student-profiles/", fields="student_id", expand="user").json())[0]
+        self.assertEqual(sorted(row), ["student_id", "user"])
+        self.assertIn("username", row["user"])
+
+        def profile_queries(**params):
+            with CaptureQueriesContext(connection) as ctx:
+                self._get("/api/student-profiles/", **params)
+            return [q["sql"] for q in ctx.captured_queries if StudentProfile._meta.db_table in q["sql"]]
+
+        users = f'"{User._meta.db_table}"'
+        self.assertTrue(any(users in sql for sql in profile_queries(fields="id,full_name")))
+        self.assertFalse(any(users in sql for sql in profile_queries(fields="id,student_id")))
+
+    def test_unknown_names_are_rejected(self):
+        cases = [
+            ({"fields": "id,titel"}, "fields", "titel"),
+            ({"fields": "user.nickname"}, "fields", "user.nickname"),
+            ({"fields": "student_id.value"}, "fields", "student_id.value"),
+            ({"expand": "student_id"}, "expand", "student_id"),
+            ({"expand": "teacher"}, "expand", "teacher"),
+        ]
+        for params, param, name in cases:
+            with self.subTest(**params):
+                url = "/api/tutorials/" if name == "titel" else "/api/student-profiles/"
+                response = self._get(url, **params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(name, response.json()[param][0])
+        # write-only fields are not readable either
+        response = self._get("/api/equipment-requests/", fields="id,cart_items")
+        self.assertEqual(response.status_code, 400)
+
+
+# ---------------- COMPRESSION ---------------- #
+
+class CompressionTests(TestCase):
+    def _run(self, body, content_type="application/json", accept="gzip, deflate, br", **headers):
+        def view(request):
+            response = HttpResponse(body, content_type=content_type)
+            for name, value in headers.items():
+                response[name] = value
+            return response
+
+        request = RequestFactory().get("/api/x/", HTTP_ACCEPT_ENCODING=accept) if accept is not None \
+            else RequestFactory().get("/api/x/")
+        return CompressionMiddleware(view)(request)
+
+    def test_encoding_follows_accept_encoding(self):
+        self.assertEqual(choose_encoding("gzip, deflate, br", brotli_available=True), "br")
+        self.assertEqual(choose_encoding("gzip, deflate, br", brotli_available=False), "gzip")
+        self.assertEqual(choose_encoding("br;q=0, gzip;q=0.5", brotli_available=True), "gzip")
+        self.assertEqual(choose_encoding("*", brotli_available=False), "gzip")
+        self.assertEqual(choose_encoding("*;q=0, br", brotli_available=True), "br")
+        self.assertIsNone(choose_encoding("gzip;q=0, identity", brotli_available=False))
+        self.assertIsNone(choose_encoding("", brotli_available=True))
+
+    @override_settings(COMPRESSION_MIN_SIZE=1024)
+    def test_large_json_is_gzipped_with_vary_and_weak_etag(self):
+        body = json.dumps([{"id": i, "title": f"Tutorial {i}"} for i in range(100)]).encode()
+        response = self._run(body, accept="gzip", ETag='"abc"')
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(response["ETag"], 'W/"abc"')
+
+        plain = self._run(body, accept=None)
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertEqual(plain.content, body)
+        self.assertIn("Accept-Encoding", plain["Vary"])  # caches must still split on it
+
+    @override_settings(COMPRESSION_MIN_SIZE=1024)
+    def test_small_binary_and_encoded_bodies_pass_through(self):
+        small = self._run(b'{"ok": true}')
+        self.assertFalse(small.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", small["Vary"])
+
+        png = self._run(b"\x89PNG" + b"\0" * 4000, content_type="image/png")
+        self.assertFalse(png.has_header("Content-Encoding"))
+        self.assertFalse(png.has_header("Vary"))
+
+        encoded = self._run(b"x" * 4000, content_type="text/plain", **{"Content-Encoding": "identity"})
+        self.assertEqual(encoded["Content-Encoding"], "identity")
+        self.assertEqual(encoded.content, b"x" * 4000)
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    def test_brotli_when_available(self):
+        body = b"a" * 4000
+        response = self._run(body, content_type="text/plain", accept="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), body)
+
+    def test_fast_renderer_matches_drf_output(self):
+        data = {
+            "when": timezone.now(), "day": timezone.localdate(), "at": dtime(9, 30),
+            "price": Decimal("12.50"), "uuid": uuid.UUID(int=1), "label": gettext_lazy("Pending"),
+            "nested": [{"n": None, "ok": True, "text": "caf\u00e9"}], 7: "int key",
+        }
+        fast = FastJSONRenderer().render(data)
+        self.assertEqual(json.loads(fast), json.loads(JSONRenderer().render(data)))
+        self.assertIn("café".encode(), fast)
+        big = {"big": 2 ** 70}  # beyond orjson: DRF's renderer takes over
+        self.assertEqual(FastJSONRenderer().render(big), JSONRenderer().render(big))
+        indented = FastJSONRenderer().render(data, "application/json; indent=2")
+        self.assertEqual(indented, JSONRenderer().render(data, "application/json; indent=2"))
+
+
+# ---------------- PAGINATION ---------------- #
+
+@override_settings(CACHES=TEST_CACHES, TRACING_ENABLED=False, METRICS_ENABLED=False)
+class HybridPaginationTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.admin = User.objects.create_user("page_admin", "a@aiu.test", "pw-page-123", user_type="admin", is_staff=True)
+        for i in range(7):
+            u = User.objects.create_user(f"page_s{i}", f"p{i}@aiu.test", "pw-page-123")
+            StudentProfile.objects.create(user=u, student_id=f"P{i:03d}", year="1")
+        # equal timestamps: only the id tie-breaker orders these rows
+        StudentProfile.objects.update(created_at=timezone.now())
+        self.ids = list(StudentProfile.objects.order_by("-id").values_list("id", flat=True))
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _walk(self, url, direction):
+        pages = []
+        while url:
+            body = self.client.get(url).json()
+            self.assertNotIn("count", body)
+            pages.append([row["id"] for row in body["results"]])
+            url = body[direction]
+        return pages
+
+    def test_cursor_pages_across_equal_timestamps(self):
+        forward = self._walk("/api/student-profiles/?pagination=cursor&page_size=3", "next")
+        self.assertEqual([len(p) for p in forward], [3, 3, 1])
+        self.assertEqual(sum(forward, []), self.ids)
+
+        last = self.client.get("/api/student-profiles/?pagination=cursor&page_size=3").json()["next"]
+        last = self.client.get(last).json()["next"]
+        backward = self._walk(last, "previous")
+        self.assertEqual(sum(reversed(backward), []), self.ids)
+
+        self.assertEqual(self.client.get("/api/student-profiles/?cursor=cD1nYXJiYWdl").status_code, 404)
+
+    def test_cursor_counts_on_request(self):
+        body = self.client.get("/api/student-profiles/?pagination=cursor&count=exact").json()
+        self.assertEqual((body["count"], body["count_is_approximate"]), (7, False))
+        body = self.client.get("/api/student-profiles/?pagination=cursor&count=approx").json()
+        self.assertEqual(body["count"], 7)
+
+    def test_page_number_mode_is_unchanged(self):
+        body = self.client.get("/api/student-profiles/").json()
+        self.assertEqual(list(body), ["count", "next", "previous", "results"])
+        self.assertEqual(body["count"], 7)
+        # viewsets without cursor_ordering ignore the cursor parameters
+        Category.objects.create(name="Video editing")
+        body = self.client.get("/api/categories/?pagination=cursor").json()
+        self.assertEqual(body["count"], 1)
+
+    def test_page_size_parameter_in_page_number_mode(self):
+        body = self.client.get("/api/student-profiles/?page_size=3").json()
+        self.assertEqual((body["count"], len(body["results"])), (7, 3))
+        self.assertIn("page_size=3", body["next"])
+
+
+# ---------------- LOAD TEST FIXTURES ---------------- #
+
+class StandInDatabaseTests(TestCase):
+    def test_fixture_commands_refuse_a_real_database(self):
+        from django.core.management import CommandError, call_command
+
+        with mock.patch.object(connection, "vendor", "mysql"):
+            with self.assertRaisesMessage(CommandError, "--allow-real-db"):
+                call_command("loadtest", "--duration", "1")
+        self.assertFalse(User.objects.filter(username__startswith="loadtest_").exists())
+
+    def test_scale_seed_needs_a_stand_in_database_and_a_password(self):
+        from django.core.management import CommandError, call_command
+
+        with mock.patch.object(connection, "vendor", "mysql"):
+            with self.assertRaisesMessage(CommandError, "--allow-real-db"):
+                call_command("seed_scale_data", "--password", "pw-scale-123")
+        with self.assertRaisesMessage(CommandError, "--password is required"):
+            call_command("seed_scale_data")
+        self.assertFalse(User.objects.filter(username__startswith="scale_").exists())
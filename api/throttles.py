@@ -0,0 +1,155 @@
+"""
+Login admission throttles.
+
+Password hashing is the expensive part of a login, so floods are turned away
+here, before the view calls authenticate(). Two sliding-window limits apply to
+/api/auth/login/ and /api/token/: one per client IP and one per username.
+
+Counters live in the "throttle" cache (file based by default), which every
+gunicorn worker on the host shares; point it at Redis to share across hosts.
+Rejections are counted per scope, see login_throttle_stats().
+
+Parallel attempts must not slip past a limit, so each attempt is one atomic
+add/incr on a per-window counter instead of DRF's read-modify-write request
+log. Redis and locmem do add/incr atomically; the file cache does not, so
+there the update holds an flock on the cache directory.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from rest_framework.throttling import SimpleRateThrottle
+
+
+THROTTLE_SCOPES = ("login_ip", "login_username")
+
+
+def throttle_cache():
+    try:
+        return caches[getattr(settings, "LOGIN_THROTTLE_CACHE_ALIAS", "throttle")]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+def _rejected_key(scope) -> str:
+    return f"throttle:rejected:{scope}"
+
+
+def record_rejection(scope) -> None:
+    cache = throttle_cache()
+    key = _rejected_key(scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+    cache.set(f"throttle:last-rejected:{scope}", time.time(), None)
+
+
+def login_throttle_stats():
+    """{scope: {"rate", "rejected", "last_rejected_at"}} for every login scope."""
+    cache = throttle_cache()
+    rates = SimpleRateThrottle.THROTTLE_RATES
+    return {
+        scope: {
+            "rate": rates.get(scope),
+            "rejected": int(cache.get(_rejected_key(scope)) or 0),
+            "last_rejected_at": cache.get(f"throttle:last-rejected:{scope}"),
+        }
+        for scope in THROTTLE_SCOPES
+    }
+
+
+@contextmanager
+def _serialized(cache):
+    """Make add/incr on a FileBasedCache atomic across processes (a no-op elsewhere)."""
+    directory = getattr(cache, "_dir", None)
+    if directory is None or os.name != "posix":
+        yield
+        return
+    import fcntl
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "throttle.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _hit(cache, key, timeout):
+    """Count one attempt on key; returns the new count."""
+    with _serialized(cache):
+        if cache.add(key, 1, timeout):
+            return 1
+        try:
+            return cache.incr(key)
+        except ValueError:  # expired between add and incr
+            cache.set(key, 1, timeout)
+            return 1
+
+
+class _LoginThrottle(SimpleRateThrottle):
+    """
+    Sliding-window limit from two fixed-window counters: the previous window's
+    count, weighted by how much of it still overlaps the last `duration`
+    seconds, plus the current one. Every attempt counts, rejected ones too.
+    """
+
+    def __init__(self):
+        self.cache = throttle_cache()
+        super().__init__()
+
+    def allow_request(self, request, view):
+        if not getattr(settings, "LOGIN_THROTTLE_ENABLED", True):
+            return True
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, offset = divmod(self.now, self.duration)
+        window = int(window)
+        current = _hit(self.cache, f"{self.key}:{window}", self.duration * 2)
+        previous = self.cache.get(f"{self.key}:{window - 1}") or 0
+        self.remaining = self.duration - offset
+        if previous * (self.remaining / self.duration) + current > self.num_requests:
+            return self.throttle_failure()
+        return True
+
+    def throttle_failure(self):
+        record_rejection(self.scope)
+        return False
+
+    def wait(self):
+        # an estimate: the current window's attempts count in full until it ends
+        return self.remaining
+
+
+class LoginIPThrottle(_LoginThrottle):
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class LoginUsernameThrottle(_LoginThrottle):
+    """Per-account limit, so a botnet spreading one account over many IPs is still capped."""
+
+    scope = "login_username"
+
+    def get_cache_key(self, request, view):
+        try:
+            username = request.data.get("username")
+        except Exception:
+            username = None
+        if not username or not isinstance(username, str):
+            return None  # nothing to key on; the IP throttle still applies
+        ident = username.strip().lower()[:150]
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+LOGIN_THROTTLES = [LoginIPThrottle, LoginUsernameThrottle]
@@ -0,0 +1,338 @@
+"""
+Lightweight request tracing.
+
+TracingMiddleware (api.middleware) opens a trace per request. Spans are
+recorded for the DRF view, every DB query, the outermost serializer
+to_representation, and for code wrapped in span() / @traced (file I/O,
+QR rendering, ReportLab). A finished trace is kept when it was sampled
+(TRACING_SAMPLE_RATE) or when the request took at least TRACING_SLOW_MS,
+and is appended as one JSON line to TRACING_DIR/traces-<pid>.jsonl. Each
+file rotates at TRACING_MAX_BYTES, keeping TRACING_BACKUP_COUNT old files.
+Workers recycled by gunicorn (max_requests) leave their files behind, so the
+directory as a whole is capped at TRACING_MAX_TOTAL_BYTES: on rotation and on
+a worker's first write the oldest files are deleted until it fits.
+
+    manage.py traces              slowest recent traces
+    manage.py traces <trace id>   span tree of one trace
+
+Outside a traced request span() and @traced cost one context lookup.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+def tracing_enabled() -> bool:
+    return bool(getattr(settings, "TRACING_ENABLED", True))
+
+
+def tracing_dir() -> str:
+    return getattr(settings, "TRACING_DIR", None) or os.path.join(tempfile.gettempdir(), "aiu_traces")
+
+
+# ---------------- SPANS ---------------- #
+
+class Span:
+    __slots__ = ("id", "parent", "name", "kind", "start", "end", "attrs")
+
+    def __init__(self, span_id, parent, name, kind, attrs):
+        self.id = span_id
+        self.parent = parent
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end = None
+
+
+class Trace:
+    """Spans of one request; at most TRACING_MAX_SPANS are kept, the rest are counted."""
+
+    def __init__(self, sampled=False):
+        self.trace_id = uuid.uuid4().hex
+        self.sampled = sampled
+        self.started_at = time.time()
+        self.spans = []
+        self.dropped = 0
+        self.max_spans = int(getattr(settings, "TRACING_MAX_SPANS", 2000))
+
+    def open(self, name, kind, attrs, parent):
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return None
+        s = Span(len(self.spans) + 1, parent.id if parent is not None else None, name, kind, attrs)
+        self.spans.append(s)
+        return s
+
+    @property
+    def duration(self):
+        root = self.spans[0] if self.spans else None
+        if root is None or root.end is None:
+            return 0.0
+        return root.end - root.start
+
+    def to_record(self, **extra):
+        from .nplusone import query_shape
+
+        t0 = self.spans[0].start if self.spans else 0.0
+        spans = []
+        for s in self.spans:
+            attrs = s.attrs
+            if s.kind == "db" and "sql" in attrs:
+                attrs = dict(attrs, sql=query_shape(attrs["sql"])[:500])
+            spans.append({
+                "id": s.id,
+                "parent": s.parent,
+                "name": s.name,
+                "kind": s.kind,
+                "start_ms": round((s.start - t0) * 1000, 3),
+                "duration_ms": round(((s.end if s.end is not None else s.start) - s.start) * 1000, 3),
+                "attrs": attrs,
+            })
+        return {
+            "trace_id": self.trace_id,
+            "ts": self.started_at,
+            "pid": os.getpid(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "dropped_spans": self.dropped,
+            **extra,
+            "spans": spans,
+        }
+
+
+_trace = contextvars.ContextVar("aiu_trace", default=None)
+_span = contextvars.ContextVar("aiu_trace_span", default=None)
+
+
+def current_trace():
+    return _trace.get()
+
+
+@contextmanager
+def span(name, kind="internal", **attrs):
+    """Record the block as a child of the current span; a no-op outside a trace."""
+    trace = _trace.get()
+    s = trace.open(name, kind, attrs, _span.get()) if trace is not None else None
+    if s is None:
+        yield None
+        return
+    token = _span.set(s)
+    try:
+        yield s
+    except BaseException as exc:
+        s.attrs["error"] = type(exc).__name__
+        raise
+    finally:
+        s.end = time.perf_counter()
+        _span.reset(token)
+
+
+def traced(name=None, kind="internal"):
+    """Decorator form of span(); the span is named after the function by default."""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _trace.get() is None:
+                return fn(*args, **kwargs)
+            with span(label, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def start_trace(name, **attrs):
+    """Root span of a new trace, decided for sampling up front."""
+    rate = float(getattr(settings, "TRACING_SAMPLE_RATE", 0.01))
+    trace = Trace(sampled=rate > 0 and random.random() < rate)
+    trace_token = _trace.set(trace)
+    try:
+        with span(name, "request", **attrs):
+            yield trace
+    finally:
+        _trace.reset(trace_token)
+
+
+def db_span_wrapper(execute, sql, params, many, context):
+    """connection.execute_wrapper that records each query as a span."""
+    trace = _trace.get()
+    s = trace.open("db", "db", {"sql": sql[:1000], "many": bool(many)}, _span.get()) if trace is not None else None
+    if s is None:
+        return execute(sql, params, many, context)
+    try:
+        return execute(sql, params, many, context)
+    except BaseException as exc:
+        s.attrs["error"] = type(exc).__name__
+        raise
+    finally:
+        s.end = time.perf_counter()
+
+
+# ---------------- FRAMEWORK HOOKS ---------------- #
+
+_patched = False
+_patch_lock = threading.Lock()
+
+
+def install_tracing_hooks():
+    """
+    Span APIView.dispatch (the view) and the outermost serializer
+    to_representation; nested serializers run inside that span, so the
+    queries they trigger show up under it. Idempotent.
+    """
+    global _patched
+    with _patch_lock:
+        if _patched:
+            return
+        from rest_framework.serializers import ListSerializer, Serializer
+        from rest_framework.views import APIView
+
+        dispatch = APIView.dispatch
+
+        def traced_dispatch(self, request, *args, **kwargs):
+            if _trace.get() is None:
+                return dispatch(self, request, *args, **kwargs)
+            with span(f"view {type(self).__name__}", "view") as s:
+                response = dispatch(self, request, *args, **kwargs)
+                if s is not None:
+                    # ViewSet.action is only known once dispatch has run
+                    s.attrs["action"] = getattr(self, "action", None)
+                return response
+
+        APIView.dispatch = traced_dispatch
+
+        for cls in (Serializer, ListSerializer):
+            cls.to_representation = _traced_representation(cls.to_representation)
+        _patched = True
+
+
+def _traced_representation(original):
+    @functools.wraps(original)
+    def to_representation(self, *args, **kwargs):
+        if _trace.get() is None:
+            return original(self, *args, **kwargs)
+        parent = _span.get()
+        if parent is not None and parent.kind == "serializer":
+            return original(self, *args, **kwargs)
+        serializer = self.child if hasattr(self, "child") else self
+        with span(f"serialize {type(serializer).__name__}", "serializer", many=self is not serializer):
+            return original(self, *args, **kwargs)
+    return to_representation
+
+
+# ---------------- EXPORT ---------------- #
+
+_write_lock = threading.Lock()
+
+
+def should_keep(trace) -> bool:
+    slow_ms = float(getattr(settings, "TRACING_SLOW_MS", 1000))
+    return trace.sampled or trace.duration * 1000 >= slow_ms
+
+
+def _rotate(path):
+    backups = int(getattr(settings, "TRACING_BACKUP_COUNT", 3))
+    for i in range(backups - 1, 0, -1):
+        src = f"{path}.{i}"
+        if os.path.exists(src):
+            os.replace(src, f"{path}.{i + 1}")
+    if backups > 0:
+        os.replace(path, f"{path}.1")
+    else:
+        os.remove(path)
+
+
+def _prune(directory, keep):
+    """Delete the oldest trace files until the directory fits TRACING_MAX_TOTAL_BYTES."""
+    limit = int(getattr(settings, "TRACING_MAX_TOTAL_BYTES", 100 * 1024 * 1024))
+    files = []
+    for name in os.listdir(directory):
+        if not (name.startswith("traces-") and ".jsonl" in name):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        files.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _mtime, size, _path in files)
+    for _mtime, size, path in sorted(files):
+        if total <= limit:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+_pruned_in = None  # pid that last pruned on its first write
+
+
+def write_trace(record):
+    """Append one trace to this worker's JSONL file, rotating it when full."""
+    global _pruned_in
+    try:
+        directory = tracing_dir()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"traces-{os.getpid()}.jsonl")
+        line = json.dumps(record, default=str, separators=(",", ":")) + "\n"
+        max_bytes = int(getattr(settings, "TRACING_MAX_BYTES", 10 * 1024 * 1024))
+        with _write_lock:
+            prune = _pruned_in != os.getpid()
+            try:
+                if os.path.getsize(path) + len(line) > max_bytes:
+                    _rotate(path)
+                    prune = True
+            except FileNotFoundError:
+                pass
+            if prune:
+                _pruned_in = os.getpid()
+                _prune(directory, keep=path)
+            with open(path, "a") as fh:
+                fh.write(line)
+    except Exception:
+        # tracing must never break a request
+        pass
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def read_traces(paths=None):
+    """Every trace record in TRACING_DIR (or the given files), oldest file first."""
+    if paths is None:
+        directory = tracing_dir()
+        try:
+            names = [n for n in os.listdir(directory) if n.startswith("traces-") and ".jsonl" in n]
+        except FileNotFoundError:
+            names = []
+        paths = sorted((os.path.join(directory, n) for n in names), key=_mtime)
+    for path in paths:
+        try:
+            with open(path) as fh:
+                for line in fh:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash
+        except OSError:
+            continue
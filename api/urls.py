@@ -47,6 +47,17 @@ urlpatterns = [
     path('auth/login/', views.login, name='login'),
     path('auth/profile/', views.profile, name='profile'),
     path('auth/change-password/', views.change_password, name='change-password'),
+    path('auth/throttle-stats/', views.throttle_stats, name='throttle-stats'),
+    path('cache-stats/', views.cache_stats, name='cache-stats'),
+
+    # Staff profiling
+    path('profiles/', views.profiles, name='profiles'),
+    path('profiles/<str:profile_id>/', views.profile_detail, name='profile-detail'),
+    path('profiles/<str:profile_id>/<str:kind>/', views.profile_download, name='profile-download'),
+
+    # Dashboards
+    path('dashboard/admin/', views.admin_dashboard, name='admin-dashboard'),
+    path('dashboard/student/', views.student_dashboard, name='student-dashboard'),
 
     # Router auto endpoints
     path('', include(router.urls)),
@@ -1,26 +1,45 @@
 from rest_framework import viewsets, status, permissions
-from rest_framework.decorators import action, api_view, permission_classes, parser_classes
+from rest_framework.decorators import (
+    action, api_view, permission_classes, parser_classes, throttle_classes, authentication_classes,
+)
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView
 
 from django.contrib.auth import authenticate, get_user_model
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.http import HttpResponse
+from django.conf import settings
 
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from django.db.models import F, Q
+from django.db.models import Count, F, Q
 from django.db import transaction
 
 from datetime import timedelta, datetime, date
 import csv
+import hashlib
+import hmac
+import json
 import re
 
 from io import BytesIO
 
 from .models import *
 from .serializers import *
+from .cv_document import CV_SECTIONS, cv_document_queryset, apply_cv_document, compute_content_hash
+from .cv_search import search_cvs, facet_counts
+from .dashboard import get_admin_dashboard, build_student_dashboard
+from .throttles import LOGIN_THROTTLES, login_throttle_stats
+from .caching import CachePolicy, CachedViewSetMixin, bump_versions_on_commit, cache_stats as viewset_cache_stats
+from .conditional import ConditionalGetMixin
+from .sparse_fields import SparseFieldsViewSetMixin
+from .metrics import render_prometheus
+from .authentication import CachedJWTAuthentication
+from .tracing import span, traced
+from .db_router import mark_wrote, primary_reads
+from . import profiling
 
 User = get_user_model()
 
@@ -88,6 +107,7 @@ def register(request):
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
+        mark_wrote(user.id)  # the new account's first reads must not miss it on a replica
         refresh = RefreshToken.for_user(user)
         return Response(
             {
@@ -105,19 +125,13 @@ def register(request):
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes(LOGIN_THROTTLES)
 def login(request):
     username = request.data.get("username")
     password = request.data.get("password")
 
-    # allow login by email
-    if username and "@" in username:
-        try:
-            user_obj = User.objects.get(email=username)
-            username = user_obj.username
-        except User.DoesNotExist:
-            pass
-
-    user = authenticate(username=username, password=password)
+    # UsernameOrEmailBackend: username-or-email + profiles in one joined query
+    user = authenticate(request, username=username, password=password)
     if user:
         refresh = RefreshToken.for_user(user)
         profile_data = {}
@@ -217,6 +231,154 @@ def change_password(request):
     return Response({"message": "Success"})
 
 
+class ThrottledTokenObtainPairView(TokenObtainPairView):
+    """/api/token/ with the same admission throttles as login."""
+    throttle_classes = LOGIN_THROTTLES
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def throttle_stats(request):
+    """Rejected login attempts per throttle scope (counters shared by all workers)."""
+    return Response(login_throttle_stats())
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """
+    Viewset response-cache hit/miss counters of the worker that answers
+    (per process, not summed over workers: see "pid" and "per_worker").
+    """
+    return Response(viewset_cache_stats())
+
+
+# --------------- DASHBOARDS --------------- #
+
+def _query_int(request, name, default, lo, hi):
+    try:
+        v = int(request.query_params.get(name, default))
+    except (ValueError, TypeError):
+        v = default
+    return max(lo, min(hi, v))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_dashboard(request):
+    """
+    One-shot admin summary: status counts, today's bookings per lab, pending queues,
+    overdue rentals and low-stock equipment. ?top=10 (queue length), ?low_stock=1.
+    """
+    top_n = _query_int(request, "top", 10, 1, 50)
+    low_stock = _query_int(request, "low_stock", 1, 0, 1000)
+
+    data, hit = get_admin_dashboard(top_n=top_n, low_stock_threshold=low_stock)
+    response = Response(data)
+    response["X-Cache"] = "HIT" if hit else "MISS"
+    return response
+
+
+def _etag_response(request, data):
+    """
+    Response with a strong ETag over the JSON body; answers 304 when the client
+    already has it (If-None-Match), so repeat visits skip the download.
+    """
+    raw = json.dumps(data, sort_keys=True, default=str, separators=(",", ":"))
+    etag = '"%s"' % hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    if_none_match = request.headers.get("If-None-Match") or ""
+    client_tags = [t.strip() for t in if_none_match.split(",") if t.strip()]
+    if etag in client_tags or "*" in client_tags:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def student_dashboard(request):
+    """
+    One-shot student home: upcoming bookings, active/overdue rentals, CV status,
+    continue-watching tutorials and stat counters. Supports If-None-Match -> 304.
+    """
+    top_n = _query_int(request, "top", 5, 1, 20)
+    data = build_student_dashboard(request.user, top_n=top_n, request=request)
+    return _etag_response(request, data)
+
+
+# --------------- METRICS --------------- #
+
+def _can_read_metrics(request) -> bool:
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and hmac.compare_digest(request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}"):
+        return True
+    # a forwarded request only looks local because of the proxy
+    if (
+        request.META.get("REMOTE_ADDR") in getattr(settings, "METRICS_ALLOWED_IPS", ())
+        and "HTTP_X_FORWARDED_FOR" not in request.META
+    ):
+        return True
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except Exception:
+        result = None
+    return bool(result and _is_admin(result[0]))
+
+
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def metrics(request):
+    """Prometheus scrape endpoint (all workers on this host)."""
+    if not _can_read_metrics(request):
+        return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# --------------- PROFILING --------------- #
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def profiles(request):
+    """Profiles recorded with X-Profile / ?_profile=, newest first."""
+    return Response(profiling.list_profiles())
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def profile_detail(request, profile_id):
+    """Metadata of one profile plus its top functions by cumulative time."""
+    try:
+        meta = profiling.load_meta(profile_id)
+    except (FileNotFoundError, ValueError):
+        return Response({"detail": "Profile not found."}, status=status.HTTP_404_NOT_FOUND)
+    meta["top"] = profiling.top_functions(profile_id)
+    return Response(meta)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def profile_download(request, profile_id, kind):
+    """The raw profile: pstats (cProfile only) or collapsed stacks for flamegraph tools."""
+    try:
+        if kind == "pstats":
+            body, content_type, ext = profiling.read_pstats(profile_id), "application/octet-stream", "prof"
+        elif kind == "collapsed":
+            body, content_type, ext = profiling.read_collapsed(profile_id), "text/plain; charset=utf-8", "collapsed.txt"
+        else:
+            return Response({"detail": "Use pstats or collapsed."}, status=status.HTTP_400_BAD_REQUEST)
+    except FileNotFoundError:
+        return Response({"detail": "Profile not found."}, status=status.HTTP_404_NOT_FOUND)
+    response = HttpResponse(body, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="profile-{profile_id}.{ext}"'
+    return response
+
+
 # --------------- STANDARD VIEWSETS --------------- #
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -231,9 +393,11 @@ class UserViewSet(viewsets.ModelViewSet):
         return User.objects.filter(id=self.request.user.id)
 
 
-class StudentProfileViewSet(viewsets.ModelViewSet):
+class StudentProfileViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     serializer_class = StudentProfileSerializer
     permission_classes = [IsAuthenticated]
+    conditional_models = (StudentProfile, User)
+    cursor_ordering = ("-created_at", "-id")
 
     def get_queryset(self):
         user = self.request.user
@@ -245,26 +409,36 @@ class StudentProfileViewSet(viewsets.ModelViewSet):
         return qs.filter(user=user)
 
 
-class AdminProfileViewSet(viewsets.ModelViewSet):
+class AdminProfileViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     serializer_class = AdminProfileSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
+    conditional_models = (AdminProfile, User)
 
     def get_queryset(self):
         return AdminProfile.objects.select_related("user").all()
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, CachedViewSetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
+    cache_policy = CachePolicy(models=(Category, Tutorial))
+
+    def get_queryset(self):
+        # tutorial_count in the same query instead of one COUNT per category
+        return Category.objects.annotate(
+            active_tutorial_count=Count("tutorials", filter=Q(tutorials__is_active=True))
+        ).order_by("name")  # Meta.ordering is not applied to aggregate queries
 
 
 # --------------- TUTORIAL LOGIC --------------- #
 
-class TutorialViewSet(viewsets.ModelViewSet):
-    queryset = Tutorial.objects.all()
+class TutorialViewSet(ConditionalGetMixin, CachedViewSetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
+    queryset = Tutorial.objects.select_related("category", "created_by")
     serializer_class = TutorialSerializer
     permission_classes = [IsAuthenticated]
+    # created_by_name comes from User; logins (last_login only) do not bump it
+    cache_policy = CachePolicy(models=(Tutorial, Category, User))
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -273,6 +447,7 @@ class TutorialViewSet(viewsets.ModelViewSet):
     def increment_views(self, request, pk=None):
         tutorial = self.get_object()
         Tutorial.objects.filter(pk=tutorial.pk).update(views=F("views") + 1)
+        bump_versions_on_commit(Tutorial)
         tutorial.refresh_from_db(fields=["views"])
         serializer = self.get_serializer(tutorial)
         return Response(serializer.data)
@@ -364,13 +539,15 @@ class TutorialViewSet(viewsets.ModelViewSet):
         return response
 
 
-class TutorialProgressViewSet(viewsets.ModelViewSet):
+class TutorialProgressViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = TutorialProgress.objects.all()
     serializer_class = TutorialProgressSerializer
     permission_classes = [IsAuthenticated]
+    # last_watched_at moves on every heartbeat, so page by insertion order
+    cursor_ordering = ("-id",)
 
     def get_queryset(self):
-        return TutorialProgress.objects.filter(student=self.request.user)
+        return TutorialProgress.objects.filter(student=self.request.user).select_related("tutorial")
 
     def _to_int(self, v, default=None):
         if v is None or v == "":
@@ -455,16 +632,18 @@ class TutorialProgressViewSet(viewsets.ModelViewSet):
         if hasattr(student, "student_profile"):
             count = TutorialProgress.objects.filter(student=student, completed=True).count()
             StudentProfile.objects.filter(user=student).update(tutorials_watched=count)
+            bump_versions_on_commit(StudentProfile)
 
         return Response(self.get_serializer(progress_record).data, status=status.HTTP_200_OK)
 
 
 # --------------- LAB LOGIC --------------- #
 
-class LabViewSet(viewsets.ModelViewSet):
+class LabViewSet(ConditionalGetMixin, CachedViewSetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = Lab.objects.all()
     serializer_class = LabSerializer
     permission_classes = [IsAuthenticated]
+    cache_policy = CachePolicy(models=(Lab,))
 
     def _safe_filename(self, s: str) -> str:
         s = (s or "").strip()
@@ -575,6 +754,53 @@ class LabViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    def _export_row(self, lab, b):
+        student_user = getattr(b, "student", None)
+
+        student_id = "N/A"
+        if student_user and hasattr(student_user, "student_profile"):
+            try:
+                sid = getattr(student_user.student_profile, "student_id", None)
+                if sid:
+                    student_id = str(sid)
+            except Exception:
+                pass
+
+        student_name = ""
+        try:
+            student_name = (student_user.get_full_name() or "").strip() if student_user else ""
+        except Exception:
+            student_name = ""
+        if not student_name:
+            student_name = getattr(student_user, "username", "") or "N/A"
+
+        time_slot = b.time_slot or ""
+        if not time_slot:
+            try:
+                st = b.start_time.strftime("%H:%M") if b.start_time else ""
+                et = b.end_time.strftime("%H:%M") if b.end_time else ""
+                if st and et:
+                    time_slot = f"{st}-{et}"
+            except Exception:
+                pass
+
+        combined_status = self._get_combined_status(b)
+        checkout_at = self._checkout_time_from_comment(b)
+
+        return [
+            b.id,
+            getattr(lab, "name", "") or "Lab",
+            student_id,
+            student_name,
+            time_slot,
+            getattr(b, "imac_number", "") or "",
+            getattr(b, "purpose", "") or "",
+            getattr(b, "participants", "") or "",
+            getattr(b, "admin_comment", "") or "",
+            combined_status,
+            checkout_at,
+        ]
+
     @action(detail=True, methods=["get"], url_path="bookings-export", permission_classes=[IsAuthenticated, IsAdminUser])
     def bookings_export(self, request, pk=None):
         lab = self.get_object()
@@ -608,59 +834,16 @@ class LabViewSet(viewsets.ModelViewSet):
         ])
 
         for b in qs:
-            student_user = getattr(b, "student", None)
-
-            student_id = "N/A"
-            if student_user and hasattr(student_user, "student_profile"):
-                try:
-                    sid = getattr(student_user.student_profile, "student_id", None)
-                    if sid:
-                        student_id = str(sid)
-                except Exception:
-                    pass
-
-            student_name = ""
-            try:
-                student_name = (student_user.get_full_name() or "").strip() if student_user else ""
-            except Exception:
-                student_name = ""
-            if not student_name:
-                student_name = getattr(student_user, "username", "") or "N/A"
-
-            time_slot = b.time_slot or ""
-            if not time_slot:
-                try:
-                    st = b.start_time.strftime("%H:%M") if b.start_time else ""
-                    et = b.end_time.strftime("%H:%M") if b.end_time else ""
-                    if st and et:
-                        time_slot = f"{st}-{et}"
-                except Exception:
-                    pass
-
-            combined_status = self._get_combined_status(b)
-            checkout_at = self._checkout_time_from_comment(b)
-
-            writer.writerow([
-                b.id,
-                getattr(lab, "name", "") or "Lab",
-                student_id,
-                student_name,
-                time_slot,
-                getattr(b, "imac_number", "") or "",
-                getattr(b, "purpose", "") or "",
-                getattr(b, "participants", "") or "",
-                getattr(b, "admin_comment", "") or "",
-                combined_status,
-                checkout_at,
-            ])
+            writer.writerow(self._export_row(lab, b))
 
         return response
 
 
-class LabBookingViewSet(viewsets.ModelViewSet):
+class LabBookingViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = LabBooking.objects.all()
     serializer_class = LabBookingSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ("-created_at", "-id")
 
     def _parse_end_time_from_time_slot(self, time_slot: str):
         if not time_slot:
@@ -696,6 +879,10 @@ class LabBookingViewSet(viewsets.ModelViewSet):
         now = timezone.now()
         candidates = qs.filter(booking_date__isnull=False).exclude(status__isnull=True)
 
+        # read-modify-write: a lagging replica could undo a fresh cancel/reject
+        with primary_reads():
+            candidates = list(candidates)
+
         for b in candidates:
             status_lower = (b.status or "").strip().lower()
             if status_lower != "approved":
@@ -721,7 +908,10 @@ class LabBookingViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        qs = LabBooking.objects.select_related("lab", "student").order_by("-created_at", "-id")
+        qs = (
+            LabBooking.objects.select_related("lab", "student", "student__student_profile", "reviewed_by")
+            .order_by("-created_at", "-id")
+        )
 
         if _is_admin(user):
             self._auto_complete_qs(qs)
@@ -896,10 +1086,11 @@ class LabBookingViewSet(viewsets.ModelViewSet):
 
 # --------------- EQUIPMENT LOGIC --------------- #
 
-class EquipmentCategoryViewSet(viewsets.ModelViewSet):
+class EquipmentCategoryViewSet(ConditionalGetMixin, CachedViewSetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = EquipmentCategory.objects.all()
     serializer_class = EquipmentCategorySerializer
     permission_classes = [IsAuthenticated]
+    cache_policy = CachePolicy(models=(EquipmentCategory,))
 
     def get_permissions(self):
         # list/retrieve for all logged-in
@@ -909,14 +1100,15 @@ class EquipmentCategoryViewSet(viewsets.ModelViewSet):
         return [IsAuthenticated(), IsAdminUser()]
 
 
-class EquipmentRequestViewSet(viewsets.ModelViewSet):
+class EquipmentRequestViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = EquipmentRequest.objects.all()
     serializer_class = EquipmentRequestSerializer
     permission_classes = [IsAuthenticated]
+    conditional_models = (EquipmentRequest, EquipmentRequestItem, Equipment)
 
     def get_queryset(self):
         user = self.request.user
-        qs = EquipmentRequest.objects.select_related("student").prefetch_related(
+        qs = EquipmentRequest.objects.select_related("student", "student__student_profile").prefetch_related(
             "items", "items__equipment"
         ).order_by("-created_at", "-id")
 
@@ -975,6 +1167,7 @@ class EquipmentRequestViewSet(viewsets.ModelViewSet):
                 status="cancelled",
                 updated_at=timezone.now()
             )
+            bump_versions_on_commit(EquipmentRequestItem)
 
         req_obj.refresh_from_db()
         return Response(self.get_serializer(req_obj).data, status=status.HTTP_200_OK)
@@ -1067,6 +1260,7 @@ class EquipmentRequestViewSet(viewsets.ModelViewSet):
                 try:
                     count = EquipmentRental.objects.filter(student=req_obj.student, status="approved").count()
                     StudentProfile.objects.filter(user=req_obj.student).update(active_rentals=count)
+                    bump_versions_on_commit(StudentProfile)
                 except Exception:
                     pass
 
@@ -1110,10 +1304,19 @@ class EquipmentRequestViewSet(viewsets.ModelViewSet):
         return Response(self.get_serializer(req_obj).data, status=status.HTTP_200_OK)
 
 
-class EquipmentViewSet(viewsets.ModelViewSet):
+class EquipmentViewSet(ConditionalGetMixin, CachedViewSetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = Equipment.objects.all()
     serializer_class = EquipmentSerializer
     permission_classes = [IsAuthenticated]
+    # rented/rentable counts come from rentals; categories from the m2m table
+    cache_policy = CachePolicy(models=(Equipment, EquipmentCategory, EquipmentCategoryMapping, EquipmentRental))
+
+    def get_queryset(self):
+        # rented_count feeds Equipment.rented_units(), which otherwise runs a
+        # COUNT per item (three times: rented, available, rentable)
+        return Equipment.objects.prefetch_related("categories").annotate(
+            rented_count=Count("rentals", filter=Q(rentals__status__in=Equipment.RENTED_STATUSES))
+        ).order_by("name", "id")  # Meta.ordering is dropped by the aggregate; id keeps pages stable
 
     def _safe_filename(self, s: str) -> str:
         s = (s or "").strip()
@@ -1138,9 +1341,24 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         except Exception:
             return ""
 
+    def _export_row(self, e):
+        return [
+            getattr(e, "equipment_id", "") or "",
+            getattr(e, "name", "") or "",
+            getattr(e, "description", "") or "",
+            self._category_value(e),
+            getattr(e, "status", "") or "",
+            getattr(e, "quantity_total", "") if getattr(e, "quantity_total", None) is not None else "",
+            getattr(e, "quantity_under_maintenance", "") if getattr(e, "quantity_under_maintenance", None) is not None else "",
+            getattr(e, "quantity_available", "") if getattr(e, "quantity_available", None) is not None else "",
+            getattr(e, "computed_available", "") if getattr(e, "computed_available", None) is not None else "",
+            getattr(e, "rentable_quantity", "") if getattr(e, "rentable_quantity", None) is not None else "",
+            (e.rented_units() if hasattr(e, "rented_units") else ""),
+        ]
+
     @action(detail=False, methods=["get"], url_path="export", permission_classes=[IsAuthenticated, IsAdminUser])
     def export_equipment(self, request):
-        qs = Equipment.objects.all().order_by("equipment_id", "id")
+        qs = self.get_queryset().order_by("equipment_id", "id")
 
         response = HttpResponse(content_type="text/csv")
         filename = f"{self._safe_filename('equipment_inventory')}.csv"
@@ -1162,19 +1380,7 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         ])
 
         for e in qs:
-            writer.writerow([
-                getattr(e, "equipment_id", "") or "",
-                getattr(e, "name", "") or "",
-                getattr(e, "description", "") or "",
-                self._category_value(e),
-                getattr(e, "status", "") or "",
-                getattr(e, "quantity_total", "") if getattr(e, "quantity_total", None) is not None else "",
-                getattr(e, "quantity_under_maintenance", "") if getattr(e, "quantity_under_maintenance", None) is not None else "",
-                getattr(e, "quantity_available", "") if getattr(e, "quantity_available", None) is not None else "",
-                getattr(e, "computed_available", "") if getattr(e, "computed_available", None) is not None else "",
-                getattr(e, "rentable_quantity", "") if getattr(e, "rentable_quantity", None) is not None else "",
-                (e.rented_units() if hasattr(e, "rented_units") else ""),
-            ])
+            writer.writerow(self._export_row(e))
 
         return response
 
@@ -1214,6 +1420,7 @@ class EquipmentViewSet(viewsets.ModelViewSet):
                     try:
                         count = EquipmentRental.objects.filter(student=r.student, status="approved").count()
                         StudentProfile.objects.filter(user=r.student).update(active_rentals=count)
+                        bump_versions_on_commit(StudentProfile)
                     except Exception:
                         pass
 
@@ -1271,10 +1478,11 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         )
 
 
-class EquipmentRentalViewSet(viewsets.ModelViewSet):
+class EquipmentRentalViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = EquipmentRental.objects.all()
     serializer_class = EquipmentRentalSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ("-created_at", "-id")
 
     def _auto_overdue_qs(self, qs):
         """
@@ -1283,11 +1491,13 @@ class EquipmentRentalViewSet(viewsets.ModelViewSet):
         """
         now = timezone.now()
         try:
-            qs.filter(
+            marked = qs.filter(
                 expected_return_date__isnull=False,
                 expected_return_date__lt=now,
                 status__in=["approved", "active"],
             ).update(status="overdue", updated_at=now if _model_has_field(EquipmentRental(), "updated_at") else None)
+            if marked:
+                bump_versions_on_commit(EquipmentRental)
         except Exception:
             # fallback loop (in case model doesn't have updated_at or DB rejects None)
             candidates = qs.exclude(expected_return_date__isnull=True)
@@ -1305,7 +1515,9 @@ class EquipmentRentalViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         qs = (
-            EquipmentRental.objects.select_related("equipment", "student")
+            EquipmentRental.objects.select_related(
+                "equipment", "student", "student__student_profile", "reviewed_by", "issued_by", "returned_to"
+            )
             .order_by("-rental_date", "-id")
         )
 
@@ -1379,6 +1591,16 @@ class EquipmentRentalViewSet(viewsets.ModelViewSet):
 
         return s or ""
 
+    def _export_row(self, r):
+        return [
+            self._student_id_from_user(getattr(r, "student", None)),
+            self._student_name_from_user(getattr(r, "student", None)),
+            self._fmt_dt(getattr(r, "rental_date", None)),
+            self._fmt_dt(getattr(r, "actual_return_date", None)),
+            self._issued_admin_name(getattr(r, "issued_by", None)),
+            self._computed_status(r),
+        ]
+
     @action(detail=False, methods=["get"], url_path="export", permission_classes=[IsAuthenticated, IsAdminUser])
     def export_rentals(self, request):
         equipment_id = (request.query_params.get("equipment_id") or "").strip()
@@ -1407,17 +1629,7 @@ class EquipmentRentalViewSet(viewsets.ModelViewSet):
         ])
 
         for r in qs:
-            student_user = getattr(r, "student", None)
-            issued_by = getattr(r, "issued_by", None)
-
-            writer.writerow([
-                self._student_id_from_user(student_user),
-                self._student_name_from_user(student_user),
-                self._fmt_dt(getattr(r, "rental_date", None)),
-                self._fmt_dt(getattr(r, "actual_return_date", None)),
-                self._issued_admin_name(issued_by),
-                self._computed_status(r),
-            ])
+            writer.writerow(self._export_row(r))
 
         return response
 
@@ -1448,6 +1660,7 @@ class EquipmentRentalViewSet(viewsets.ModelViewSet):
         if hasattr(rental.student, "student_profile"):
             count = EquipmentRental.objects.filter(student=rental.student, status="approved").count()
             StudentProfile.objects.filter(user=rental.student).update(active_rentals=count)
+            bump_versions_on_commit(StudentProfile)
 
         return Response(self.get_serializer(rental).data)
 
@@ -1521,26 +1734,162 @@ class EquipmentRentalViewSet(viewsets.ModelViewSet):
         if hasattr(rental.student, "student_profile"):
             count = EquipmentRental.objects.filter(student=rental.student, status="approved").count()
             StudentProfile.objects.filter(user=rental.student).update(active_rentals=count)
+            bump_versions_on_commit(StudentProfile)
 
         return Response(self.get_serializer(rental).data)
 
 
 # --------------- CV LOGIC --------------- #
 
-class CVViewSet(viewsets.ModelViewSet):
+class CVViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = CV.objects.all()
     serializer_class = CVSerializer
     permission_classes = [IsAuthenticated]
+    conditional_models = (CV,) + tuple(model for _, model, _ in CV_SECTIONS)
     parser_classes = (MultiPartParser, FormParser, JSONParser)
 
+    document_actions = ("document", "my_document", "documents")
+
     def get_queryset(self):
+        if self.action in self.document_actions:
+            qs = cv_document_queryset(CV.objects.all())
+        else:
+            # CVSerializer nests these four sections
+            qs = CV.objects.prefetch_related("education", "experience", "projects", "skills")
+
         if _is_admin(self.request.user):
-            return CV.objects.all()
-        return CV.objects.filter(student=self.request.user)
+            return qs
+        return qs.filter(student=self.request.user)
+
+    def get_serializer_class(self):
+        if self.action in self.document_actions:
+            return CVDocumentSerializer
+        return CVSerializer
 
     def perform_create(self, serializer):
         serializer.save(student=self.request.user)
 
+    @action(detail=True, methods=["get"], url_path="document")
+    def document(self, request, pk=None):
+        """Full CV with every section in one response (fixed query count)."""
+        cv = self.get_object()
+        return Response(self.get_serializer(cv).data)
+
+    @action(detail=False, methods=["get", "put"], url_path="my/document")
+    def my_document(self, request):
+        """
+        GET -> full CV document (+ X-Content-Hash header)
+        PUT -> save the whole document in one transaction (see cv_document.apply_cv_document)
+        """
+        if request.method == "PUT":
+            return self._save_my_document(request)
+
+        cv = self.get_queryset().filter(student=request.user).first()
+        if not cv:
+            return Response({"detail": "No CV found for this user."}, status=status.HTTP_404_NOT_FOUND)
+
+        data = self.get_serializer(cv).data
+        response = Response(data)
+        response["X-Content-Hash"] = compute_content_hash(data)
+        return response
+
+    @action(detail=False, methods=["get"], url_path="search", permission_classes=[IsAuthenticated, IsAdminUser])
+    def search(self, request):
+        """
+        Talent search over skills, project technologies, experience, certifications and summary.
+        ?q=premiere pro AND photo*   (see cv_search for syntax)
+        ?status=approved (default) | any CV status | all
+        """
+        q = (request.query_params.get("q") or "").strip()
+        if not q:
+            return Response({"detail": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        status_filter = (request.query_params.get("status") or "approved").strip().lower()
+        ranked, _clauses = search_cvs(q, status=None if status_filter == "all" else status_filter)
+        scores = dict(ranked)
+
+        page = self.paginate_queryset([cv_id for cv_id, _score in ranked])
+        page_ids = page if page is not None else [cv_id for cv_id, _score in ranked]
+
+        cvs = self.get_queryset().filter(id__in=page_ids).select_related("student__student_profile")
+        by_id = {cv.id: cv for cv in cvs}
+
+        results = []
+        for cv_id in page_ids:
+            cv = by_id.get(cv_id)
+            if cv is None:
+                continue
+            row = self.get_serializer(cv).data
+            sp = getattr(cv.student, "student_profile", None)
+            row["score"] = round(scores.get(cv_id, 0.0), 4)
+            row["student_year"] = getattr(sp, "year", None)
+            row["program"] = getattr(sp, "program", None)
+            results.append(row)
+
+        facets = facet_counts(scores.keys())
+
+        if page is not None:
+            response = self.get_paginated_response(results)
+            response.data["facets"] = facets
+            return response
+        return Response({"count": len(ranked), "results": results, "facets": facets})
+
+    def _save_my_document(self, request):
+        payload = request.data
+        base_hash = ""
+        if isinstance(payload, dict):
+            base_hash = str(payload.get("base_hash") or "").strip()
+        if not base_hash:
+            base_hash = (request.headers.get("If-Match") or "").strip().strip('"')
+
+        with transaction.atomic():
+            # lock the CV row so two editors can't interleave section diffs
+            cv = (
+                cv_document_queryset(CV.objects.select_for_update())
+                .filter(student=request.user)
+                .first()
+            )
+
+            if cv is not None and base_hash:
+                current_hash = compute_content_hash(self.get_serializer(cv).data)
+                if current_hash != base_hash:
+                    return Response(
+                        {"detail": "CV was changed elsewhere. Reload and try again.", "content_hash": current_hash},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+
+            cv, changes = apply_cv_document(
+                cv, payload, student=request.user, context=self.get_serializer_context()
+            )
+
+        cv = cv_document_queryset(CV.objects.filter(pk=cv.pk)).get()
+        data = self.get_serializer(cv).data
+        return Response(
+            {
+                "document": data,
+                "content_hash": compute_content_hash(data),
+                "changes": changes,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["get"], url_path="documents", permission_classes=[IsAuthenticated, IsAdminUser])
+    def documents(self, request):
+        """
+        Admin list mode: a page of full CV documents.
+        Sections are prefetched for the page only, so cost does not grow with page size.
+        """
+        qs = self.get_queryset()
+
+        status_filter = (request.query_params.get("status") or "").strip()
+        if status_filter:
+            qs = qs.filter(status=status_filter)
+
+        page = self.paginate_queryset(qs)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(qs, many=True).data)
+
     def _safe_filename(self, s: str) -> str:
         s = (s or "").strip()
         if not s:
@@ -1548,6 +1897,7 @@ class CVViewSet(viewsets.ModelViewSet):
         s = re.sub(r"[^a-zA-Z0-9_\-]+", "_", s)
         return s[:60] or "cv"
 
+    @traced("reportlab.render_cv", kind="render")
     def _build_cv_pdf(self, cv: CV) -> bytes:
         from reportlab.lib.pagesizes import A4
         from reportlab.pdfgen import canvas
@@ -1733,9 +2083,10 @@ class CVViewSet(viewsets.ModelViewSet):
                 img_bytes = None
                 try:
                     if hasattr(photo_field, "open"):
-                        photo_field.open("rb")
-                        img_bytes = photo_field.read()
-                        photo_field.close()
+                        with span("file.read", "io", file=getattr(photo_field, "name", "")):
+                            photo_field.open("rb")
+                            img_bytes = photo_field.read()
+                            photo_field.close()
                 except Exception:
                     img_bytes = None
 
@@ -1753,7 +2104,8 @@ class CVViewSet(viewsets.ModelViewSet):
                 else:
                     pth = getattr(photo_field, "path", None)
                     if pth:
-                        img_reader = ImageReader(pth)
+                        with span("file.read", "io", file=pth):
+                            img_reader = ImageReader(pth)
                         c.drawImage(
                             img_reader,
                             photo_x,
@@ -2126,7 +2478,7 @@ class CVViewSet(viewsets.ModelViewSet):
         return response
 
 
-class BaseCVItemViewSet(viewsets.ModelViewSet):
+class BaseCVItemViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):